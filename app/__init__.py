@@ -54,6 +54,9 @@ def create_app(config_name=Config.ENV):
     from .routes import api
     app.register_blueprint(api)
 
+    from .commands import register_commands
+    register_commands(app)
+
     
     # Swagger setup
     SWAGGER_URL = '/api/docs'
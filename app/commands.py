@@ -0,0 +1,90 @@
+'''
+This module defines the Flask CLI commands for the VASSET Flask application.
+
+Commands:
+    - flask rebuild-portfolio-summary [--user-id ID ...]: Recompute portfolio summaries from the asset tables.
+    - flask rebuild-asset-index [--user-id ID ...]: Recreate the cross-type asset index from the asset tables.
+    - flask ingest-prices (--file PATH | --stub) [--symbol SYM ...] [--days N] [--step SECONDS]:
+      Load price history for held symbols into the price store.
+    - flask backfill-symbols [--batch-size N]: Link stock and crypto rows without a symbol_id to the symbols table.
+    - flask load-fx-rates (--file PATH | --stub): Store exchange rates against the US dollar.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import time
+import click
+
+from app.utils.helpers.portfolio_helpers import rebuild_portfolio_summaries
+from app.utils.helpers.asset_index_helpers import rebuild_asset_index
+from app.utils.helpers.price_history_helpers import (get_price_store, held_symbols, ingest_price_file,
+                                                     ingest_from_provider, StubPriceProvider)
+from app.utils.helpers.symbol_helpers import backfill_symbol_ids
+from app.utils.helpers.fx_helpers import read_fx_file, store_fx_rates, StubFxProvider
+
+
+@click.command('rebuild-portfolio-summary')
+@click.option('--user-id', 'user_ids', type=int, multiple=True, help='Only rebuild these users.')
+def rebuild_portfolio_summary_command(user_ids):
+    """Recompute portfolio summaries from scratch."""
+    count = rebuild_portfolio_summaries(list(user_ids) or None)
+    click.echo(f'Rebuilt {count} portfolio summaries.')
+
+
+@click.command('rebuild-asset-index')
+@click.option('--user-id', 'user_ids', type=int, multiple=True, help='Only rebuild these users.')
+def rebuild_asset_index_command(user_ids):
+    """Recreate the cross-type asset index."""
+    count = rebuild_asset_index(list(user_ids) or None)
+    click.echo(f'Indexed {count} assets.')
+
+
+@click.command('ingest-prices')
+@click.option('--file', 'path', type=click.Path(exists=True, dir_okay=False), help="CSV with 'symbol', 'timestamp' and 'price' columns.")
+@click.option('--stub', is_flag=True, help='Generate offline prices with the stub provider.')
+@click.option('--symbol', 'symbols', multiple=True, help='Symbols to generate. Defaults to every held stock and crypto symbol.')
+@click.option('--days', type=int, default=30, show_default=True, help='How many days back to generate.')
+@click.option('--step', type=int, default=3600, show_default=True, help='Seconds between generated ticks.')
+def ingest_prices_command(path, stub, symbols, days, step):
+    """Load price history into the price store."""
+    if bool(path) == stub:
+        raise click.UsageError('Pass exactly one of --file or --stub.')
+
+    store = get_price_store()
+    if path:
+        written = ingest_price_file(store, path)
+    else:
+        end = int(time.time())
+        written = ingest_from_provider(store, StubPriceProvider(), list(symbols) or held_symbols(),
+                                       end - days * 86400, end, step)
+    click.echo(f'Ingested {written} prices.')
+
+
+@click.command('backfill-symbols')
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='Rows updated per transaction.')
+def backfill_symbols_command(batch_size):
+    """Link stocks and cryptos without a symbol_id to the symbols table."""
+    count = backfill_symbol_ids(batch_size)
+    click.echo(f'Linked {count} assets to symbols.')
+
+
+@click.command('load-fx-rates')
+@click.option('--file', 'path', type=click.Path(exists=True, dir_okay=False), help="CSV with 'currency' and 'rate' (units per US dollar) columns.")
+@click.option('--stub', is_flag=True, help='Store the offline sample rates.')
+def load_fx_rates_command(path, stub):
+    """Store exchange rates against the US dollar."""
+    if bool(path) == stub:
+        raise click.UsageError('Pass exactly one of --file or --stub.')
+
+    rates = read_fx_file(path) if path else StubFxProvider().fetch()
+    count = store_fx_rates(rates)
+    click.echo(f'Stored {count} exchange rates.')
+
+
+def register_commands(app):
+    app.cli.add_command(rebuild_portfolio_summary_command)
+    app.cli.add_command(rebuild_asset_index_command)
+    app.cli.add_command(ingest_prices_command)
+    app.cli.add_command(backfill_symbols_command)
+    app.cli.add_command(load_fx_rates_command)
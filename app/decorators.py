@@ -1,19 +1,23 @@
 '''
-This module defines the `roles_required` decorator for the Trendit³ Flask application.
+This module defines the `roles_required` and `etag_by_data_version` decorators for the Trendit³ Flask application.
 
 Used for handling role-based access control.
 The `roles_required` decorator is used to ensure that the current user has all of the specified roles.
 If the user does not have the required roles, it returns a 403 error.
 
+The `etag_by_data_version` decorator adds conditional GET support to per-user read endpoints.
+
 @author: Chris  
 @link: https://github.com/al-chris
 @package: vasset_global
 '''
 from functools import wraps
+from flask import request, make_response, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from app.models import User
 from app.utils import error_response
+from app.utils.helpers.version_helpers import get_data_version, data_version_etag
 
 def roles_required(*required_roles):
     """
@@ -44,3 +48,47 @@ def roles_required(*required_roles):
                 return error_response("Access denied: You do not have the required roles to access this resource", 403)
         return wrapper
     return decorator
+
+
+def etag_by_data_version(fn=None, *, vary=None):
+    """
+    Decorator that answers per-user reads with a strong ETag derived from the user's data version.
+
+    If the request's If-None-Match header matches the current ETag, a
+    304 Not Modified response is returned without calling the view, so no
+    asset queries or serialization take place. Apply it below `jwt_required`.
+
+    Use it bare, or as `etag_by_data_version(vary=...)` for views whose
+    response also depends on data outside the user's version. The version the
+    ETag was built from is left in `g.data_version` for the view to reuse.
+
+    Args:
+        fn (function): The view function.
+        vary (function, optional): Returns the version of that other data,
+            which becomes part of the ETag.
+
+    Returns:
+        function: The decorated function.
+    """
+    if fn is None:
+        return lambda view: etag_by_data_version(view, vary=vary)
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        user_id = get_jwt_identity()
+        version = g.data_version = get_data_version(user_id)
+        if version is None:
+            return fn(*args, **kwargs)
+
+        etag = data_version_etag(user_id, version, request.full_path, vary() if vary else None)
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(fn(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
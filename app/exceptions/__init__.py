@@ -32,4 +32,31 @@ class InvalidTwoFactorMethod(Exception):
     def __init__(self, message="Invalid 2FA method.", status_code=400):
         super().__init__(message)
         self.status_code = status_code
-        self.message = message
\ No newline at end of file
+        self.message = message
+
+
+class InvalidCursorError(Exception):
+    """Exception raised when a pagination cursor cannot be decoded."""
+
+    def __init__(self, message="Invalid pagination cursor.", status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class InvalidFieldsError(Exception):
+    """Exception raised when a sparse fieldset names unknown fields."""
+
+    def __init__(self, message="Invalid fields.", status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class MarketDataError(Exception):
+    """Exception raised when the market-data provider cannot be reached or answers with an error."""
+
+    def __init__(self, message="Unable to fetch data from the API", status_code=502):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
@@ -14,6 +14,22 @@ limiter = Limiter(key_func=get_remote_address)
 def make_celery(app_name=__name__):
     backend = Config.CELERY_RESULT_BACKEND
     broker = Config.CELERY_BROKER_URL
-    return Celery(app_name, backend=backend, broker=broker)
+    celery = Celery(app_name, backend=backend, broker=broker, include=['app.tasks'])
+    celery.conf.beat_schedule = {
+        'snapshot-net-worth-daily': {
+            'task': 'app.tasks.snapshot_net_worth',
+            'schedule': crontab(hour=0, minute=30),  # After the UTC day it values has closed
+        },
+        'refresh-market-snapshot': {
+            'task': 'app.tasks.refresh_market_snapshot',
+            'schedule': float(Config.MARKET_SNAPSHOT_INTERVAL),
+        },
+        'refresh-analytics': {
+            'task': 'app.tasks.refresh_analytics',
+            'schedule': float(Config.ANALYTICS_REFRESH_INTERVAL),
+        },
+    }
+    celery.conf.timezone = 'UTC'
+    return celery
 
 celery = make_celery()
@@ -12,5 +12,6 @@ from .media import Media
 from .user import User, TempUser, Address, Profile, Identification, IdentificationType, OneTimeToken, NextOfKin
 from .settings import TwoFactorMethod, SecuritySetting, UserSettings
 from .role import Role, RoleNames
-from .assets import Stock, RealEstate, Business, Crypto, NFT, SocialMedia, Youtube
-from .transactions import Transactions
\ No newline at end of file
+from .assets import Symbol, Stock, RealEstate, Business, Crypto, NFT, SocialMedia, Youtube, AssetTombstone, AssetIndex
+from .transactions import Transactions
+from .portfolio import PortfolioSummary, NetWorthSnapshot, FxRate
\ No newline at end of file
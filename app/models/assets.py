@@ -1,3 +1,4 @@
+from sqlalchemy import event, DDL
 from sqlalchemy.orm import backref
 from datetime import datetime, timezone
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -10,13 +11,44 @@ from ..models.role import Role, RoleNames
 
 
 
+class Symbol(db.Model):
+    '''
+    Canonical tickers referenced by stocks and cryptos, so per-symbol lookups,
+    aggregation and price joins are keyed by a small integer.
+    '''
+    __tablename__ = 'symbols'
+    __table_args__ = (db.UniqueConstraint('asset_class', 'ticker', name='uq_symbols_asset_class_ticker'),)
+    id = db.Column(db.Integer, primary_key=True)
+    ticker = db.Column(db.String(10), nullable=False)  # Upper-cased, trimmed
+    asset_class = db.Column(db.String(10), nullable=False)  # 'stock' or 'crypto'
+    provider_id = db.Column(db.String(100))  # ID at the market-data provider, e.g. a CoinGecko coin id
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ticker: {self.ticker}, asset_class: {self.asset_class}>'
+
+    def to_json(self):
+        return {
+            'id': self.id,
+            'ticker': self.ticker,
+            'asset_class': self.asset_class,
+            'provider_id': self.provider_id
+        }
+
+
 class Stock(db.Model):
     __tablename__ = 'stocks'
+    __table_args__ = (
+        db.Index('ix_stocks_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_stocks_user_id_updated_at', 'user_id', 'updated_at'),
+        db.Index('ix_stocks_symbol_id', 'symbol_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     symbol = db.Column(db.String(10), nullable=False)
+    symbol_id = db.Column(db.Integer, db.ForeignKey('symbols.id'))
     quantity = db.Column(db.Integer, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('vasset_user.id', ondelete='CASCADE'), nullable=False)
 
     def __repr__(self):
@@ -39,11 +71,15 @@ class Stock(db.Model):
 
 class RealEstate(db.Model):
     __tablename__ = 'real_estates'
+    __table_args__ = (
+        db.Index('ix_real_estates_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_real_estates_user_id_updated_at', 'user_id', 'updated_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     address = db.Column(db.String(200), nullable=False)
     value = db.Column(db.Float, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('vasset_user.id', ondelete='CASCADE'), nullable=False)
 
     def __repr__(self):
@@ -65,11 +101,15 @@ class RealEstate(db.Model):
 
 class Business(db.Model):
     __tablename__ = 'businesses'
+    __table_args__ = (
+        db.Index('ix_businesses_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_businesses_user_id_updated_at', 'user_id', 'updated_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(1500))
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('vasset_user.id', ondelete='CASCADE'), nullable=False)
 
     def __repr__(self):
@@ -91,12 +131,18 @@ class Business(db.Model):
 
 class Crypto(db.Model):
     __tablename__ = 'cryptos'
+    __table_args__ = (
+        db.Index('ix_cryptos_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_cryptos_user_id_updated_at', 'user_id', 'updated_at'),
+        db.Index('ix_cryptos_symbol_id', 'symbol_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     symbol = db.Column(db.String(10), nullable=False)
+    symbol_id = db.Column(db.Integer, db.ForeignKey('symbols.id'))
     amount = db.Column(db.Float, nullable=False)
     img = db.Column(db.String(200))
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('vasset_user.id', ondelete='CASCADE'), nullable=False)
 
     def __repr__(self):
@@ -118,11 +164,15 @@ class Crypto(db.Model):
 
 class NFT(db.Model):
     __tablename__ = 'nfts'
+    __table_args__ = (
+        db.Index('ix_nfts_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_nfts_user_id_updated_at', 'user_id', 'updated_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     uri = db.Column(db.String(200), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('vasset_user.id', ondelete='CASCADE'), nullable=False)
 
     def __repr__(self):
@@ -144,14 +194,18 @@ class NFT(db.Model):
 
 class SocialMedia(db.Model):
     __tablename__ = 'social_media'
+    __table_args__ = (
+        db.Index('ix_social_media_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_social_media_user_id_updated_at', 'user_id', 'updated_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     platform = db.Column(db.String(100), nullable=False)
     username = db.Column(db.String(100), nullable=False)
     password = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(1500))
     proof_pic_id = db.Column(db.Integer(), db.ForeignKey('media.id'), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('vasset_user.id', ondelete='CASCADE'), nullable=False)
 
     def __repr__(self):
@@ -186,13 +240,17 @@ class SocialMedia(db.Model):
 
 class Youtube(db.Model):
     __tablename__ = 'youtube'
+    __table_args__ = (
+        db.Index('ix_youtube_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_youtube_user_id_updated_at', 'user_id', 'updated_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(100), nullable=False)
     password = db.Column(db.String(64))
     channel_id = db.Column(db.String(100))
     description = db.Column(db.String(1500))
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('vasset_user.id', ondelete='CASCADE'), nullable=False)
 
     def __repr__(self):
@@ -213,4 +271,80 @@ class Youtube(db.Model):
             'description': self.description,
             'created_at': self.created_at,
             'updated_at': self.updated_at
-        }
\ No newline at end of file
+        }
+
+
+class AssetTombstone(db.Model):
+    '''
+    Records deleted assets so delta-sync clients can remove them locally.
+    '''
+    __tablename__ = 'asset_tombstones'
+    __table_args__ = (db.Index('ix_asset_tombstones_user_id_deleted_at', 'user_id', 'deleted_at'),)
+    id = db.Column(db.Integer, primary_key=True)
+    asset_type = db.Column(db.String(20), nullable=False)
+    asset_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    user_id = db.Column(db.Integer, db.ForeignKey('vasset_user.id', ondelete='CASCADE'), nullable=False)
+
+    def __repr__(self):
+        return f'<type: {self.asset_type}, asset_id: {self.asset_id}, deleted_at: {self.deleted_at}>'
+
+    def to_json(self):
+        return {
+            'type': self.asset_type,
+            'id': self.asset_id,
+            'deleted_at': self.deleted_at
+        }
+
+
+class AssetIndex(db.Model):
+    '''
+    One row per asset of any type, kept in step with the asset tables so
+    cross-type listing, sorting and counting are a single indexed query.
+    '''
+    __tablename__ = 'asset_index'
+    __table_args__ = (
+        db.UniqueConstraint('asset_type', 'asset_id', name='uq_asset_index_asset_type_asset_id'),
+        db.Index('ix_asset_index_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_asset_index_user_id_asset_type', 'user_id', 'asset_type'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    asset_type = db.Column(db.String(20), nullable=False)
+    asset_id = db.Column(db.Integer, nullable=False)
+    search_text = db.Column(db.String(2000))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    user_id = db.Column(db.Integer, db.ForeignKey('vasset_user.id', ondelete='CASCADE'), nullable=False)
+
+    def __repr__(self):
+        return f'<type: {self.asset_type}, asset_id: {self.asset_id}>'
+
+
+# Full-text search over asset_index.search_text. PostgreSQL uses GIN indexes for
+# tsvector and trigram matching; SQLite uses an FTS5 table kept in sync by triggers.
+# Deployed databases get these from the migrations, create_all() from these hooks.
+ASSET_SEARCH_DDL = {
+    'postgresql': [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_asset_index_search_tsv ON asset_index "
+        "USING gin (to_tsvector('simple', coalesce(search_text, '')))",
+        "CREATE INDEX IF NOT EXISTS ix_asset_index_search_trgm ON asset_index "
+        "USING gin (search_text gin_trgm_ops)",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS asset_search USING fts5("
+        "search_text, content='asset_index', content_rowid='id', tokenize='unicode61', prefix='2 3')",
+        "CREATE TRIGGER IF NOT EXISTS asset_search_ai AFTER INSERT ON asset_index BEGIN "
+        "INSERT INTO asset_search(rowid, search_text) VALUES (new.id, new.search_text); END",
+        "CREATE TRIGGER IF NOT EXISTS asset_search_ad AFTER DELETE ON asset_index BEGIN "
+        "INSERT INTO asset_search(asset_search, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+        "CREATE TRIGGER IF NOT EXISTS asset_search_au AFTER UPDATE OF search_text ON asset_index BEGIN "
+        "INSERT INTO asset_search(asset_search, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+        "INSERT INTO asset_search(rowid, search_text) VALUES (new.id, new.search_text); END",
+    ],
+}
+
+for dialect, statements in ASSET_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(AssetIndex.__table__, 'after_create', DDL(statement).execute_if(dialect=dialect))
+event.listen(AssetIndex.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS asset_search').execute_if(dialect='sqlite'))
@@ -0,0 +1,90 @@
+'''
+This module defines the portfolio models for the database.
+
+@author Chris
+@link: https://github.com/al-chris
+@package VASSET
+'''
+from datetime import datetime
+
+from ..extensions import db
+
+
+class PortfolioSummary(db.Model):
+    '''
+    Per-user rollup of the asset tables, maintained incrementally on every asset write
+    so dashboards can read counts and totals with a single primary-key lookup.
+    '''
+    __tablename__ = 'portfolio_summary'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('vasset_user.id', ondelete='CASCADE'), primary_key=True)
+    stocks_count = db.Column(db.Integer, nullable=False, default=0)
+    real_estates_count = db.Column(db.Integer, nullable=False, default=0)
+    businesses_count = db.Column(db.Integer, nullable=False, default=0)
+    cryptos_count = db.Column(db.Integer, nullable=False, default=0)
+    nfts_count = db.Column(db.Integer, nullable=False, default=0)
+    social_media_count = db.Column(db.Integer, nullable=False, default=0)
+    youtube_count = db.Column(db.Integer, nullable=False, default=0)
+    real_estate_value = db.Column(db.Float, nullable=False, default=0.0)
+    crypto_amounts = db.Column(db.JSON, nullable=False, default=dict)  # {symbol: total amount}
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<user_id: {self.user_id}, updated_at: {self.updated_at}>'
+
+    def to_json(self):
+        return {
+            'counts': {
+                'stocks': self.stocks_count or 0,
+                'real_estates': self.real_estates_count or 0,
+                'businesses': self.businesses_count or 0,
+                'cryptos': self.cryptos_count or 0,
+                'nfts': self.nfts_count or 0,
+                'social_media': self.social_media_count or 0,
+                'youtube': self.youtube_count or 0,
+            },
+            'real_estate_value': self.real_estate_value or 0.0,
+            'crypto_amounts': self.crypto_amounts or {},
+            'updated_at': self.updated_at
+        }
+
+
+class NetWorthSnapshot(db.Model):
+    '''
+    One valuation of a user's holdings per day, written by the daily snapshot job.
+    '''
+    __tablename__ = 'net_worth_snapshots'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('vasset_user.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    value = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f'<user_id: {self.user_id}, day: {self.day}, value: {self.value}>'
+
+    def to_json(self):
+        return {
+            'day': self.day.isoformat(),
+            'value': self.value
+        }
+
+
+class FxRate(db.Model):
+    '''
+    Exchange rate of one currency against the US dollar, the currency all stored values are in.
+    '''
+    __tablename__ = 'fx_rates'
+
+    currency_code = db.Column(db.String(3), primary_key=True)
+    rate = db.Column(db.Float, nullable=False)  # Units of the currency per US dollar
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<currency_code: {self.currency_code}, rate: {self.rate}>'
+
+    def to_json(self):
+        return {
+            'currency_code': self.currency_code,
+            'rate': self.rate,
+            'updated_at': self.updated_at
+        }
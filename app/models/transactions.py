@@ -10,6 +10,8 @@ from ..models.role import Role, RoleNames
 
 
 class Transactions(db.Model):
+    __table_args__ = (db.Index('ix_transactions_user_id_created_at_id', 'user_id', 'created_at', 'id'),)
+
     id = db.Column(db.Integer, primary_key=True)
     amount = db.Column(db.Float, nullable=False)
     wallet_address = db.Column(db.String(120), nullable=False)
@@ -44,6 +44,7 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
     balance = db.Column(db.Float, default=0.0)
+    data_version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0') # bumped on every change to the user's data
 
     # Relationships
     profile = db.relationship('Profile', back_populates="vasset_user", uselist=False, cascade="all, delete-orphan")
@@ -0,0 +1,42 @@
+'''
+This module defines the admin analytics routes for the VASSET Flask application.
+
+Routes:
+    - /admin/analytics/stocks (GET): Holders, total quantity and positions per stock symbol.
+    - /admin/analytics/cryptos (GET): Holders, total amount and positions per crypto symbol.
+    - /admin/analytics/real_estates (GET): Real-estate totals and value distribution.
+    - /admin/cache/stats (GET): Hit ratio and latency of the read-through caches.
+
+Note: All routes require the Admin role.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+from . import api
+from app.views import AnalyticsController
+from app.decorators import roles_required
+
+
+@api.route('/admin/analytics/stocks', methods=['GET'])
+@roles_required('Admin')
+def get_stock_analytics():
+    return AnalyticsController.get_holdings_analytics('stocks')
+
+
+@api.route('/admin/analytics/cryptos', methods=['GET'])
+@roles_required('Admin')
+def get_crypto_analytics():
+    return AnalyticsController.get_holdings_analytics('cryptos')
+
+
+@api.route('/admin/analytics/real_estates', methods=['GET'])
+@roles_required('Admin')
+def get_real_estate_analytics():
+    return AnalyticsController.get_holdings_analytics('real_estates')
+
+
+@api.route('/admin/cache/stats', methods=['GET'])
+@roles_required('Admin')
+def get_cache_stats():
+    return AnalyticsController.get_cache_stats()
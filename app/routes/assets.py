@@ -16,6 +16,7 @@ from flask_jwt_extended import jwt_required
 from . import api
 
 from app.views import AssetsController
+from app.decorators import etag_by_data_version
 
 
 
@@ -28,6 +29,7 @@ def add_stock():
 
 @api.route('/users/stocks', methods=['GET'])
 @jwt_required()
+@etag_by_data_version
 def get_stocks():
     return AssetsController.get_stocks()
 
@@ -39,6 +41,7 @@ def add_real_estate():
 
 @api.route('/users/real_estates', methods=['GET'])
 @jwt_required()
+@etag_by_data_version
 def get_real_estates():
     return AssetsController.get_real_estates()
 
@@ -50,6 +53,7 @@ def add_business():
 
 @api.route('/users/businesses', methods=['GET'])
 @jwt_required()
+@etag_by_data_version
 def get_businesses():
     return AssetsController.get_businesses()
 
@@ -61,6 +65,7 @@ def add_crypto():
 
 @api.route('/users/cryptos', methods=['GET'])
 @jwt_required()
+@etag_by_data_version
 def get_cryptos():
     return AssetsController.get_cryptos()
 
@@ -72,6 +77,7 @@ def add_nft():
 
 @api.route('/users/nfts', methods=['GET'])
 @jwt_required()
+@etag_by_data_version
 def get_nfts():
     return AssetsController.get_nfts()
 
@@ -84,6 +90,7 @@ def add_social_media():
 
 @api.route('/users/social_media', methods=['GET'])
 @jwt_required()
+@etag_by_data_version
 def get_social_media():
     return AssetsController.get_social_media()
 
@@ -95,12 +102,64 @@ def add_youtube():
 
 @api.route('/users/youtube', methods=['GET'])
 @jwt_required()
+@etag_by_data_version
 def get_youtube():
     return AssetsController.get_youtube()
 
 # Get all assets
 @api.route('/users/assets', methods=['GET'])
 @jwt_required()
+@etag_by_data_version
 def get_all_assets():
     return AssetsController.get_all_assets()
+
+# Batch create
+@api.route('/users/assets/batch', methods=['POST'])
+@jwt_required()
+def add_assets_batch():
+    return AssetsController.add_assets_batch()
+
+# Bulk update and delete
+@api.route('/users/<asset_type>/bulk', methods=['PATCH'])
+@jwt_required()
+def bulk_update_assets(asset_type):
+    return AssetsController.bulk_update_assets(asset_type)
+
+@api.route('/users/<asset_type>/bulk', methods=['DELETE'])
+@jwt_required()
+def bulk_delete_assets(asset_type):
+    return AssetsController.bulk_delete_assets(asset_type)
+
+# Bulk import
+@api.route('/users/<asset_type>/import', methods=['POST'])
+@jwt_required()
+def import_assets(asset_type):
+    return AssetsController.import_assets(asset_type)
+
+# Export
+@api.route('/users/assets/export', methods=['GET'])
+@jwt_required()
+def export_assets():
+    return AssetsController.export_assets()
+
+# Delta sync
+@api.route('/users/assets/changes', methods=['GET'])
+@jwt_required()
+@etag_by_data_version
+def get_asset_changes():
+    return AssetsController.get_asset_changes()
+
+# Cross-type timeline
+@api.route('/users/assets/recent', methods=['GET'])
+@jwt_required()
+@etag_by_data_version
+def get_recent_assets():
+    return AssetsController.get_recent_assets()
+
+# Search
+@api.route('/users/assets/search', methods=['GET'])
+@jwt_required()
+@etag_by_data_version
+def search_assets():
+    return AssetsController.search_assets()
 # app/views/assets.py
\ No newline at end of file
@@ -3,75 +3,54 @@ from flask_jwt_extended import jwt_required
 
 from . import api
 
-import requests
+from app.exceptions import MarketDataError
+from app.utils.helpers.market_data_helpers import (normalize_market_params, lookup_markets, get_crypto_quotes,
+                                                   crypto_info, crypto_list_item)
 
 
-# Replace this with the actual API endpoint you are using
-CRYPTO_API_URL = 'https://api.coingecko.com/api/v3/coins/markets'
-LOGO_BASE_URL = 'https://assets.coingecko.com/coins/images'
-
 @api.route('/crypto/<crypto_id>', methods=['GET'])
 def get_crypto_logo(crypto_id):
-    # Fetching cryptocurrency data
-    params = {
-        'vs_currency': 'usd',
-        'ids': str(crypto_id)
-    }
-    response = requests.get(CRYPTO_API_URL, params=params)
-    
-    if response.status_code != 200:
-        return jsonify({'error': 'Unable to fetch data from the API'}), response.status_code
+    # Served from the market snapshot, or the cached upstream query when it has no entry
+    try:
+        params = normalize_market_params(ids=crypto_id, vs_currency=request.args.get('vs_currency', 'usd'))
+        data = lookup_markets(params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except MarketDataError as e:
+        return jsonify({'error': e.message}), e.status_code
 
-    data = response.json()
-    
     if not data:
         return jsonify({'error': 'Cryptocurrency not found'}), 404
 
-    crypto_data = data[0]
-    crypto_info = {
-        'id': crypto_data['id'],
-        'name': crypto_data['name'],
-        'symbol': crypto_data['symbol'],
-        'current_price': crypto_data['current_price'],
-        'logo_url': f"{LOGO_BASE_URL}/{crypto_data['id']}/{crypto_data['image'].split('/')[-1]}"
-    }
+    return jsonify(crypto_info(data[0]))
+
 
-    return jsonify(crypto_info)
+@api.route('/crypto', methods=['GET'])
+def get_crypto_quotes_batch():
+    # ?ids=a,b,c resolved together: cached ids locally, the rest in one chunked upstream call
+    try:
+        quotes = get_crypto_quotes(request.args.get('ids', ''), vs_currency=request.args.get('vs_currency', 'usd'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except MarketDataError as e:
+        return jsonify({'error': e.message}), e.status_code
+
+    return jsonify({coin_id: crypto_info(market) if market else None for coin_id, market in quotes.items()})
 
 
 @api.route('/cryptos', methods=['GET'])
 def get_cryptos_logo():
     # Get the 'per_page' and 'page' parameters from the request
-    per_page = request.args.get('per_page', 10)
-    page = request.args.get('page', 1)
-    
-    # Fetching cryptocurrency data
-    params = {
-        'vs_currency': 'usd',
-        'order': 'market_cap_desc',
-        'per_page': per_page,
-        'page': page,
-        'sparkline': 'false'
-    }
-    response = requests.get(CRYPTO_API_URL, params=params)
-    
-    if response.status_code != 200:
-        return jsonify({'error': 'Unable to fetch data from the API'}), response.status_code
+    try:
+        params = normalize_market_params(per_page=request.args.get('per_page', 10), page=request.args.get('page', 1),
+                                         vs_currency=request.args.get('vs_currency', 'usd'))
+        data = lookup_markets(params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except MarketDataError as e:
+        return jsonify({'error': e.message}), e.status_code
 
-    data = response.json()
-    
     if not data:
         return jsonify({'error': 'No cryptocurrencies found'}), 404
 
-    crypto_list = []
-    for crypto_data in data:
-        crypto_info = {
-            'id': crypto_data['id'],
-            'name': crypto_data['name'],
-            'symbol': crypto_data['symbol'],
-            'current_price': crypto_data['current_price'],
-            'logo_url': crypto_data['image']
-        }
-        crypto_list.append(crypto_info)
-
-    return jsonify(crypto_list)
\ No newline at end of file
+    return jsonify([crypto_list_item(crypto_data) for crypto_data in data])
@@ -0,0 +1,39 @@
+'''
+This module defines the routes for portfolio operations in the VASSET Flask application.
+
+Routes:
+    - /users/portfolio/value (GET, POST): Value the user's holdings against a price snapshot.
+    - /users/portfolio/summary (GET): Get the user's asset counts and totals.
+    - /users/portfolio/history (GET): Get the user's daily net-worth snapshots.
+
+Note: All routes require JWT authentication.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+from flask_jwt_extended import jwt_required
+
+from . import api
+from app.views import PortfolioController
+from app.decorators import etag_by_data_version
+from app.utils.helpers.fx_helpers import fx_rates_version
+
+
+@api.route('/users/portfolio/value', methods=['GET', 'POST'])
+@jwt_required()
+def get_portfolio_value():
+    return PortfolioController.get_portfolio_value()
+
+
+@api.route('/users/portfolio/summary', methods=['GET'])
+@jwt_required()
+@etag_by_data_version(vary=fx_rates_version)
+def get_portfolio_summary():
+    return PortfolioController.get_portfolio_summary()
+
+
+@api.route('/users/portfolio/history', methods=['GET'])
+@jwt_required()
+def get_portfolio_history():
+    return PortfolioController.get_portfolio_history()
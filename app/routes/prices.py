@@ -0,0 +1,22 @@
+'''
+This module defines the routes for price history in the VASSET Flask application.
+
+Routes:
+    - /prices/<symbol>/history (GET): Get a symbol's stored prices, raw or as OHLC buckets.
+
+Note: All routes require JWT authentication.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+from flask_jwt_extended import jwt_required
+
+from . import api
+from app.views import PriceController
+
+
+@api.route('/prices/<symbol>/history', methods=['GET'])
+@jwt_required()
+def get_price_history(symbol):
+    return PriceController.get_price_history(symbol)
@@ -27,10 +27,12 @@ from flask_jwt_extended import jwt_required
 
 from . import api
 from app.views import ProfileController
+from app.decorators import etag_by_data_version
 
 
 @api.route('/profile', methods=['GET'])
 @jwt_required()
+@etag_by_data_version
 def get_user_profile():
     return ProfileController.get_profile()
 
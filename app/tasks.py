@@ -0,0 +1,84 @@
+'''
+This module defines the Celery tasks of the VASSET Flask application.
+
+Run a worker with beat to execute the scheduled tasks:
+    celery -A app.extensions.celery worker --beat
+
+Tasks:
+    - app.tasks.snapshot_net_worth: Store every user's net worth for one UTC day (daily at 00:30 UTC).
+    - app.tasks.refresh_market_snapshot: Replace the CoinGecko market snapshot (every MARKET_SNAPSHOT_INTERVAL seconds).
+    - app.tasks.refresh_analytics: Recompute the admin holdings analytics (every ANALYTICS_REFRESH_INTERVAL seconds).
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from flask import current_app, has_app_context
+
+from config import Config
+from .extensions import celery
+from .utils.helpers.net_worth_helpers import snapshot_net_worth as write_snapshots
+from .utils.helpers.market_data_helpers import refresh_market_snapshot as write_market_snapshot
+from .utils.helpers.analytics_helpers import refresh_analytics as write_analytics
+
+
+@contextmanager
+def app_context():
+    # Workers run outside Flask; tasks executed eagerly already have a context.
+    if has_app_context():
+        yield
+        return
+    from . import create_app
+    with create_app().app_context():
+        yield
+
+
+@celery.task(name='app.tasks.snapshot_net_worth', autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def snapshot_net_worth(day=None, restart=False):
+    """
+    Store the net worth of every user for one UTC day.
+
+    Safe to retry or run twice: each run continues after the users already
+    stored for the day.
+
+    Args:
+        day (str, optional): ISO date to snapshot. Defaults to yesterday (UTC).
+        restart (bool, optional): Recompute the whole day.
+
+    Returns:
+        int: The number of snapshots written.
+    """
+    day = date.fromisoformat(day) if day else datetime.utcnow().date() - timedelta(days=1)
+    with app_context():
+        chunk_size = int(current_app.config.get('NET_WORTH_CHUNK_SIZE', Config.NET_WORTH_CHUNK_SIZE))
+        return write_snapshots(day, chunk_size=chunk_size, restart=restart)
+
+
+@celery.task(name='app.tasks.refresh_market_snapshot', autoretry_for=(Exception,), retry_backoff=True, max_retries=2)
+def refresh_market_snapshot():
+    """
+    Pull the top markets from CoinGecko and swap them in as the current snapshot.
+
+    A failed run leaves the previous snapshot in place.
+
+    Returns:
+        dict: The new snapshot's version and number of markets.
+    """
+    with app_context():
+        return write_market_snapshot()
+
+
+@celery.task(name='app.tasks.refresh_analytics')
+def refresh_analytics():
+    """
+    Recompute the holdings analytics into the shared cache, so dashboard
+    requests read a stored result instead of running the aggregations.
+
+    Returns:
+        list: The analytics keys refreshed.
+    """
+    with app_context():
+        return write_analytics()
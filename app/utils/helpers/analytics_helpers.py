@@ -0,0 +1,204 @@
+'''
+This module defines helper functions for platform-wide holdings analytics in the VASSET Flask application.
+
+The rollups are computed with GROUP BY aggregates over the asset tables and
+kept in a per-process TTL cache. Once an entry expires it is still served
+while a background thread reloads it, so dashboard requests never wait on a
+full-table aggregation after the first load.
+
+Loads go through a shared read-through cache: a Celery beat task recomputes
+every rollup each `ANALYTICS_REFRESH_INTERVAL` seconds and stores it there, so
+workers, including freshly started ones, pick up the stored result. When none
+is stored, concurrent loads of a key are coalesced into one aggregation, per
+process and, through a Redis lock, across workers.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import time, threading
+from datetime import datetime
+from threading import Thread
+from flask import current_app
+from sqlalchemy import select, func, case
+
+from config import Config
+from ...extensions import db
+from ...models import Stock, Crypto, RealEstate, Symbol
+from .basic_helpers import log_exception
+from .cache_helpers import ReadThroughCache
+
+
+# Upper bounds of the real-estate value buckets; the last bucket is open-ended.
+REAL_ESTATE_BUCKETS = (50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000)
+
+
+def _symbol_rollup(model, quantity):
+    # Grouped on the integer symbol_id; the ticker comes from the symbols table.
+    query = (
+        select(Symbol.ticker, func.count(func.distinct(model.user_id)), func.sum(quantity), func.count())
+        .join(Symbol, Symbol.id == model.symbol_id)
+        .group_by(model.symbol_id, Symbol.ticker)
+        .order_by(func.count(func.distinct(model.user_id)).desc(), Symbol.ticker)
+    )
+    return [
+        {'symbol': name, 'holders': holders, 'total': total or 0, 'positions': positions}
+        for name, holders, total, positions in db.session.execute(query)
+    ]
+
+
+def stock_holdings():
+    """Returns holders, total quantity and positions per stock symbol, most held first."""
+    return _symbol_rollup(Stock, Stock.quantity)
+
+
+def crypto_holdings():
+    """Returns holders, total amount and positions per crypto symbol, most held first."""
+    return _symbol_rollup(Crypto, Crypto.amount)
+
+
+def real_estate_distribution():
+    """
+    Returns overall real-estate totals and the number and value of properties per value bucket.
+    """
+    bucket = case(
+        *[(RealEstate.value < bound, index) for index, bound in enumerate(REAL_ESTATE_BUCKETS)],
+        else_=len(REAL_ESTATE_BUCKETS)
+    )
+    counts = dict.fromkeys(range(len(REAL_ESTATE_BUCKETS) + 1), (0, 0.0))
+    query = select(bucket, func.count(), func.sum(RealEstate.value)).group_by(bucket)
+    for index, count, total in db.session.execute(query):
+        counts[index] = (count, total or 0.0)
+
+    bounds = (0,) + REAL_ESTATE_BUCKETS + (None,)
+    buckets = [
+        {'min': bounds[index], 'max': bounds[index + 1], 'properties': count, 'value': total}
+        for index, (count, total) in counts.items()
+    ]
+
+    properties, holders, total, average, lowest, highest = db.session.execute(select(
+        func.count(), func.count(func.distinct(RealEstate.user_id)), func.sum(RealEstate.value),
+        func.avg(RealEstate.value), func.min(RealEstate.value), func.max(RealEstate.value)
+    )).one()
+
+    return {
+        'properties': properties,
+        'holders': holders,
+        'total_value': total or 0.0,
+        'average_value': average,
+        'min_value': lowest,
+        'max_value': highest,
+        'buckets': buckets,
+    }
+
+
+ANALYTICS = {
+    'stocks': stock_holdings,
+    'cryptos': crypto_holdings,
+    'real_estates': real_estate_distribution,
+}
+
+
+def _compute_timeout():
+    return int(current_app.config.get('ANALYTICS_COMPUTE_TIMEOUT', Config.ANALYTICS_COMPUTE_TIMEOUT))
+
+
+shared_analytics = ReadThroughCache('analytics', 'ANALYTICS_CACHE_TTL', 'ANALYTICS_CACHE_SIZE',
+                                    load_timeout=_compute_timeout)
+
+
+def compute_analytics(key):
+    """Runs one rollup and returns it with the time it was computed."""
+    return {'data': ANALYTICS[key](), 'computed_at': datetime.utcnow().isoformat(), 'computed_ts': time.time()}
+
+
+def refresh_analytics():
+    """
+    Recomputes every rollup into the shared cache.
+
+    Returns:
+        list: The keys refreshed.
+    """
+    for key in ANALYTICS:
+        shared_analytics.set(key, compute_analytics(key))
+    return list(ANALYTICS)
+
+
+class AnalyticsCache:
+    '''
+    Stale-while-revalidate cache of analytics results.
+
+    A missing entry is loaded in the request from `shared_analytics`. An expired
+    entry is returned as is, and a single background thread per key reloads it.
+    Entries are as old as their computation, not as their load.
+    '''
+
+    def __init__(self):
+        self._entries = {}
+        self._refreshing = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, ttl):
+        """
+        Returns `(data, computed_at, stale)` for an analytics key.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return self._load(key) + (False,)
+
+        data, computed_at, computed_ts = entry
+        stale = time.time() - computed_ts >= ttl
+        if stale:
+            self._refresh_in_background(key)
+        return data, computed_at, stale
+
+    def _load(self, key):
+        result = shared_analytics.get_or_load(key, lambda: compute_analytics(key))
+        data, computed_at = result['data'], datetime.fromisoformat(result['computed_at'])
+        self._entries[key] = (data, computed_at, result['computed_ts'])
+        return data, computed_at
+
+    def _refresh_in_background(self, key):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            thread = Thread(target=self._async_refresh, args=(current_app._get_current_object(), key), daemon=True)
+            self._refreshing[key] = thread
+        thread.start()
+
+    def _async_refresh(self, app, key):
+        with app.app_context():
+            try:
+                self._load(key)
+            except Exception as e:
+                log_exception(f'ANALYTICS REFRESH FAILED ({key})', e)
+            finally:
+                db.session.remove()
+                with self._lock:
+                    self._refreshing.pop(key, None)
+
+    def wait(self, timeout=None):
+        """Blocks until running background refreshes finish."""
+        for thread in list(self._refreshing.values()):
+            thread.join(timeout)
+
+    def clear(self):
+        self._entries.clear()
+
+
+analytics_cache = AnalyticsCache()
+
+
+def get_analytics(key):
+    """
+    Returns a cached analytics result with its freshness metadata.
+
+    Args:
+        key (str): One of `ANALYTICS`.
+
+    Returns:
+        dict: The result under 'data', plus 'computed_at' and 'stale'.
+    """
+    ttl = int(current_app.config.get('ANALYTICS_CACHE_TTL', Config.ANALYTICS_CACHE_TTL))
+    data, computed_at, stale = analytics_cache.get(key, ttl)
+    return {'data': data, 'computed_at': computed_at, 'stale': stale}
@@ -0,0 +1,35 @@
+'''
+This module defines the cache of users' full asset portfolios in the VASSET Flask application.
+
+`cached_portfolio` serves `GET /users/assets` from a read-through cache keyed by
+user and data version. Every asset write bumps the user's data version, so the
+next read misses and rebuilds the entry. The version is read before the
+portfolio is loaded, so a read that started before a write can only store its
+payload under the old version, never under the one the write produced.
+Entries for old versions are never read again and age out with the TTL.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+from .asset_helpers import fetch_portfolio
+from .cache_helpers import ReadThroughCache
+from .version_helpers import get_data_version
+
+
+# Not coalesced: a read after a commit must not share a load that began before it.
+portfolio_cache = ReadThroughCache('portfolio', 'ASSET_CACHE_TTL', 'ASSET_CACHE_SIZE', coalesce=False)
+
+
+def cached_portfolio(user_id, version=None):
+    """
+    Returns `fetch_portfolio(user_id)`, served from the cache when possible.
+
+    Args:
+        user_id: The ID of the user whose portfolio to return.
+        version (int, optional): The user's data version, if already read.
+            Looked up when omitted; it must be read before the portfolio is.
+    """
+    if version is None:
+        version = get_data_version(user_id)
+    return portfolio_cache.get_or_load(f'{user_id}:{version}', lambda: fetch_portfolio(user_id))
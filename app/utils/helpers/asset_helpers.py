@@ -0,0 +1,291 @@
+'''
+This module defines helper functions for reading user assets in the VASSET Flask application.
+
+These functions assist with tasks such as:
+    * mapping asset type names to their models
+    * selecting assets together with the rows their `to_json` reads
+    * fetching a user's whole portfolio in a single database round trip
+    * building the text each asset is found by in search
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+from collections.abc import Mapping
+from sqlalchemy import select, func, literal, cast, null, union_all
+
+from ...extensions import db
+from ...models import Stock, RealEstate, Business, Crypto, NFT, SocialMedia, Youtube, Media
+
+
+# Maps the keys used in API responses to the asset models.
+ASSET_MODELS = {
+    'stocks': Stock,
+    'real_estates': RealEstate,
+    'businesses': Business,
+    'cryptos': Crypto,
+    'nfts': NFT,
+    'social_media': SocialMedia,
+    'youtube': Youtube,
+}
+ASSET_TYPES = {model: asset_type for asset_type, model in ASSET_MODELS.items()}
+
+# Fields returned by each per-type list endpoint, in response order. Clients may
+# request a subset of them with `fields=`.
+LIST_FIELDS = {
+    'stocks': ('id', 'symbol', 'quantity'),
+    'real_estates': ('id', 'address', 'value'),
+    'businesses': ('id', 'name', 'description'),
+    'cryptos': ('id', 'symbol', 'amount', 'img'),
+    'nfts': ('id', 'name', 'uri'),
+    'social_media': ('id', 'platform', 'username'),
+    'youtube': ('id', 'email', 'password'),
+}
+
+# Columns each asset type is searchable by. Secrets such as passwords are never indexed.
+SEARCH_FIELDS = {
+    'stocks': ('symbol',),
+    'real_estates': ('address',),
+    'businesses': ('name', 'description'),
+    'cryptos': ('symbol',),
+    'nfts': ('name',),
+    'social_media': ('platform', 'username'),
+    'youtube': (),
+}
+
+# Columns each asset type contributes to the portfolio UNION ALL query,
+# laid out as (first text column, second text column, numeric column).
+_PORTFOLIO_COLUMNS = {
+    'stocks': (Stock.symbol, None, Stock.quantity),
+    'real_estates': (RealEstate.address, None, RealEstate.value),
+    'businesses': (Business.name, Business.description, None),
+    'cryptos': (Crypto.symbol, None, Crypto.amount),
+    'nfts': (NFT.name, NFT.uri, None),
+    'social_media': (SocialMedia.platform, SocialMedia.username, None),
+    'youtube': (Youtube.email, Youtube.password, None),
+}
+
+# Turns one row of the UNION ALL query back into the response shape of its asset type.
+_PORTFOLIO_SERIALIZERS = {
+    'stocks': lambda row: {'id': row.id, 'symbol': row.text_a, 'quantity': int(row.num_a)},
+    'real_estates': lambda row: {'id': row.id, 'address': row.text_a, 'value': row.num_a},
+    'businesses': lambda row: {'id': row.id, 'name': row.text_a, 'description': row.text_b},
+    'cryptos': lambda row: {'id': row.id, 'symbol': row.text_a, 'amount': row.num_a},
+    'nfts': lambda row: {'id': row.id, 'name': row.text_a, 'uri': row.text_b},
+    'social_media': lambda row: {'id': row.id, 'platform': row.text_a, 'username': row.text_b},
+    'youtube': lambda row: {'id': row.id, 'email': row.text_a, 'password': row.text_b},
+}
+
+
+def select_assets(model):
+    """
+    Builds a SELECT of an asset model whose `to_json` needs no further queries.
+
+    Social media rows are selected with their proof picture joined in, so
+    `proof_pic` finds it in the identity map. Read the result with `.scalars()`
+    and call `to_json` while iterating it: the session holds the pictures
+    weakly, so they are gone once their result rows are.
+    """
+    if model is SocialMedia:
+        return select(SocialMedia, Media).outerjoin(Media, Media.id == SocialMedia.proof_pic_id)
+    return select(model)
+
+
+def _column_or_null(column, type_):
+    if column is None:
+        return cast(null(), type_)
+    return cast(column, type_)
+
+
+def portfolio_query(user_id):
+    """
+    Builds a single UNION ALL query over every asset table for a user.
+
+    Each branch selects a literal `kind` discriminator, the row id and the
+    type's columns coerced into a shared (text_a, text_b, num_a) layout.
+
+    Args:
+        user_id: The ID of the user whose assets are selected.
+
+    Returns:
+        sqlalchemy.sql.Select: The combined query, ordered by kind and id.
+    """
+    branches = []
+    for kind, (text_a, text_b, num_a) in _PORTFOLIO_COLUMNS.items():
+        model = ASSET_MODELS[kind]
+        branches.append(
+            select(
+                literal(kind, db.String).label('kind'),
+                model.id.label('id'),
+                _column_or_null(text_a, db.String).label('text_a'),
+                _column_or_null(text_b, db.String).label('text_b'),
+                _column_or_null(num_a, db.Float).label('num_a'),
+            ).where(model.user_id == user_id)
+        )
+
+    combined = union_all(*branches).subquery()
+    return select(combined).order_by(combined.c.kind, combined.c.id)
+
+
+def fetch_portfolio(user_id):
+    """
+    Fetches all assets of a user in one database round trip.
+
+    Args:
+        user_id: The ID of the user whose assets are fetched.
+
+    Returns:
+        dict: Lists of serialized assets keyed by asset type, in the
+            same shape as `AssetsController.get_all_assets` returns.
+    """
+    portfolio = {kind: [] for kind in ASSET_MODELS}
+    for row in db.session.execute(portfolio_query(user_id)):
+        portfolio[row.kind].append(_PORTFOLIO_SERIALIZERS[row.kind](row))
+
+    return portfolio
+
+
+# Columns set by the server rather than by clients.
+_SERVER_COLUMNS = {'id', 'user_id', 'created_at', 'updated_at'}
+
+
+def writable_columns(model):
+    """
+    Lists the columns of an asset model that clients may set.
+
+    Primary keys, foreign keys and timestamps are excluded.
+
+    Args:
+        model (db.Model): The asset model.
+
+    Returns:
+        list: The writable `sqlalchemy.Column` objects.
+    """
+    return [
+        column for column in model.__table__.columns
+        if column.name not in _SERVER_COLUMNS and not column.foreign_keys
+    ]
+
+
+def _coerce(column, value):
+    python_type = column.type.python_type
+    if python_type in (int, float):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError('must be a number')
+        if python_type is int:
+            if not number.is_integer():
+                raise ValueError('must be a whole number')
+            return int(number)
+        return number
+
+    value = str(value)
+    length = getattr(column.type, 'length', None)
+    if length and len(value) > length:
+        raise ValueError(f'must be at most {length} characters')
+    return value
+
+
+def validate_asset_row(model, row):
+    """
+    Validates and coerces a client-supplied row against an asset model's columns.
+
+    Args:
+        model (db.Model): The asset model the row is meant for.
+        row (dict): The raw field values, e.g. a CSV record or JSON object.
+
+    Returns:
+        tuple: The coerced values keyed by column name, and a dict of
+            error messages keyed by field name (empty when the row is valid).
+    """
+    values, errors = {}, {}
+    if not isinstance(row, dict):
+        return values, {'row': 'must be an object'}
+
+    columns = writable_columns(model)
+    known = {column.name for column in columns}
+    for field in row:
+        if field not in known:
+            errors[field] = 'unknown field'
+
+    for column in columns:
+        value = row.get(column.name)
+        if value is None or value == '':
+            if not column.nullable:
+                errors[column.name] = 'is required'
+            continue
+        try:
+            values[column.name] = _coerce(column, value)
+        except ValueError as e:
+            errors[column.name] = str(e)
+
+    return values, errors
+
+
+def validate_asset_update(model, changes):
+    """
+    Validates and coerces a partial update against an asset model's columns.
+
+    Unlike `validate_asset_row`, omitted fields are left untouched; a field
+    may only be cleared with null when its column is nullable.
+
+    Args:
+        model (db.Model): The asset model being updated.
+        changes (dict): The raw field values to set.
+
+    Returns:
+        tuple: The coerced values keyed by column name, and a dict of
+            error messages keyed by field name (empty when the update is valid).
+    """
+    values, errors = {}, {}
+    if not isinstance(changes, dict) or not changes:
+        return values, {'values': 'must be a non-empty object'}
+
+    columns = {column.name: column for column in writable_columns(model)}
+    for field, value in changes.items():
+        column = columns.get(field)
+        if column is None:
+            errors[field] = 'unknown field'
+        elif value is None or value == '':
+            if column.nullable:
+                values[field] = None
+            else:
+                errors[field] = 'cannot be empty'
+        else:
+            try:
+                values[field] = _coerce(column, value)
+            except ValueError as e:
+                errors[field] = str(e)
+
+    return values, errors
+
+
+def asset_search_text(asset_type, asset):
+    """
+    Builds the search text of an asset from its `SEARCH_FIELDS`.
+
+    Args:
+        asset_type (str): Key of `ASSET_MODELS` the asset belongs to.
+        asset: A model instance or a mapping of column values.
+
+    Returns:
+        str: The non-empty field values joined by spaces.
+    """
+    values = (asset.get(name) if isinstance(asset, Mapping) else getattr(asset, name)
+              for name in SEARCH_FIELDS[asset_type])
+    return ' '.join(str(value) for value in values if value)
+
+
+def search_text_expression(asset_type):
+    """
+    Returns a SQL expression computing `asset_search_text` for rows of an asset table.
+    """
+    model = ASSET_MODELS[asset_type]
+    columns = [func.coalesce(getattr(model, name), '') for name in SEARCH_FIELDS[asset_type]]
+    if not columns:
+        return literal('')
+    expression = columns[0]
+    for column in columns[1:]:
+        expression = expression + ' ' + column
+    return func.trim(expression)
@@ -0,0 +1,188 @@
+'''
+This module defines helper functions for the cross-type asset index of the VASSET Flask application.
+
+`asset_index` holds one row per asset with its type, owner and timestamps, so
+listing, sorting and counting a user's assets across all seven asset tables is
+a single indexed query. ORM writes are mirrored into it automatically after
+each flush; bulk Core statements call `index_assets` and `unindex_assets`
+themselves.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+from datetime import datetime
+from collections.abc import Mapping
+from sqlalchemy import event, select, insert, delete, literal, bindparam
+
+from ...extensions import db
+from ...models import AssetIndex
+from .asset_helpers import ASSET_MODELS, ASSET_TYPES, asset_search_text, search_text_expression, select_assets
+from .basic_helpers import keyset_paginate
+
+
+def _field(asset, name):
+    return asset.get(name) if isinstance(asset, Mapping) else getattr(asset, name)
+
+
+def index_assets(asset_type, assets, connection=None):
+    """
+    Adds index rows for newly inserted assets.
+
+    Does not commit: call it in the transaction that inserts the assets.
+
+    Args:
+        asset_type (str): Key of `ASSET_MODELS` the assets belong to.
+        assets (list): The inserted assets, as model instances or mappings with
+            'id', 'user_id', 'created_at', 'updated_at' and the type's search fields.
+        connection (optional): Connection to execute on. Defaults to the current session.
+    """
+    if not assets:
+        return
+    (connection or db.session).execute(insert(AssetIndex), [{
+        'asset_type': asset_type,
+        'asset_id': _field(asset, 'id'),
+        'user_id': _field(asset, 'user_id'),
+        'created_at': _field(asset, 'created_at'),
+        'updated_at': _field(asset, 'updated_at') or _field(asset, 'created_at'),
+        'search_text': asset_search_text(asset_type, asset),
+    } for asset in assets])
+
+
+def unindex_assets(asset_type, asset_ids, connection=None):
+    """
+    Removes the index rows of deleted assets. Does not commit.
+    """
+    if not asset_ids:
+        return
+    (connection or db.session).execute(
+        delete(AssetIndex).where(AssetIndex.asset_type == asset_type, AssetIndex.asset_id.in_(list(asset_ids)))
+    )
+
+
+def reindex_assets(asset_type, assets, connection=None):
+    """
+    Refreshes the `updated_at` and search text of updated assets' index rows. Does not commit.
+
+    Args:
+        asset_type (str): Key of `ASSET_MODELS` the assets belong to.
+        assets (list): The updated assets, as model instances or mappings with
+            'id', 'updated_at' and the type's search fields.
+        connection (optional): Connection to execute on. Defaults to the current session.
+    """
+    if not assets:
+        return
+    table = AssetIndex.__table__
+    statement = (
+        table.update()
+        .where(table.c.asset_type == asset_type, table.c.asset_id == bindparam('b_asset_id'))
+        .values(updated_at=bindparam('b_updated_at'), search_text=bindparam('b_search_text'))
+    )
+    (connection or db.session).execute(statement, [{
+        'b_asset_id': _field(asset, 'id'),
+        'b_updated_at': _field(asset, 'updated_at') or datetime.utcnow(),
+        'b_search_text': asset_search_text(asset_type, asset),
+    } for asset in assets])
+
+
+@event.listens_for(db.session, 'after_flush')
+def _sync_asset_index_after_flush(session, flush_context):
+    connection = session.connection()
+    added, updated, removed = {}, {}, {}
+
+    for obj in session.new:
+        asset_type = ASSET_TYPES.get(type(obj))
+        if asset_type:
+            added.setdefault(asset_type, []).append(obj)
+
+    for obj in session.dirty:
+        asset_type = ASSET_TYPES.get(type(obj))
+        if asset_type and session.is_modified(obj):
+            updated.setdefault(asset_type, []).append(obj)
+
+    for obj in session.deleted:
+        asset_type = ASSET_TYPES.get(type(obj))
+        if asset_type:
+            removed.setdefault(asset_type, []).append(obj.id)
+
+    for asset_type, assets in added.items():
+        index_assets(asset_type, assets, connection=connection)
+    for asset_type, assets in updated.items():
+        reindex_assets(asset_type, assets, connection=connection)
+    for asset_type, asset_ids in removed.items():
+        unindex_assets(asset_type, asset_ids, connection=connection)
+
+
+def rebuild_asset_index(user_ids=None):
+    """
+    Recreates the index rows of every asset from the asset tables with INSERT ... SELECT.
+
+    Args:
+        user_ids (list, optional): IDs of the users to rebuild. Rebuilds every user when None.
+
+    Returns:
+        int: The number of index rows written.
+    """
+    stale = delete(AssetIndex)
+    if user_ids is not None:
+        stale = stale.where(AssetIndex.user_id.in_(user_ids))
+    db.session.execute(stale)
+
+    written = 0
+    columns = ['asset_type', 'asset_id', 'user_id', 'created_at', 'updated_at', 'search_text']
+    for asset_type, model in ASSET_MODELS.items():
+        query = select(literal(asset_type), model.id, model.user_id, model.created_at, model.updated_at,
+                       search_text_expression(asset_type))
+        if user_ids is not None:
+            query = query.where(model.user_id.in_(user_ids))
+        written += db.session.execute(insert(AssetIndex).from_select(columns, query)).rowcount
+    db.session.commit()
+
+    return written
+
+
+def list_user_assets(user_id, request, asset_types=None, descending=True):
+    """
+    Lists a user's assets of any type from the index, newest first by default.
+
+    Reads `limit` and `cursor` from the request like `keyset_paginate`.
+
+    Args:
+        user_id: The ID of the user whose assets are listed.
+        request (flask.Request): The current request.
+        asset_types (list, optional): Only list these types. Defaults to all of them.
+        descending (bool, optional): Newest first. Defaults to True.
+
+    Returns:
+        tuple: The page as `{'type': ..., 'asset': ...}` items and the next cursor.
+    """
+    query = AssetIndex.query.filter(AssetIndex.user_id == user_id)
+    if asset_types:
+        query = query.filter(AssetIndex.asset_type.in_(asset_types))
+    entries, next_cursor = keyset_paginate(query, AssetIndex, request, descending=descending)
+
+    return hydrate_index_entries(entries), next_cursor
+
+
+def hydrate_index_entries(entries):
+    """
+    Loads the assets behind index rows, with one primary-key query per asset type.
+
+    Args:
+        entries (list): `AssetIndex` rows, or rows with 'asset_type' and 'asset_id'.
+
+    Returns:
+        list: `{'type': ..., 'asset': ...}` items in the order of `entries`.
+    """
+    ids_by_type = {}
+    for entry in entries:
+        ids_by_type.setdefault(entry.asset_type, []).append(entry.asset_id)
+
+    assets = {}
+    for asset_type, asset_ids in ids_by_type.items():
+        model = ASSET_MODELS[asset_type]
+        for asset in db.session.execute(select_assets(model).where(model.id.in_(asset_ids))).scalars():
+            assets[(asset_type, asset.id)] = asset.to_json()
+
+    return [{'type': entry.asset_type, 'asset': assets[(entry.asset_type, entry.asset_id)]}
+            for entry in entries if (entry.asset_type, entry.asset_id) in assets]
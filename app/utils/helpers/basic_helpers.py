@@ -7,15 +7,17 @@ These functions perform common tasks that are used throughout the application.
 @link: https://github.com/al-chris
 @package: VASSET
 '''
-import random, string, secrets, logging, time
+import random, string, secrets, logging, time, base64
+from datetime import datetime
 from threading import Thread
 from flask import current_app, abort, request, render_template, url_for
 from slugify import slugify
 from flask_mail import Message
+from sqlalchemy import and_, or_
 
 from ...extensions import db
 # from ...models import Item
-from ...exceptions import UniqueSlugError
+from ...exceptions import UniqueSlugError, InvalidCursorError, InvalidFieldsError
 from config import Config
 
 
@@ -29,6 +31,122 @@ def paginate_results(request, results, result_per_page=10):
 
     return current_results
 
+
+def encode_cursor(created_at, row_id):
+    """
+    Encodes a `(created_at, id)` keyset position into an opaque cursor string.
+
+    Args:
+        created_at (datetime): The creation time of the last row returned.
+        row_id (int): The primary key of the last row returned.
+
+    Returns:
+        str: A URL-safe cursor string.
+    """
+    raw = f"{created_at.isoformat() if created_at else ''}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor string sent by the client.
+
+    Returns:
+        tuple: The `(created_at, id)` keyset position.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or lacks a creation time or a positive id.
+    """
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        # A missing creation time would filter on `created_at > NULL`, which matches nothing
+        created_at, row_id = datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursorError()
+    if row_id < 1:
+        raise InvalidCursorError()
+    return created_at, row_id
+
+
+def page_limit(limit, default):
+    """
+    Validates a client-supplied page size, capped at `MAX_ITEMS_PER_PAGE`.
+
+    Args:
+        limit (str): The raw `limit` query parameter, or None.
+        default (int): The page size to use when `limit` is None.
+
+    Returns:
+        int: The page size.
+
+    Raises:
+        InvalidCursorError: If the limit is not a positive integer.
+    """
+    max_limit = int(current_app.config.get('MAX_ITEMS_PER_PAGE', Config.MAX_ITEMS_PER_PAGE))
+    if limit is None:
+        return min(int(default), max_limit)
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise InvalidCursorError("Limit must be a positive integer.")
+    if limit < 1:
+        raise InvalidCursorError("Limit must be a positive integer.")
+    return min(limit, max_limit)
+
+
+def keyset_paginate(query, model, request, descending=False):
+    """
+    Paginates a query with a `(created_at, id)` keyset instead of an offset.
+
+    Reads `limit` and `cursor` from the request query string. Without either
+    parameter the whole result is returned, capped at `MAX_ITEMS_PER_PAGE`.
+
+    Args:
+        query (sqlalchemy.orm.query.Query): The query to paginate.
+        model (db.Model): The model the query selects, used for the keyset columns.
+        request (flask.Request): The current request.
+        descending (bool, optional): Return the newest rows first. Defaults to False.
+
+    Returns:
+        tuple: The rows of the current page and the cursor of the next page,
+            or None if there are no more rows.
+
+    Raises:
+        InvalidCursorError: If the cursor or limit is invalid.
+    """
+    cursor = request.args.get('cursor')
+    if cursor is None:
+        default = current_app.config.get('MAX_ITEMS_PER_PAGE', Config.MAX_ITEMS_PER_PAGE)
+    else:
+        default = current_app.config.get('ITEMS_PER_PAGE', Config.ITEMS_PER_PAGE)
+    limit = page_limit(request.args.get('limit'), default)
+    
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        if descending:
+            query = query.filter(or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < last_id)
+            ))
+        else:
+            query = query.filter(or_(
+                model.created_at > created_at,
+                and_(model.created_at == created_at, model.id > last_id)
+            ))
+    
+    order_by = (model.created_at.desc(), model.id.desc()) if descending else (model.created_at, model.id)
+    rows = query.order_by(*order_by).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    
+    return rows, next_cursor
+
 def url_parts(url):
     """
     Splits a URL into its constituent parts.
@@ -201,3 +319,43 @@ def log_exception(label: str ='EXCEPTION', data='Nothing') -> None:
     logging.exception(f'\n\n{label:-^50}\n {str(data)} \n {"//":-^50}\n\n')  # Log the error details for debugging
 
 
+def parse_fields(request, allowed):
+    """
+    Reads a sparse fieldset from the `fields` query parameter.
+
+    Args:
+        request (flask.Request): The current request.
+        allowed (tuple): The fields the endpoint can return, in response order.
+
+    Returns:
+        list: The requested fields in the order of `allowed`, or all of `allowed`
+            when the parameter is absent.
+
+    Raises:
+        InvalidFieldsError: If a requested field is not allowed.
+    """
+    requested = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    if not requested:
+        return list(allowed)
+
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise InvalidFieldsError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return [f for f in allowed if f in requested]
+
+
+def project_query(model, fields):
+    """
+    Builds a query selecting only the given columns of a model, plus the
+    `(created_at, id)` keyset columns, returning lightweight rows instead of
+    mapped objects.
+
+    Args:
+        model (db.Model): The model to select from.
+        fields (list): Column names to select.
+
+    Returns:
+        sqlalchemy.orm.query.Query: The column-only query.
+    """
+    names = list(dict.fromkeys([*fields, 'id', 'created_at']))
+    return db.session.query(*(getattr(model, name) for name in names))
@@ -0,0 +1,175 @@
+'''
+This module defines helper functions for writing many assets at once in the VASSET Flask application.
+
+Batches are validated completely before anything is written, then saved in a
+single transaction so a batch either succeeds as a whole or leaves no trace.
+Bulk updates and deletes run as one set-based statement scoped to the user,
+and update the asset index, tombstones, portfolio summary and data version in
+the same transaction.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+from datetime import datetime
+from sqlalchemy import update, delete
+
+from ...extensions import db
+from .asset_helpers import ASSET_MODELS, validate_asset_row
+from .portfolio_helpers import record_assets_added, rebuild_portfolio_summaries
+from .asset_index_helpers import reindex_assets, unindex_assets
+from .sync_helpers import record_asset_deletions
+from .version_helpers import bump_data_version
+from .symbol_helpers import attach_symbol_ids
+
+# Fields whose changes alter the portfolio summary's totals.
+SUMMARY_FIELDS = {'real_estates': {'value'}, 'cryptos': {'symbol', 'amount'}}
+
+
+def validate_batch(items):
+    """
+    Validates a list of typed asset payloads.
+
+    Each item is an object with a 'type' key naming the asset type and the
+    asset's fields alongside it, e.g. `{'type': 'stocks', 'symbol': 'AAPL', 'quantity': 3}`.
+
+    Args:
+        items (list): The raw payloads.
+
+    Returns:
+        tuple: `(asset_type, values)` pairs for valid items, and a list of
+            `{'index': ..., 'errors': ...}` entries for invalid ones.
+    """
+    validated, errors = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({'index': index, 'errors': {'item': 'must be an object'}})
+            continue
+
+        fields = dict(item)
+        asset_type = fields.pop('type', None)
+        model = ASSET_MODELS.get(asset_type)
+        if model is None:
+            errors.append({'index': index, 'errors': {'type': f"must be one of: {', '.join(ASSET_MODELS)}"}})
+            continue
+
+        values, item_errors = validate_asset_row(model, fields)
+        if item_errors:
+            errors.append({'index': index, 'errors': item_errors})
+        else:
+            validated.append((asset_type, values))
+
+    return validated, errors
+
+
+def create_assets(user_id, validated):
+    """
+    Inserts validated assets of mixed types with one flush and one commit.
+
+    Args:
+        user_id: The ID of the user that will own the assets.
+        validated (list): `(asset_type, values)` pairs from `validate_batch`.
+
+    Returns:
+        list: `{'index': ..., 'type': ..., 'id': ...}` for each asset, in input order.
+    """
+    assets = [(asset_type, ASSET_MODELS[asset_type](user_id=user_id, **values)) for asset_type, values in validated]
+    db.session.add_all(asset for _, asset in assets)
+
+    by_type = {}
+    for asset_type, asset in assets:
+        by_type.setdefault(asset_type, []).append(asset)
+    # The summary lock queries would otherwise autoflush once per asset type
+    with db.session.no_autoflush:
+        for asset_type, typed_assets in by_type.items():
+            record_assets_added(user_id, asset_type, typed_assets)
+
+    db.session.flush()
+    created = [{'index': index, 'type': asset_type, 'id': asset.id} for index, (asset_type, asset) in enumerate(assets)]
+    db.session.commit()
+    return created
+
+
+def parse_asset_ids(raw):
+    """
+    Normalizes a client-supplied list of asset IDs.
+
+    Accepts a list of integers or a comma separated string.
+
+    Returns:
+        list: The unique IDs in their original order, or None if any ID is not a positive integer.
+    """
+    if isinstance(raw, str):
+        raw = [part for part in raw.split(',') if part.strip()]
+    if not isinstance(raw, list) or not raw:
+        return None
+    try:
+        ids = [int(str(value).strip()) for value in raw if not isinstance(value, bool)]
+    except ValueError:
+        return None
+    if len(ids) != len(raw) or any(asset_id < 1 for asset_id in ids):
+        return None
+    return list(dict.fromkeys(ids))
+
+
+def update_assets(user_id, asset_type, asset_ids, values):
+    """
+    Sets the same values on many of a user's assets with one UPDATE statement.
+
+    Args:
+        user_id: The ID of the user that owns the assets.
+        asset_type (str): Key of `ASSET_MODELS` the assets belong to.
+        asset_ids (list): IDs of the assets to update. IDs the user does not own are ignored.
+        values (dict): Validated column values, see `validate_asset_update`.
+
+    Returns:
+        list: IDs of the updated assets.
+    """
+    model = ASSET_MODELS[asset_type]
+    values = attach_symbol_ids(asset_type, [dict(values)])[0]
+    statement = (
+        update(model)
+        .where(model.user_id == user_id, model.id.in_(asset_ids))
+        .values(**values, updated_at=datetime.utcnow())
+        .returning(*model.__table__.columns)
+    )
+    updated = db.session.execute(statement).mappings().all()
+
+    if updated:
+        reindex_assets(asset_type, updated)
+        if SUMMARY_FIELDS.get(asset_type, set()) & set(values):
+            rebuild_portfolio_summaries([user_id], commit=False)
+        bump_data_version([user_id])
+    db.session.commit()
+
+    return [row['id'] for row in updated]
+
+
+def delete_assets(user_id, asset_type, asset_ids):
+    """
+    Deletes many of a user's assets with one DELETE statement.
+
+    Args:
+        user_id: The ID of the user that owns the assets.
+        asset_type (str): Key of `ASSET_MODELS` the assets belong to.
+        asset_ids (list): IDs of the assets to delete. IDs the user does not own are ignored.
+
+    Returns:
+        list: IDs of the deleted assets.
+    """
+    model = ASSET_MODELS[asset_type]
+    statement = (
+        delete(model)
+        .where(model.user_id == user_id, model.id.in_(asset_ids))
+        .returning(model.id)
+    )
+    deleted = db.session.execute(statement).scalars().all()
+
+    if deleted:
+        unindex_assets(asset_type, deleted)
+        record_asset_deletions(user_id, asset_type, deleted)
+        rebuild_portfolio_summaries([user_id], commit=False)
+        bump_data_version([user_id])
+    db.session.commit()
+
+    return deleted
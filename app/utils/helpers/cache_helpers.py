@@ -0,0 +1,419 @@
+'''
+This module defines the read-through cache used by hot read endpoints of the VASSET Flask application.
+
+Serialized payloads are kept in Redis when `CACHE_REDIS_URL` is set, so every
+worker shares one copy and an invalidation reaches all of them at once. Without
+Redis, or while it is unreachable, entries fall back to a per-process
+`cachetools.TTLCache`, a TTL cache with least-recently-used eviction. Caches
+that are never invalidated explicitly can also keep that local tier in front of
+Redis. Concurrent misses for one key can be coalesced: within a process the
+first caller loads while the others wait for its result, and across workers a
+short Redis lock lets one worker load while the rest wait for the entry it
+writes. Each cache counts hits, misses, coalesced waits and backend errors and
+keeps latency histograms of lookups and loads, reported by `cache_stats`.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import json, time, uuid, threading
+from bisect import bisect_left
+
+import redis
+from cachetools import TTLCache
+from flask import current_app
+
+from config import Config
+from .basic_helpers import log_exception
+
+
+# Upper bounds, in milliseconds, of the latency histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# How long to serve from the local tier after a Redis error before trying Redis again.
+REDIS_RETRY_SECONDS = 30
+
+# Default lifetime of the cross-worker load lock, and so the longest a worker waits on
+# another's load. Caches whose loads can take longer pass `load_timeout`.
+LOAD_LOCK_SECONDS = 5
+
+# How often a worker waiting on another's load checks for its entry.
+LOAD_POLL_SECONDS = 0.05
+
+# Deletes the load lock only if it still holds this worker's token, in one atomic step.
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Every cache created, by name.
+CACHES = {}
+
+
+class CacheStats:
+    '''
+    Thread-safe hit, miss and error counters with latency histograms.
+
+    Latency is kept for lookups that hit, lookups that missed (including the
+    load) and for the loads alone, i.e. the time spent in the upstream source.
+    '''
+
+    LATENCIES = ('hit', 'miss', 'load')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = self.errors = self.coalesced = 0
+            self._buckets = {kind: [0] * (len(LATENCY_BUCKETS_MS) + 1) for kind in self.LATENCIES}
+            self._total_ms = dict.fromkeys(self.LATENCIES, 0.0)
+
+    def _observe(self, kind, seconds):
+        elapsed_ms = seconds * 1000
+        self._buckets[kind][bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self._total_ms[kind] += elapsed_ms
+
+    def record(self, outcome, seconds):
+        """Counts a lookup that ended in `outcome` ('hit' or 'miss') after `seconds`."""
+        with self._lock:
+            if outcome == 'hit':
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._observe(outcome, seconds)
+
+    def record_load(self, seconds):
+        """Records how long a load from the source took."""
+        with self._lock:
+            self._observe('load', seconds)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_coalesced(self):
+        """Counts a hit served by waiting on a load another caller started."""
+        with self._lock:
+            self.coalesced += 1
+
+    def snapshot(self):
+        """
+        Returns the counters, the hit ratio and, for hits, misses and loads, the
+        count, mean latency and histogram buckets (each counts calls up to `max_ms`).
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            latency = {}
+            for kind, counts in self._buckets.items():
+                count = sum(counts)
+                latency[kind] = {
+                    'count': count,
+                    'mean_ms': self._total_ms[kind] / count if count else None,
+                    'buckets': [{'max_ms': bound, 'count': n} for bound, n in zip(LATENCY_BUCKETS_MS + (None,), counts)],
+                }
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'errors': self.errors,
+                'coalesced': self.coalesced,
+                'hit_ratio': self.hits / lookups if lookups else None,
+                'latency': latency,
+            }
+
+
+class ReadThroughCache:
+    '''
+    Read-through cache of JSON-serializable payloads.
+
+    Entries live in Redis when it is configured and reachable, otherwise in a
+    local TTL cache. With `local_first`, the local cache is also checked before
+    Redis and filled from it; only use that for entries that expire rather than
+    being invalidated, as a delete cannot reach other processes' local tiers.
+    TTL and size are read from the app config keys given. `load_timeout`, a
+    callable returning the longest a load can take in seconds, sizes the
+    cross-worker load lock. Assign `redis` to use a specific client instead of
+    `CACHE_REDIS_URL`.
+
+    With `coalesce`, concurrent misses for a key share one load. Turn it off for
+    caches that are invalidated explicitly: a read issued after an invalidation
+    must not join a load that started before it.
+    '''
+
+    def __init__(self, name, ttl_setting, size_setting, local_first=False, load_timeout=None, coalesce=True):
+        self.name = name
+        self.ttl_setting = ttl_setting
+        self.size_setting = size_setting
+        self.local_first = local_first
+        self.load_timeout = load_timeout
+        self.coalesce = coalesce
+        self.stats = CacheStats()
+        self.redis = None
+        self._redis_down_until = 0.0
+        self._local = None
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        CACHES[name] = self
+
+    def _setting(self, key):
+        return int(current_app.config.get(key, getattr(Config, key)))
+
+    def _redis_key(self, key):
+        return f'vasset:cache:{self.name}:{key}'
+
+    def _lock_key(self, key):
+        return f'vasset:cache-lock:{self.name}:{key}'
+
+    def _lock_seconds(self):
+        # The lock must outlive the slowest load, or waiters would all start loading when it expires
+        return self.load_timeout() if self.load_timeout else LOAD_LOCK_SECONDS
+
+    def _backend(self):
+        if self.redis is None:
+            url = current_app.config.get('CACHE_REDIS_URL', Config.CACHE_REDIS_URL)
+            if url:
+                self.redis = redis.Redis.from_url(url, socket_connect_timeout=0.25, socket_timeout=0.25)
+        if self.redis is None or time.monotonic() < self._redis_down_until:
+            return None
+        return self.redis
+
+    def backend_name(self):
+        return 'redis' if self._backend() is not None else 'local'
+
+    def _redis_failed(self, e):
+        self.stats.record_error()
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        log_exception(f'CACHE BACKEND UNAVAILABLE ({self.name})', e)
+
+    def _local_cache(self):
+        if self._local is None:
+            self._local = TTLCache(maxsize=self._setting(self.size_setting), ttl=self._setting(self.ttl_setting))
+        return self._local
+
+    def _get_local(self, key):
+        with self._lock:
+            return self._local_cache().get(key)
+
+    def _set_local(self, key, payload):
+        with self._lock:
+            self._local_cache()[key] = payload
+
+    def _get(self, key):
+        if self.local_first:
+            payload = self._get_local(key)
+            if payload is not None:
+                return payload
+        client = self._backend()
+        if client is not None:
+            try:
+                payload = client.get(self._redis_key(key))
+                if payload is not None and self.local_first:
+                    self._set_local(key, payload)
+                return payload
+            except redis.RedisError as e:
+                self._redis_failed(e)
+        return None if self.local_first else self._get_local(key)
+
+    def _set(self, key, payload):
+        client = self._backend()
+        if client is not None:
+            try:
+                client.set(self._redis_key(key), payload, ex=self._setting(self.ttl_setting))
+                if not self.local_first:
+                    return
+            except redis.RedisError as e:
+                self._redis_failed(e)
+        self._set_local(key, payload)
+
+    def _wait_for_entry(self, client, key, lock_seconds):
+        """Polls for the entry another worker is loading; None if its lock goes away or expires first."""
+        deadline = time.monotonic() + lock_seconds
+        while time.monotonic() < deadline:
+            time.sleep(LOAD_POLL_SECONDS)
+            payload = self._get(key)
+            if payload is not None:
+                return payload
+            if client.get(self._lock_key(key)) is None:
+                return self._get(key)
+        return None
+
+    def _load(self, key, loader):
+        """
+        Loads and caches an entry, unless another worker holds the Redis load
+        lock for it, in which case that worker's entry is used.
+
+        Returns:
+            tuple: The payload and whether this call loaded it.
+        """
+        client, token = self._backend(), None
+        if client is not None:
+            try:
+                token, lock_seconds = uuid.uuid4().hex, self._lock_seconds()
+                if not client.set(self._lock_key(key), token, nx=True, px=int(lock_seconds * 1000)):
+                    token = None
+                    payload = self._wait_for_entry(client, key, lock_seconds)
+                    if payload is not None:
+                        return payload, False
+            except redis.RedisError as e:
+                token = None
+                self._redis_failed(e)
+
+        try:
+            loading = time.perf_counter()
+            payload = json.dumps(loader())
+            self.stats.record_load(time.perf_counter() - loading)
+            self._set(key, payload)
+            return payload, True
+        finally:
+            if token is not None:
+                try:
+                    client.eval(RELEASE_LOCK_SCRIPT, 1, self._lock_key(key), token)
+                except redis.RedisError as e:
+                    self._redis_failed(e)
+
+    def get_or_load(self, key, loader):
+        """
+        Returns the cached payload for `key`, or calls `loader()`, caches and returns its result.
+
+        When the cache coalesces, only one load per key runs at a time:
+        concurrent callers in this process wait for it and share its result or
+        exception, and other workers wait for the entry it writes to Redis.
+        """
+        started = time.perf_counter()
+        payload = self._get(key)
+        if payload is not None:
+            data = json.loads(payload)
+            self.stats.record('hit', time.perf_counter() - started)
+            return data
+
+        if not self.coalesce:
+            loading = time.perf_counter()
+            data = loader()
+            self.stats.record_load(time.perf_counter() - loading)
+            self._set(key, json.dumps(data))
+            self.stats.record('miss', time.perf_counter() - started)
+            return data
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = {'done': threading.Event(), 'payload': None, 'error': None}
+
+        loaded = False
+        if leader:
+            try:
+                flight['payload'], loaded = self._load(key, loader)
+            except Exception as e:
+                flight['error'] = e
+                raise
+            finally:
+                with self._flights_lock:
+                    del self._flights[key]
+                flight['done'].set()
+        else:
+            flight['done'].wait()
+            if flight['error'] is not None:
+                raise flight['error']
+
+        data = json.loads(flight['payload'])
+        if loaded:
+            self.stats.record('miss', time.perf_counter() - started)
+        else:
+            self.stats.record_coalesced()
+            self.stats.record('hit', time.perf_counter() - started)
+        return data
+
+    def _get_many(self, keys):
+        payloads = {}
+        if self.local_first:
+            for key in keys:
+                payload = self._get_local(key)
+                if payload is not None:
+                    payloads[key] = payload
+        remaining = [key for key in keys if key not in payloads]
+        client = self._backend() if remaining else None
+        if client is not None:
+            try:
+                for key, payload in zip(remaining, client.mget([self._redis_key(key) for key in remaining])):
+                    if payload is not None:
+                        payloads[key] = payload
+                        if self.local_first:
+                            self._set_local(key, payload)
+                return payloads
+            except redis.RedisError as e:
+                self._redis_failed(e)
+        if not self.local_first:
+            for key in remaining:
+                payload = self._get_local(key)
+                if payload is not None:
+                    payloads[key] = payload
+        return payloads
+
+    def get_many_or_load(self, keys, loader):
+        """
+        Batched `get_or_load`: looks all `keys` up at once and calls
+        `loader(missing_keys)` a single time for the misses. The loader returns
+        a dict with an entry for every missing key; those are cached.
+
+        Returns:
+            dict: The payload of every key.
+        """
+        keys = list(dict.fromkeys(keys))
+        started = time.perf_counter()
+        results = {key: json.loads(payload) for key, payload in self._get_many(keys).items()}
+        for _ in results:
+            self.stats.record('hit', time.perf_counter() - started)
+
+        missing = [key for key in keys if key not in results]
+        if missing:
+            loading = time.perf_counter()
+            loaded = loader(missing)
+            self.stats.record_load(time.perf_counter() - loading)
+            for key in missing:
+                self._set(key, json.dumps(loaded[key]))
+                results[key] = loaded[key]
+                self.stats.record('miss', time.perf_counter() - started)
+        return results
+
+    def set(self, key, data):
+        """Stores a payload computed outside `get_or_load`, e.g. by a warming task."""
+        self._set(key, json.dumps(data))
+
+    def delete(self, *keys):
+        """Removes entries from both tiers."""
+        if not keys:
+            return
+        with self._lock:
+            if self._local is not None:
+                for key in keys:
+                    self._local.pop(key, None)
+        client = self._backend()
+        if client is not None:
+            try:
+                client.delete(*(self._redis_key(key) for key in keys))
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+    def clear(self):
+        """Drops every entry and resets the statistics."""
+        with self._lock:
+            self._local = None
+        if self.redis is not None:
+            try:
+                keys = list(self.redis.scan_iter(match=self._redis_key('*')))
+                if keys:
+                    self.redis.delete(*keys)
+            except redis.RedisError as e:
+                log_exception(f'CACHE CLEAR FAILED ({self.name})', e)
+        self._redis_down_until = 0.0
+        self.stats.reset()
+
+
+def cache_stats():
+    """Returns the statistics and active backend of every cache, by name."""
+    return {name: {'backend': cache.backend_name(), **cache.stats.snapshot()} for name, cache in CACHES.items()}
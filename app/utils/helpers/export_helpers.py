@@ -0,0 +1,84 @@
+'''
+This module defines helper functions for exporting assets in the VASSET Flask application.
+
+Assets are read with `yield_per` so the database driver streams rows through a
+server-side cursor, and each row is serialized as soon as it arrives. Memory use
+stays flat however large the exported portfolio is. Rows that `to_json` looks
+up, such as social media proof pictures, are joined into the same query.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import io, csv
+from flask import current_app
+
+from ...extensions import db
+from .asset_helpers import ASSET_MODELS, select_assets
+
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def iter_user_assets(user_id, asset_types, batch_size=500):
+    """
+    Yields `(asset_type, row)` pairs for every asset of a user.
+
+    Args:
+        user_id: The ID of the user whose assets are exported.
+        asset_types (list): Keys of `ASSET_MODELS` to export, in order.
+        batch_size (int, optional): Rows fetched per round trip. Defaults to 500.
+    """
+    for asset_type in asset_types:
+        model = ASSET_MODELS[asset_type]
+        query = (
+            select_assets(model)
+            .where(model.user_id == user_id)
+            .order_by(model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for asset in db.session.execute(query).scalars():
+            yield asset_type, asset.to_json()
+
+
+def export_header(asset_types):
+    """
+    Builds the CSV header for an export: 'type' followed by every `to_json` key of the exported types.
+    """
+    header = ['type']
+    for asset_type in asset_types:
+        for key in ASSET_MODELS[asset_type]().to_json():
+            if key not in header:
+                header.append(key)
+    return header
+
+
+def generate_ndjson(rows):
+    """
+    Yields one JSON document per line, tagged with its asset type.
+    """
+    for asset_type, data in rows:
+        yield current_app.json.dumps({'type': asset_type, **data}) + '\n'
+
+
+def generate_csv(rows, header):
+    """
+    Yields the CSV header and then one CSV line per row.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=header, extrasaction='ignore')
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return value
+
+    writer.writeheader()
+    yield flush()
+    for asset_type, data in rows:
+        writer.writerow({'type': asset_type, **data})
+        yield flush()
@@ -0,0 +1,194 @@
+'''
+This module defines the foreign-exchange helpers of the VASSET Flask application.
+
+Stored values and price snapshots are in US dollars. The `fx_rates` table holds
+the units of each currency per dollar, loaded from a local CSV file or the
+offline `StubFxProvider`. Rates are kept in memory as an `FxRates` cross-rate
+matrix that is reloaded from the table once `FX_CACHE_TTL` seconds have passed,
+so converting a response is one vectorized multiply and no per-row queries.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import re, csv, time, zlib, threading
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, delete, insert
+
+from config import Config
+from ...extensions import db
+from ...models import FxRate, Profile
+
+
+BASE_CURRENCY = 'USD'
+CURRENCY_PATTERN = re.compile(r'^[A-Z]{3}$')
+
+
+def normalize_currency(code):
+    """
+    Upper-cases an ISO 4217 currency code.
+
+    Raises:
+        ValueError: If the code is not three letters.
+    """
+    code = str(code).strip().upper()
+    if not CURRENCY_PATTERN.match(code):
+        raise ValueError(f'Invalid currency code: {code!r}')
+    return code
+
+
+class FxRates:
+    '''
+    Cross rates between every loaded currency.
+
+    `codes` is the sorted array of currency codes and `matrix[i, j]` the number
+    of units of `codes[j]` per unit of `codes[i]`. `version` changes whenever
+    any rate does.
+    '''
+
+    def __init__(self, per_dollar):
+        per_dollar = {**per_dollar, BASE_CURRENCY: 1.0}
+        self.codes = np.array(sorted(per_dollar))
+        rates = np.array([per_dollar[code] for code in self.codes], dtype=np.float64)
+        self.matrix = rates[np.newaxis, :] / rates[:, np.newaxis]
+        self.version = f'{zlib.crc32(repr(sorted(per_dollar.items())).encode()):08x}'
+
+    def index(self, codes):
+        """Maps currency codes to matrix positions, -1 for unknown codes."""
+        codes = np.asarray(codes, dtype=str)
+        positions = np.searchsorted(self.codes, codes).clip(max=len(self.codes) - 1)
+        return np.where(self.codes[positions] == codes, positions, -1)
+
+    def supports(self, code):
+        return bool(self.index([code])[0] >= 0)
+
+    def convert(self, amounts, to_codes, from_codes=BASE_CURRENCY):
+        """
+        Converts amounts between currencies in one vectorized step.
+
+        `to_codes` and `from_codes` are a single code or one code per amount.
+        Amounts in or to an unknown currency come back as NaN.
+
+        Returns:
+            numpy.ndarray: The converted amounts as float64.
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        source = np.broadcast_to(self.index(np.atleast_1d(from_codes)), amounts.shape)
+        target = np.broadcast_to(self.index(np.atleast_1d(to_codes)), amounts.shape)
+        known = (source >= 0) & (target >= 0)
+        factors = np.where(known, self.matrix[source, target], np.nan)
+        return amounts * factors
+
+
+class FxRateCache:
+    '''
+    Process-wide `FxRates` built from the `fx_rates` table and rebuilt once it is older than the TTL.
+    '''
+
+    def __init__(self):
+        self._rates = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, ttl):
+        if self._rates is None or time.monotonic() - self._loaded_at >= ttl:
+            with self._lock:
+                if self._rates is None or time.monotonic() - self._loaded_at >= ttl:
+                    rows = db.session.execute(select(FxRate.currency_code, FxRate.rate)).all()
+                    self._rates = FxRates(dict(rows))
+                    self._loaded_at = time.monotonic()
+        return self._rates
+
+    def clear(self):
+        self._rates = None
+
+
+fx_cache = FxRateCache()
+
+
+def get_fx_rates():
+    """Returns the in-memory rates, reloading them from the database when expired."""
+    return fx_cache.get(int(current_app.config.get('FX_CACHE_TTL', Config.FX_CACHE_TTL)))
+
+
+def fx_rates_version():
+    """Returns the version of the in-memory rates, for ETags of converted responses."""
+    return get_fx_rates().version
+
+
+def user_currency(user_id):
+    """
+    Returns the currency a user's values are shown in: their profile's
+    `currency_code` when a rate for it is loaded, else US dollars.
+    """
+    code = db.session.execute(select(Profile.currency_code).where(Profile.vasset_user_id == user_id)).scalar()
+    try:
+        code = normalize_currency(code)
+    except ValueError:
+        return BASE_CURRENCY
+    return code if get_fx_rates().supports(code) else BASE_CURRENCY
+
+
+def to_user_currency(user_id, amounts):
+    """
+    Converts dollar amounts into a user's currency.
+
+    Args:
+        user_id: The ID of the user the values are shown to.
+        amounts (array-like): Amounts in US dollars; None is kept as None.
+
+    Returns:
+        tuple: The currency code and the converted amounts as a list.
+    """
+    currency = user_currency(user_id)
+    values = np.array([np.nan if amount is None else amount for amount in amounts], dtype=np.float64)
+    converted = get_fx_rates().convert(values, currency)
+    return currency, [None if value != value else value for value in converted.tolist()]
+
+
+class StubFxProvider:
+    '''
+    Offline FX provider returning fixed sample rates per US dollar.
+
+    Useful for development and tests where no rates API is reachable.
+    '''
+
+    RATES = {'EUR': 0.92, 'GBP': 0.79, 'CAD': 1.36, 'JPY': 150.0, 'NGN': 1500.0, 'GHS': 14.5, 'KES': 130.0, 'ZAR': 18.5}
+
+    def fetch(self):
+        return dict(self.RATES)
+
+
+def read_fx_file(path):
+    """
+    Reads a CSV file with 'currency' and 'rate' (units per US dollar) columns.
+
+    Returns:
+        dict: Rates keyed by currency code.
+    """
+    rates = {}
+    with open(path, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            rate = float(row['rate'])
+            if not rate > 0:
+                raise ValueError(f"Rate for {row['currency']} must be positive")
+            rates[normalize_currency(row['currency'])] = rate
+    return rates
+
+
+def store_fx_rates(rates):
+    """
+    Replaces the stored rates of the given currencies, commits and drops the in-memory copy.
+
+    Returns:
+        int: The number of rates stored.
+    """
+    rates = {normalize_currency(code): float(rate) for code, rate in rates.items()}
+    if rates:
+        db.session.execute(delete(FxRate).where(FxRate.currency_code.in_(list(rates))))
+        db.session.execute(insert(FxRate), [{'currency_code': code, 'rate': rate} for code, rate in rates.items()])
+    db.session.commit()
+    fx_cache.clear()
+    return len(rates)
@@ -0,0 +1,201 @@
+'''
+This module defines the outbound HTTP client used for third-party calls in the VASSET Flask application.
+
+Each integration gets one `HttpClient`, shared by every request the worker
+serves. It holds a `requests.Session` whose `HTTPAdapter` keeps a bounded pool
+of keep-alive connections, so calls skip the TCP and TLS handshakes. Every call
+has connect and read timeouts. Idempotent calls that fail with a connection
+error or a retryable status are retried with jittered exponential backoff.
+A circuit breaker stops calling an integration that keeps failing, so workers
+fail fast instead of queueing behind a dead upstream.
+
+Settings come from the HTTP_* config keys.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import time, random, threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+
+from config import Config
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+# Transient failures worth another attempt; other request errors fail the call at once.
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling an integration whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    '''
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failed calls in a row the circuit opens and calls
+    are refused for `reset_timeout` seconds. Then one trial call is let through:
+    success closes the circuit, failure opens it again.
+    '''
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Returns whether a call may proceed, moving an expired open circuit to half-open."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class HttpClient:
+    '''
+    Pooled, timed-out, retrying and circuit-broken wrapper around a `requests.Session`.
+    '''
+
+    def __init__(self, name, pool_size=10, connect_timeout=3.05, read_timeout=10.0, retries=2,
+                 backoff=0.25, max_backoff=4.0, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def max_duration(self, method='GET'):
+        """
+        Upper bound, in seconds, of one `request` call: every attempt hitting
+        both timeouts plus the longest backoff between attempts.
+        """
+        attempts = self.retries + 1 if method.upper() in IDEMPOTENT_METHODS else 1
+        return attempts * sum(self.timeout) + (attempts - 1) * self.max_backoff
+
+    def _delay(self, attempt, response):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        # Full jitter keeps workers that failed together from retrying together.
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def request(self, method, url, **kwargs):
+        """
+        Sends a request through the pool.
+
+        Returns the response, including a final error response once retries are
+        exhausted, so callers still inspect `status_code`.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+            requests.RequestException: If the last attempt failed without a response.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f'Circuit open for {self.name}')
+
+        kwargs.setdefault('timeout', self.timeout)
+        attempts = self.retries + 1 if method.upper() in IDEMPOTENT_METHODS else 1
+        succeeded = False
+        try:
+            for attempt in range(attempts):
+                response, error = None, None
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                except requests.RequestException as e:
+                    if not isinstance(e, RETRY_ERRORS):
+                        raise
+                    error = e
+                else:
+                    if response.status_code not in RETRY_STATUSES:
+                        succeeded = True
+                        return response
+                if attempt + 1 < attempts:
+                    time.sleep(self._delay(attempt, response))
+
+            if response is not None:
+                return response
+            raise error
+        finally:
+            # Every call settles the breaker, or a failed half-open trial would leave it stuck
+            if succeeded:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_http_client(name):
+    """
+    Returns the shared client for an integration, created from the HTTP_* config on first use.
+    """
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                def setting(key, cast=float):
+                    return cast(current_app.config.get(key, getattr(Config, key)))
+
+                client = _clients[name] = HttpClient(
+                    name,
+                    pool_size=setting('HTTP_POOL_SIZE', int),
+                    connect_timeout=setting('HTTP_CONNECT_TIMEOUT'),
+                    read_timeout=setting('HTTP_READ_TIMEOUT'),
+                    retries=setting('HTTP_RETRIES', int),
+                    backoff=setting('HTTP_BACKOFF'),
+                    max_backoff=setting('HTTP_MAX_BACKOFF'),
+                    failure_threshold=setting('HTTP_BREAKER_THRESHOLD', int),
+                    reset_timeout=setting('HTTP_BREAKER_RESET'),
+                )
+    return client
+
+
+def reset_http_clients():
+    """Closes and forgets every shared client, e.g. after changing the HTTP_* config."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,124 @@
+'''
+This module defines helper functions for bulk importing assets in the VASSET Flask application.
+
+Uploaded CSV or NDJSON bodies are read row by row, validated against the asset
+model's columns and inserted in fixed-size chunks, one transaction per chunk,
+so memory use does not grow with the size of the upload.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import io, csv, json
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from ...extensions import db
+from .asset_helpers import ASSET_TYPES, validate_asset_row
+from .portfolio_helpers import record_assets_added
+from .asset_index_helpers import index_assets
+from .symbol_helpers import attach_symbol_ids
+from .basic_helpers import log_exception
+
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+
+def iter_csv_rows(stream):
+    """
+    Yields `(line_number, row, error)` triples from a binary CSV stream with a header row.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8', newline=''))
+    for row in reader:
+        # Values the header does not name end up under the None key.
+        if None in row:
+            yield reader.line_num, None, 'has more values than the header'
+        else:
+            yield reader.line_num, row, None
+
+
+def iter_ndjson_rows(stream):
+    """
+    Yields `(line_number, row, error)` triples from a binary NDJSON stream, skipping blank lines.
+    """
+    for line_number, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8'), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except ValueError:
+            yield line_number, None, 'is not valid JSON'
+
+
+def import_assets(model, user_id, stream, fmt, chunk_size=1000, max_errors=1000):
+    """
+    Streams rows from an upload into an asset table.
+
+    Valid rows are buffered until `chunk_size` is reached, then inserted with a
+    single executemany statement and committed. A chunk that fails at the database
+    level is rolled back and each of its rows is reported as failed.
+
+    Args:
+        model (db.Model): The asset model to insert into.
+        user_id: The ID of the user that will own the imported assets.
+        stream: A binary file-like object holding the upload.
+        fmt (str): Either 'csv' or 'ndjson'.
+        chunk_size (int, optional): Rows per insert and transaction. Defaults to 1000.
+        max_errors (int, optional): Maximum number of row errors to report. Defaults to 1000.
+
+    Returns:
+        dict: Counts of imported and failed rows and the per-row error report.
+    """
+    rows = iter_csv_rows(stream) if fmt == 'csv' else iter_ndjson_rows(stream)
+    report = {'imported': 0, 'failed': 0, 'errors': []}
+
+    def add_error(line_number, errors):
+        report['failed'] += 1
+        if len(report['errors']) < max_errors:
+            report['errors'].append({'line': line_number, 'errors': errors})
+
+    chunk, chunk_lines = [], []
+
+    def flush_chunk():
+        if not chunk:
+            return
+        try:
+            attach_symbol_ids(ASSET_TYPES[model], chunk)
+            inserted = db.session.execute(
+                insert(model).returning(*model.__table__.columns), chunk
+            ).mappings().all()
+            index_assets(ASSET_TYPES[model], inserted)
+            record_assets_added(user_id, ASSET_TYPES[model], chunk)
+            db.session.commit()
+            report['imported'] += len(chunk)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            log_exception('ASSET IMPORT CHUNK FAILED', e)
+            for line_number in chunk_lines:
+                add_error(line_number, {'row': 'could not be saved'})
+        chunk.clear()
+        chunk_lines.clear()
+
+    try:
+        for line_number, row, error in rows:
+            if error:
+                add_error(line_number, {'row': error})
+                continue
+
+            values, errors = validate_asset_row(model, row)
+            if errors:
+                add_error(line_number, errors)
+                continue
+
+            values['user_id'] = user_id
+            chunk.append(values)
+            chunk_lines.append(line_number)
+            if len(chunk) >= chunk_size:
+                flush_chunk()
+    except (UnicodeDecodeError, csv.Error) as e:
+        # The rest of the upload cannot be read; keep what was parsed so far.
+        report['aborted'] = f'Unreadable upload: {e}'
+
+    flush_chunk()
+    report['errors_truncated'] = report['failed'] > len(report['errors'])
+    return report
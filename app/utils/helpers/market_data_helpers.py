@@ -0,0 +1,428 @@
+'''
+This module defines helper functions for the CoinGecko market data served by the VASSET Flask application.
+
+Market queries are normalized (ids lower-cased, de-duplicated and sorted, paging
+and the quote currency validated) and their responses cached under the
+normalized parameters for `MARKET_CACHE_TTL` seconds: in a bounded in-process
+LRU tier and, when Redis is configured, in a Redis tier shared by all workers.
+Upstream calls go through the shared, pooled `coingecko` HTTP client; errors
+raise `MarketDataError` and are never cached.
+
+A Celery beat task also pulls the top `MARKET_SNAPSHOT_SIZE` markets every
+`MARKET_SNAPSHOT_INTERVAL` seconds into a versioned snapshot, kept in a local
+file or in Redis and swapped in atomically. Readers hold the current snapshot
+in memory with an id index, and the crypto routes are served from it alone, so
+request latency never depends on CoinGecko: ids outside it are not found, pages
+past its end are empty and an old snapshot is still served. Only with
+`MARKET_UPSTREAM_FALLBACK` do queries it does not cover, and a missing or
+expired snapshot, fall back to the cached upstream call; batch quotes then
+reuse the per-id cache entries and fetch only the missing ids, many per
+upstream call.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import os, re, json, math, time, tempfile, threading
+from datetime import datetime
+from urllib.parse import urlencode
+
+import redis
+import requests
+from flask import current_app
+
+from config import Config
+from ...exceptions import MarketDataError
+from .cache_helpers import ReadThroughCache
+from .http_helpers import get_http_client, CircuitOpenError
+from .basic_helpers import log_exception
+
+
+LOGO_BASE_URL = 'https://assets.coingecko.com/coins/images'
+MAX_PER_PAGE = 250  # CoinGecko's page size limit
+MAX_QUOTE_IDS = 1000  # ids accepted by one batch quote request
+SNAPSHOT_FIELDS = ('id', 'name', 'symbol', 'current_price', 'image', 'market_cap_rank')
+SNAPSHOT_PAGE_SIZE = MAX_PER_PAGE
+QUOTE_CHUNK_SIZE = MAX_PER_PAGE  # ids per upstream call when resolving a batch of quotes
+CURRENCY_PATTERN = re.compile(r'^[a-z]{2,10}$')
+
+
+def _market_load_timeout():
+    # One upstream call with all its retries, plus a second of slack for decoding and caching
+    return get_http_client('coingecko').max_duration() + 1
+
+
+market_cache = ReadThroughCache('markets', 'MARKET_CACHE_TTL', 'MARKET_CACHE_SIZE', local_first=True,
+                                load_timeout=_market_load_timeout)
+
+
+def normalize_ids(ids):
+    """Turns a comma-separated string or a list of coin ids into a sorted list of distinct lower-case ids."""
+    if isinstance(ids, str):
+        ids = ids.split(',')
+    return sorted({str(coin_id).strip().lower() for coin_id in ids or [] if str(coin_id).strip()})
+
+
+def normalize_market_params(ids=None, per_page=10, page=1, vs_currency='usd'):
+    """
+    Builds the canonical query for CoinGecko's markets endpoint.
+
+    Raises:
+        ValueError: If paging or the quote currency is invalid.
+    """
+    vs_currency = str(vs_currency or 'usd').strip().lower()
+    if not CURRENCY_PATTERN.match(vs_currency):
+        raise ValueError('vs_currency must be a currency code such as usd')
+    try:
+        per_page, page = int(per_page), int(page)
+    except (TypeError, ValueError):
+        raise ValueError('per_page and page must be integers')
+    if not 1 <= per_page <= MAX_PER_PAGE or page < 1:
+        raise ValueError(f'per_page must be between 1 and {MAX_PER_PAGE} and page at least 1')
+
+    params = {'vs_currency': vs_currency, 'order': 'market_cap_desc', 'per_page': per_page, 'page': page, 'sparkline': 'false'}
+    ids = normalize_ids(ids)
+    if ids:
+        params['ids'] = ','.join(ids)
+    return params
+
+
+def market_cache_key(params):
+    return urlencode(sorted(params.items()))
+
+
+def fetch_markets(params):
+    """
+    Calls CoinGecko's markets endpoint.
+
+    Raises:
+        MarketDataError: If the request fails, CoinGecko answers with an error
+            status or its circuit breaker is open (503).
+    """
+    url = f"{current_app.config.get('COINGECKO_API_URL', Config.COINGECKO_API_URL)}/coins/markets"
+    try:
+        response = get_http_client('coingecko').get(url, params=params)
+    except CircuitOpenError:
+        raise MarketDataError('Market data is temporarily unavailable', 503)
+    except requests.RequestException:
+        raise MarketDataError()
+    if response.status_code != 200:
+        raise MarketDataError(status_code=response.status_code)
+    return response.json()
+
+
+def get_markets(params):
+    """Returns the markets for normalized parameters, from the cache when possible."""
+    return market_cache.get_or_load(market_cache_key(params), lambda: fetch_markets(params))
+
+
+def crypto_info(market):
+    """Serializes one market entry in the shape of `GET /crypto/<crypto_id>`."""
+    return {
+        'id': market['id'],
+        'name': market['name'],
+        'symbol': market['symbol'],
+        'current_price': market['current_price'],
+        'logo_url': f"{LOGO_BASE_URL}/{market['id']}/{market['image'].split('/')[-1]}"
+    }
+
+
+def crypto_list_item(market):
+    """Serializes one market entry in the shape of `GET /cryptos`."""
+    return {
+        'id': market['id'],
+        'name': market['name'],
+        'symbol': market['symbol'],
+        'current_price': market['current_price'],
+        'logo_url': market['image']
+    }
+
+
+class MarketSnapshot:
+    '''
+    In-memory market snapshot, ordered by market cap, with an id index.
+    '''
+
+    def __init__(self, data):
+        self.version = data['version']
+        self.fetched_at = data['fetched_at']
+        self.vs_currency = data['vs_currency']
+        self.markets = data['markets']
+        self.index = {market['id']: position for position, market in enumerate(self.markets)}
+
+    def age(self):
+        """Seconds since the snapshot was taken; versions are epoch milliseconds."""
+        return time.time() - self.version / 1000
+
+    def get(self, coin_id):
+        position = self.index.get(coin_id)
+        return None if position is None else self.markets[position]
+
+    def page(self, per_page, page, partial=False):
+        """
+        Returns a page of markets, or None if the snapshot does not cover all of
+        it. With `partial`, returns whatever part of the page it holds instead.
+        """
+        start = (page - 1) * per_page
+        if start + per_page > len(self.markets) and not partial:
+            return None
+        return self.markets[start:start + per_page]
+
+
+class FileSnapshotStore:
+    '''
+    Keeps the snapshot in a JSON file, replaced atomically with `os.replace`.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as tmp:
+                json.dump(data, tmp)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def token(self):
+        """Returns a value that changes whenever a new snapshot is written, or None."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def read(self, token):
+        with open(self.path, encoding='utf-8') as handle:
+            return json.load(handle)
+
+
+class RedisSnapshotStore:
+    '''
+    Keeps each snapshot under its own versioned key and points a `current` key
+    at the newest one. Moving the pointer is a single SET, so readers switch
+    from one complete snapshot to the next. Old versions expire after `retention` seconds.
+    '''
+
+    KEY = 'vasset:market_snapshot'
+
+    def __init__(self, client, retention=3600):
+        self.client = client
+        self.retention = retention
+
+    def write(self, data):
+        self.client.set(f"{self.KEY}:{data['version']}", json.dumps(data), ex=self.retention)
+        self.client.set(f'{self.KEY}:current', data['version'])
+
+    def token(self):
+        return self.client.get(f'{self.KEY}:current')
+
+    def read(self, token):
+        payload = self.client.get(f"{self.KEY}:{token.decode() if isinstance(token, bytes) else token}")
+        return json.loads(payload) if payload else None
+
+
+_redis_clients = {}
+
+
+def get_snapshot_store():
+    """Returns the snapshot store configured by `MARKET_SNAPSHOT_STORE` ('file' or 'redis')."""
+    config = current_app.config
+    if config.get('MARKET_SNAPSHOT_STORE', Config.MARKET_SNAPSHOT_STORE) == 'redis':
+        url = config.get('CACHE_REDIS_URL', Config.CACHE_REDIS_URL)
+        if url not in _redis_clients:
+            _redis_clients[url] = redis.Redis.from_url(url, socket_connect_timeout=0.25, socket_timeout=0.25)
+        return RedisSnapshotStore(_redis_clients[url])
+    return FileSnapshotStore(config.get('MARKET_SNAPSHOT_PATH', Config.MARKET_SNAPSHOT_PATH))
+
+
+class SnapshotReader:
+    '''
+    Process-wide copy of the current snapshot, reloaded only when the store's token changes.
+    '''
+
+    def __init__(self):
+        self._token = None
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def current(self, store):
+        token = store.token()
+        if token is None:
+            return None
+        if token != self._token:
+            with self._lock:
+                if token != self._token:
+                    data = store.read(token)
+                    self._snapshot = MarketSnapshot(data) if data else None
+                    self._token = token
+        return self._snapshot
+
+    def clear(self):
+        with self._lock:
+            self._token = self._snapshot = None
+
+
+snapshot_reader = SnapshotReader()
+
+
+def current_market_snapshot(allow_stale=False):
+    """
+    Returns the current snapshot, or None if there is none, it cannot be read
+    or, unless `allow_stale`, it is older than `MARKET_SNAPSHOT_MAX_AGE` seconds.
+    """
+    try:
+        snapshot = snapshot_reader.current(get_snapshot_store())
+    except (OSError, ValueError, redis.RedisError) as e:
+        log_exception('MARKET SNAPSHOT UNREADABLE', e)
+        return None
+    max_age = int(current_app.config.get('MARKET_SNAPSHOT_MAX_AGE', Config.MARKET_SNAPSHOT_MAX_AGE))
+    if snapshot is None or (not allow_stale and snapshot.age() > max_age):
+        return None
+    return snapshot
+
+
+def upstream_fallback_enabled():
+    return bool(current_app.config.get('MARKET_UPSTREAM_FALLBACK', Config.MARKET_UPSTREAM_FALLBACK))
+
+
+def _snapshot_only():
+    """
+    Returns the snapshot routes are served from when upstream fallback is off, even if old.
+
+    Raises:
+        MarketDataError: If no snapshot has been taken yet (503).
+    """
+    snapshot = current_market_snapshot(allow_stale=True)
+    if snapshot is None:
+        raise MarketDataError('Market data is temporarily unavailable', 503)
+    return snapshot
+
+
+def _check_snapshot_currency(snapshot, vs_currency):
+    if snapshot.vs_currency != vs_currency:
+        raise ValueError(f'Market data is only available in {snapshot.vs_currency}')
+
+
+def build_market_snapshot(size, vs_currency='usd'):
+    """
+    Pulls the top `size` markets from CoinGecko in pages of up to `SNAPSHOT_PAGE_SIZE`.
+
+    Raises:
+        MarketDataError: If any page fails, so no partial snapshot is produced.
+    """
+    per_page = min(size, SNAPSHOT_PAGE_SIZE)
+    markets = []
+    for page in range(1, math.ceil(size / per_page) + 1):
+        batch = fetch_markets(normalize_market_params(per_page=per_page, page=page, vs_currency=vs_currency))
+        markets.extend({field: market.get(field) for field in SNAPSHOT_FIELDS} for market in batch)
+        if len(batch) < per_page:
+            break
+
+    return {
+        'version': int(time.time() * 1000),
+        'fetched_at': datetime.utcnow().isoformat(),
+        'vs_currency': vs_currency,
+        'markets': markets[:size],
+    }
+
+
+def refresh_market_snapshot():
+    """
+    Builds a new snapshot and swaps it in.
+
+    Returns:
+        dict: The new snapshot's version and number of markets.
+    """
+    size = int(current_app.config.get('MARKET_SNAPSHOT_SIZE', Config.MARKET_SNAPSHOT_SIZE))
+    data = build_market_snapshot(size)
+    get_snapshot_store().write(data)
+    return {'version': data['version'], 'markets': len(data['markets'])}
+
+
+def lookup_markets(params):
+    """
+    Returns the markets for normalized parameters.
+
+    Served from the current snapshot only: unknown ids are left out and pages
+    are cut at its end. With `MARKET_UPSTREAM_FALLBACK`, queries the snapshot
+    does not fully cover are answered by `get_markets` instead.
+
+    Raises:
+        ValueError: If upstream fallback is off and the quote currency is not the snapshot's.
+        MarketDataError: If there is no snapshot, or the upstream call fails.
+    """
+    if not upstream_fallback_enabled():
+        snapshot = _snapshot_only()
+        _check_snapshot_currency(snapshot, params['vs_currency'])
+        if 'ids' in params:
+            return [market for market in map(snapshot.get, params['ids'].split(',')) if market]
+        return snapshot.page(params['per_page'], params['page'], partial=True)
+
+    snapshot = current_market_snapshot()
+    if snapshot is not None and snapshot.vs_currency == params['vs_currency']:
+        if 'ids' in params:
+            markets = [snapshot.get(coin_id) for coin_id in params['ids'].split(',')]
+            if all(markets):
+                return markets
+        else:
+            markets = snapshot.page(params['per_page'], params['page'])
+            if markets is not None:
+                return markets
+    return get_markets(params)
+
+
+def get_crypto_quotes(ids, vs_currency='usd'):
+    """
+    Resolves many coin ids at once.
+
+    Each id is served from the snapshot. With `MARKET_UPSTREAM_FALLBACK`, ids
+    it does not hold come from the cache entry a single-coin lookup would use,
+    and the remaining ids are fetched together, `QUOTE_CHUNK_SIZE` per upstream
+    call, and cached one entry per id, so unknown ids are remembered too.
+
+    Raises:
+        ValueError: If no ids, more than `MAX_QUOTE_IDS` ids or an invalid
+            currency are given, or, without fallback, a currency other than the snapshot's.
+        MarketDataError: If there is no snapshot, or an upstream call fails.
+
+    Returns:
+        dict: The market entry of every id, or None for ids CoinGecko does not know.
+    """
+    ids = normalize_ids(ids)
+    if not ids:
+        raise ValueError('ids must list at least one coin id')
+    if len(ids) > MAX_QUOTE_IDS:
+        raise ValueError(f'At most {MAX_QUOTE_IDS} ids can be requested at once')
+    vs_currency = normalize_market_params(vs_currency=vs_currency)['vs_currency']
+
+    if not upstream_fallback_enabled():
+        snapshot = _snapshot_only()
+        _check_snapshot_currency(snapshot, vs_currency)
+        return {coin_id: snapshot.get(coin_id) for coin_id in ids}
+
+    quotes = {}
+    snapshot = current_market_snapshot()
+    if snapshot is not None and snapshot.vs_currency == vs_currency:
+        quotes = {coin_id: snapshot.get(coin_id) for coin_id in ids if snapshot.get(coin_id)}
+
+    keys = {market_cache_key(normalize_market_params(ids=coin_id, vs_currency=vs_currency)): coin_id
+            for coin_id in ids if coin_id not in quotes}
+
+    def load(missing_keys):
+        missing = [keys[key] for key in missing_keys]
+        found = {}
+        for start in range(0, len(missing), QUOTE_CHUNK_SIZE):
+            chunk = missing[start:start + QUOTE_CHUNK_SIZE]
+            params = normalize_market_params(ids=chunk, per_page=len(chunk), vs_currency=vs_currency)
+            found.update((market['id'], market) for market in fetch_markets(params))
+        return {key: [found[keys[key]]] if keys[key] in found else [] for key in missing_keys}
+
+    for key, markets in market_cache.get_many_or_load(list(keys), load).items():
+        quotes[keys[key]] = markets[0] if markets else None
+    return {coin_id: quotes[coin_id] for coin_id in ids}
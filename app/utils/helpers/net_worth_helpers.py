@@ -0,0 +1,74 @@
+'''
+This module defines helper functions for the daily net-worth snapshots of the VASSET Flask application.
+
+Each run values every user's holdings at the end of one UTC day against the
+price-history store, and stores one `(user_id, day, value)` row per user. Users
+are valued in ID order in chunks, and each chunk is committed on its own. A run
+that stops part-way resumes after the last stored user, and a finished day is
+never written twice.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, func, delete, insert
+
+from ...extensions import db
+from ...models import NetWorthSnapshot
+from .valuation_helpers import revalue_all_users
+from .price_history_helpers import get_price_store, held_symbols, price_snapshot
+
+
+def end_of_day(day):
+    """Returns the last epoch second of a UTC day."""
+    midnight = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + timedelta(days=1)
+    return int(midnight.timestamp()) - 1
+
+
+def snapshot_net_worth(day, chunk_size=1000, restart=False):
+    """
+    Writes the net-worth snapshots of every user for one day.
+
+    Args:
+        day (date): The UTC day to snapshot.
+        chunk_size (int, optional): Number of users valued and committed together. Defaults to 1000.
+        restart (bool, optional): Discard the day's existing snapshots and recompute them all.
+
+    Returns:
+        int: The number of snapshots written by this run.
+    """
+    if restart:
+        db.session.execute(delete(NetWorthSnapshot).where(NetWorthSnapshot.day == day))
+        db.session.commit()
+
+    after_user_id = db.session.execute(
+        select(func.max(NetWorthSnapshot.user_id)).where(NetWorthSnapshot.day == day)
+    ).scalar() or 0
+
+    prices = price_snapshot(get_price_store(), held_symbols(), end_of_day(day))
+
+    written = 0
+    for user_ids, totals in revalue_all_users(prices, chunk_size, after_user_id=after_user_id):
+        if not len(user_ids):
+            continue
+        db.session.execute(insert(NetWorthSnapshot), [
+            {'user_id': user_id, 'day': day, 'value': total}
+            for user_id, total in zip(user_ids.tolist(), totals.tolist())
+        ])
+        db.session.commit()
+        written += len(user_ids)
+
+    return written
+
+
+def net_worth_history(user_id, start=None, end=None):
+    """
+    Reads a user's daily snapshots, oldest first, between two days inclusive.
+    """
+    query = select(NetWorthSnapshot).where(NetWorthSnapshot.user_id == user_id)
+    if start is not None:
+        query = query.where(NetWorthSnapshot.day >= start)
+    if end is not None:
+        query = query.where(NetWorthSnapshot.day <= end)
+    return db.session.execute(query.order_by(NetWorthSnapshot.day)).scalars().all()
@@ -0,0 +1,127 @@
+'''
+This module defines helper functions for maintaining portfolio rollups in the VASSET Flask application.
+
+`PortfolioSummary` rows are updated incrementally inside the transaction of every
+asset write, and can be rebuilt from the asset tables when they drift.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+from datetime import datetime
+from sqlalchemy import select, func, delete, insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ...extensions import db
+from ...models import PortfolioSummary, RealEstate, Crypto
+from .asset_helpers import ASSET_MODELS
+
+
+def _field(asset, name):
+    return asset.get(name) if isinstance(asset, dict) else getattr(asset, name)
+
+
+def _create_summary_row(user_id):
+    # Concurrent first writes for a user both get here; only one row is created
+    connection = db.session.connection()
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        module = postgresql if dialect == 'postgresql' else sqlite
+        statement = module.insert(PortfolioSummary).on_conflict_do_nothing(index_elements=['user_id'])
+    else:
+        statement = insert(PortfolioSummary)
+    connection.execute(statement, {'user_id': user_id, 'crypto_amounts': {}})
+
+
+def record_assets_added(user_id, asset_type, assets):
+    """
+    Applies newly added assets to the user's portfolio summary.
+
+    Does not commit: call it before the commit of the transaction that adds the
+    assets so the summary and the assets are saved atomically. A missing summary
+    row is inserted with ON CONFLICT DO NOTHING and then locked, so concurrent
+    first writes for a user serialize on it instead of failing.
+
+    Args:
+        user_id: The ID of the user that owns the assets.
+        asset_type (str): Key of `ASSET_MODELS` the assets belong to.
+        assets (list): The added assets, as model instances or column dicts.
+    """
+    if not assets:
+        return
+
+    summary = db.session.get(PortfolioSummary, user_id, with_for_update=True)
+    if summary is None:
+        _create_summary_row(user_id)
+        summary = db.session.get(PortfolioSummary, user_id, with_for_update=True)
+
+    count_column = f'{asset_type}_count'
+    setattr(summary, count_column, (getattr(summary, count_column) or 0) + len(assets))
+
+    if asset_type == 'real_estates':
+        summary.real_estate_value = (summary.real_estate_value or 0.0) + sum(_field(a, 'value') for a in assets)
+    elif asset_type == 'cryptos':
+        amounts = dict(summary.crypto_amounts or {})
+        for asset in assets:
+            symbol = str(_field(asset, 'symbol')).upper()
+            amounts[symbol] = amounts.get(symbol, 0.0) + _field(asset, 'amount')
+        summary.crypto_amounts = amounts
+
+    summary.updated_at = datetime.utcnow()
+
+
+def rebuild_portfolio_summaries(user_ids=None, commit=True):
+    """
+    Recomputes portfolio summaries from scratch with GROUP BY queries over the asset tables.
+
+    The summary rows are locked before the aggregates run, like `record_assets_added`
+    does, so an asset added concurrently is either counted by the aggregates or
+    applied to the rebuilt row after this transaction commits, never lost.
+
+    Args:
+        user_ids (list, optional): IDs of the users to rebuild. Rebuilds every user when None.
+        commit (bool, optional): Commit the rebuilt rows. Pass False to rebuild
+            inside the caller's transaction. Defaults to True.
+
+    Returns:
+        int: The number of summaries written.
+    """
+    def scoped(query, model):
+        return query.where(model.user_id.in_(user_ids)) if user_ids is not None else query
+
+    if user_ids is not None:
+        for user_id in user_ids:
+            _create_summary_row(user_id)
+    db.session.execute(scoped(select(PortfolioSummary.user_id), PortfolioSummary).with_for_update())
+
+    summaries = {}
+
+    def summary_for(user_id):
+        if user_id not in summaries:
+            summaries[user_id] = PortfolioSummary(user_id=user_id, crypto_amounts={}, real_estate_value=0.0,
+                                                  **{f'{t}_count': 0 for t in ASSET_MODELS})
+        return summaries[user_id]
+
+    for asset_type, model in ASSET_MODELS.items():
+        query = scoped(select(model.user_id, func.count()).group_by(model.user_id), model)
+        for user_id, count in db.session.execute(query):
+            setattr(summary_for(user_id), f'{asset_type}_count', count)
+
+    query = scoped(select(RealEstate.user_id, func.sum(RealEstate.value)).group_by(RealEstate.user_id), RealEstate)
+    for user_id, total in db.session.execute(query):
+        summary_for(user_id).real_estate_value = total or 0.0
+
+    symbol = func.upper(Crypto.symbol)
+    query = scoped(select(Crypto.user_id, symbol, func.sum(Crypto.amount)).group_by(Crypto.user_id, symbol), Crypto)
+    for user_id, crypto_symbol, amount in db.session.execute(query):
+        summary_for(user_id).crypto_amounts[crypto_symbol] = amount
+
+    stale = delete(PortfolioSummary)
+    if user_ids is not None:
+        stale = stale.where(PortfolioSummary.user_id.in_(user_ids))
+    db.session.execute(stale)
+    db.session.add_all(summaries.values())
+    if commit:
+        db.session.commit()
+
+    return len(summaries)
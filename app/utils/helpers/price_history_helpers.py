@@ -0,0 +1,346 @@
+'''
+This module defines the price-history store of the VASSET Flask application.
+
+Prices for each symbol are kept as one NumPy file per calendar month holding a
+sorted structured array of (timestamp, price) pairs: int64 epoch seconds and
+float64 prices, 16 bytes per tick. Blocks are memory-mapped when read, so range
+queries only touch the months, and the slices within them, that they need.
+OHLC downsampling works month by month, so memory stays bounded even for
+long ranges.
+
+Ingestion accepts a local CSV file or any provider exposing
+`fetch(symbol, start, end, step)`, such as the offline `StubPriceProvider`.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import os, re, csv, zlib, tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, func, union
+
+from config import Config
+from ...extensions import db
+from ...models import Stock, Crypto
+
+
+PRICE_DTYPE = np.dtype([('ts', '<i8'), ('price', '<f8')])
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9._-]{1,20}$')
+INTERVAL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def normalize_symbol(symbol):
+    """
+    Upper-cases a symbol and checks it is safe to use as a directory name.
+
+    Raises:
+        ValueError: If the symbol contains unexpected characters.
+    """
+    symbol = str(symbol).strip().upper()
+    if not SYMBOL_PATTERN.match(symbol):
+        raise ValueError(f'Invalid symbol: {symbol!r}')
+    return symbol
+
+
+def parse_interval(value):
+    """
+    Parses an interval such as '300', '5m', '1h' or '1d' into seconds.
+
+    Raises:
+        ValueError: If the interval is not a positive duration.
+    """
+    value = str(value).strip().lower()
+    if value[-1:] in INTERVAL_UNITS:
+        seconds = int(value[:-1]) * INTERVAL_UNITS[value[-1]]
+    else:
+        seconds = int(value)
+    if seconds <= 0:
+        raise ValueError('Interval must be positive')
+    return seconds
+
+
+def parse_timestamp(value):
+    """
+    Converts epoch seconds, an ISO 8601 string or a datetime into epoch seconds (UTC).
+    """
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        value = str(value).strip()
+        try:
+            return int(float(value))
+        except ValueError:
+            moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def _month_keys(ts):
+    '''Maps epoch seconds to months since 1970-01.'''
+    return ts.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+
+
+def _month_name(month_key):
+    return str(np.datetime64(int(month_key), 'M'))
+
+
+class PriceHistoryStore:
+    '''
+    File-backed columnar store of per-symbol price series.
+
+    Layout: `<root>/<SYMBOL>/<YYYY-MM>.npy`, each file a sorted `PRICE_DTYPE` array.
+    '''
+
+    def __init__(self, root):
+        self.root = root
+
+    def _block_path(self, symbol, month_key):
+        return os.path.join(self.root, symbol, f'{_month_name(month_key)}.npy')
+
+    def _load_block(self, symbol, month_key, mmap=True):
+        path = self._block_path(symbol, month_key)
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode='r' if mmap else None)
+
+    def _write_block(self, symbol, month_key, block):
+        directory = os.path.join(self.root, symbol)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                np.save(tmp, block)
+            os.replace(tmp_path, self._block_path(symbol, month_key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _months(self, symbol):
+        """Returns the sorted month keys with a stored block for a symbol."""
+        directory = os.path.join(self.root, symbol)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(int(np.datetime64(name[:-4], 'M').astype(np.int64))
+                      for name in os.listdir(directory) if name.endswith('.npy'))
+
+    def symbols(self):
+        """Lists the symbols that have stored prices."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if SYMBOL_PATTERN.match(name))
+
+    def append(self, symbol, timestamps, prices):
+        """
+        Adds ticks to a symbol's series.
+
+        Ticks may arrive in any order; a tick whose timestamp already exists
+        replaces the stored price. Each touched month block is rewritten atomically.
+
+        Args:
+            symbol (str): The ticker.
+            timestamps (array-like): Epoch seconds.
+            prices (array-like): Prices aligned with `timestamps`.
+
+        Returns:
+            int: The number of ticks written.
+        """
+        symbol = normalize_symbol(symbol)
+        incoming = np.empty(len(timestamps), dtype=PRICE_DTYPE)
+        incoming['ts'] = np.asarray(timestamps, dtype=np.int64)
+        incoming['price'] = np.asarray(prices, dtype=np.float64)
+        if not len(incoming):
+            return 0
+
+        months = _month_keys(incoming['ts'])
+        for month_key in np.unique(months):
+            ticks = incoming[months == month_key]
+            existing = self._load_block(symbol, month_key, mmap=False)
+            # Existing ticks first so a stable sort keeps the newest price last.
+            block = ticks if existing is None else np.concatenate([existing, ticks])
+            block = block[np.argsort(block['ts'], kind='stable')]
+            is_last = np.append(block['ts'][1:] != block['ts'][:-1], True)
+            self._write_block(symbol, month_key, block[is_last])
+
+        return len(incoming)
+
+    def iter_blocks(self, symbol, start, end):
+        """
+        Yields the memory-mapped slices of a series in `[start, end)`, one per month.
+        """
+        symbol = normalize_symbol(symbol)
+        if start >= end:
+            return
+        first, last = _month_keys(np.array([start, end - 1], dtype=np.int64))
+        # Only months that exist on disk, so a wide range costs one directory listing
+        for month_key in self._months(symbol):
+            if not first <= month_key <= last:
+                continue
+            block = self._load_block(symbol, month_key)
+            if block is None:
+                continue
+            lo = np.searchsorted(block['ts'], start, side='left')
+            hi = np.searchsorted(block['ts'], end, side='left')
+            if hi > lo:
+                yield block[lo:hi]
+
+    def count(self, symbol, start, end):
+        """
+        Returns the number of ticks of a series in `[start, end)` without reading them.
+        """
+        return sum(len(block) for block in self.iter_blocks(symbol, start, end))
+
+    def range(self, symbol, start, end):
+        """
+        Returns the ticks of a series in `[start, end)`.
+
+        Returns:
+            tuple: `(timestamps, prices)` NumPy arrays.
+        """
+        blocks = [np.array(block) for block in self.iter_blocks(symbol, start, end)]
+        data = np.concatenate(blocks) if blocks else np.empty(0, dtype=PRICE_DTYPE)
+        return data['ts'], data['price']
+
+    def latest(self, symbol, at):
+        """
+        Returns the last price at or before `at`, or None if there is none.
+        """
+        symbol = normalize_symbol(symbol)
+        month_key = int(_month_keys(np.array([at], dtype=np.int64))[0])
+        for candidate in reversed(self._months(symbol)):
+            if candidate > month_key:
+                continue
+            block = self._load_block(symbol, candidate)
+            index = np.searchsorted(block['ts'], at, side='right')
+            if index:
+                return float(block['price'][index - 1])
+        return None
+
+    def ohlc(self, symbol, start, end, interval):
+        """
+        Downsamples a series in `[start, end)` into OHLC buckets.
+
+        Buckets are aligned to multiples of `interval` seconds since the epoch.
+        Blocks are processed one month at a time; a bucket spanning months is merged.
+
+        Args:
+            symbol (str): The ticker.
+            start (int): Range start in epoch seconds, inclusive.
+            end (int): Range end in epoch seconds, exclusive.
+            interval (int): Bucket width in seconds.
+
+        Returns:
+            dict: Aligned lists `ts`, `open`, `high`, `low`, `close` and `count`.
+        """
+        parts = []
+        for block in self.iter_blocks(symbol, start, end):
+            ts, price = block['ts'], block['price']
+            buckets = ts // interval
+            starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+            ends = np.r_[starts[1:], len(ts)]
+            part = {
+                'ts': buckets[starts] * interval,
+                'open': price[starts],
+                'high': np.maximum.reduceat(price, starts),
+                'low': np.minimum.reduceat(price, starts),
+                'close': price[ends - 1],
+                'count': ends - starts,
+            }
+
+            if parts and parts[-1]['ts'][-1] == part['ts'][0]:
+                previous = parts[-1]
+                previous['high'][-1] = max(previous['high'][-1], part['high'][0])
+                previous['low'][-1] = min(previous['low'][-1], part['low'][0])
+                previous['close'][-1] = part['close'][0]
+                previous['count'][-1] += part['count'][0]
+                part = {key: values[1:] for key, values in part.items()}
+            # A month that falls entirely into the previous bucket leaves nothing to add
+            if len(part['ts']):
+                parts.append(part)
+
+        keys = ('ts', 'open', 'high', 'low', 'close', 'count')
+        if not parts:
+            return {key: [] for key in keys}
+        return {key: np.concatenate([part[key] for part in parts]).tolist() for key in keys}
+
+
+class StubPriceProvider:
+    '''
+    Offline price provider producing a deterministic random walk per symbol.
+
+    Useful for development and tests where no market-data API is reachable.
+    '''
+
+    def __init__(self, base_price=100.0, volatility=0.01):
+        self.base_price = base_price
+        self.volatility = volatility
+
+    def fetch(self, symbol, start, end, step):
+        timestamps = np.arange(start - start % step, end, step, dtype=np.int64)
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        returns = rng.normal(0.0, self.volatility, size=len(timestamps))
+        return timestamps, self.base_price * np.exp(np.cumsum(returns))
+
+
+def get_price_store():
+    """Returns the price store configured for the current app."""
+    return PriceHistoryStore(current_app.config.get('PRICE_HISTORY_DIR', Config.PRICE_HISTORY_DIR))
+
+
+def held_symbols():
+    """Returns the distinct upper-cased symbols held in any Stock or Crypto row."""
+    query = union(select(func.upper(Stock.symbol)), select(func.upper(Crypto.symbol)))
+    return sorted(symbol for symbol in db.session.execute(query).scalars() if symbol)
+
+
+def price_snapshot(store, symbols, at):
+    """
+    Builds a price snapshot, as accepted by the valuation helpers, from the last
+    stored price of each symbol at or before `at`.
+
+    Symbols share one namespace in the store, so the same prices are offered
+    for stocks and cryptos. Symbols without a stored price are left out.
+    """
+    prices = {}
+    for symbol in symbols:
+        price = store.latest(symbol, at)
+        if price is not None:
+            prices[normalize_symbol(symbol)] = price
+    return {'stocks': prices, 'cryptos': prices}
+
+
+def ingest_price_file(store, path):
+    """
+    Loads a CSV file with 'symbol', 'timestamp' and 'price' columns into the store.
+
+    Timestamps may be epoch seconds or ISO 8601 strings.
+
+    Returns:
+        int: The number of ticks written.
+    """
+    series = {}
+    with open(path, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            symbol = normalize_symbol(row['symbol'])
+            timestamps, prices = series.setdefault(symbol, ([], []))
+            timestamps.append(parse_timestamp(row['timestamp']))
+            prices.append(float(row['price']))
+
+    return sum(store.append(symbol, timestamps, prices) for symbol, (timestamps, prices) in series.items())
+
+
+def ingest_from_provider(store, provider, symbols, start, end, step):
+    """
+    Pulls `[start, end)` at `step` seconds from a provider for every symbol into the store.
+
+    Returns:
+        int: The number of ticks written.
+    """
+    written = 0
+    for symbol in symbols:
+        timestamps, prices = provider.fetch(normalize_symbol(symbol), start, end, step)
+        written += store.append(symbol, timestamps, prices)
+    return written
@@ -0,0 +1,79 @@
+'''
+This module defines helper functions for searching a user's assets in the VASSET Flask application.
+
+Searches run against `asset_index.search_text`, so one indexed query covers
+every asset type. PostgreSQL matches prefixes through a `tsvector` GIN index
+and substrings through a `pg_trgm` GIN index. SQLite matches prefixes through
+the `asset_search` FTS5 table.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import re
+from sqlalchemy import select, func, literal_column, table, column, or_
+
+from ...extensions import db
+from ...models import AssetIndex
+from .asset_index_helpers import hydrate_index_entries
+
+
+asset_search = table('asset_search', column('rowid'), column('search_text'))
+
+
+def search_terms(query):
+    """Splits a search query into lower-cased word tokens."""
+    return re.findall(r'\w+', query.lower())
+
+
+def _postgres_search(user_id, query, terms):
+    document = func.to_tsvector(literal_column("'simple'"), func.coalesce(AssetIndex.search_text, ''))
+    tsquery = func.to_tsquery(literal_column("'simple'"), ' & '.join(f'{term}:*' for term in terms))
+    escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    rank = func.ts_rank(document, tsquery) + func.similarity(AssetIndex.search_text, query)
+
+    return (
+        select(AssetIndex.id, AssetIndex.asset_type, AssetIndex.asset_id)
+        .where(AssetIndex.user_id == user_id,
+               or_(document.op('@@')(tsquery), AssetIndex.search_text.ilike(f'%{escaped}%', escape='\\')))
+        .order_by(rank.desc(), AssetIndex.id)
+    )
+
+
+def _sqlite_search(user_id, query, terms):
+    match = ' '.join(f'"{term}"*' for term in terms)
+    rank = func.bm25(literal_column('asset_search'))
+
+    return (
+        select(AssetIndex.id, AssetIndex.asset_type, AssetIndex.asset_id)
+        .join(asset_search, asset_search.c.rowid == AssetIndex.id)
+        .where(asset_search.c.search_text.match(match), AssetIndex.user_id == user_id)
+        .order_by(rank, AssetIndex.id)
+    )
+
+
+def search_assets(user_id, query, page=1, per_page=10):
+    """
+    Searches a user's assets of every type, best matches first.
+
+    Every word of the query must match the start of a word in the asset's
+    search text; PostgreSQL also accepts the query as a substring.
+
+    Args:
+        user_id: The ID of the user whose assets are searched.
+        query (str): The search query.
+        page (int, optional): 1-based page number. Defaults to 1.
+        per_page (int, optional): Results per page. Defaults to 10.
+
+    Returns:
+        tuple: The page as `{'type': ..., 'asset': ...}` items and whether there is a next page.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], False
+
+    search = _postgres_search if db.session.get_bind().dialect.name == 'postgresql' else _sqlite_search
+    statement = search(user_id, query.strip(), terms).limit(per_page + 1).offset((page - 1) * per_page)
+    entries = db.session.execute(statement).all()
+
+    return hydrate_index_entries(entries[:per_page]), len(entries) > per_page
@@ -0,0 +1,142 @@
+'''
+This module defines helper functions for the symbol dimension table of the VASSET Flask application.
+
+Every stock and crypto row points at one `symbols` row through `symbol_id`, so
+per-symbol lookups, grouping and price joins compare small integers instead of
+free-form ticker strings. Tickers are stored once per asset class, upper-cased
+and trimmed. ORM writes resolve `symbol_id` automatically before each flush;
+bulk Core statements call `attach_symbol_ids` themselves.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+from sqlalchemy import event, select, inspect, insert, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ...extensions import db
+from ...models import Symbol, Stock, Crypto
+
+
+SYMBOL_ASSET_CLASSES = {'stocks': 'stock', 'cryptos': 'crypto'}
+SYMBOL_MODELS = {Stock: 'stocks', Crypto: 'cryptos'}
+
+
+def normalize_ticker(ticker):
+    """Returns the canonical form of a ticker: trimmed and upper-cased."""
+    return str(ticker).strip().upper()
+
+
+def _insert_missing(connection, rows):
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        module = postgresql if dialect == 'postgresql' else sqlite
+        statement = module.insert(Symbol).on_conflict_do_nothing(index_elements=['asset_class', 'ticker'])
+    else:
+        statement = insert(Symbol)
+    connection.execute(statement, rows)
+
+
+def resolve_symbol_ids(asset_class, tickers, connection=None):
+    """
+    Maps tickers to their `symbols` ids, creating the rows that do not exist yet.
+
+    Concurrent writers creating the same ticker do not conflict: missing rows are
+    inserted with ON CONFLICT DO NOTHING and then read back. Does not commit.
+
+    Args:
+        asset_class (str): 'stock' or 'crypto'.
+        tickers (iterable): Tickers in any case; blanks are ignored.
+        connection (optional): Connection to execute on. Defaults to the current session.
+
+    Returns:
+        dict: Canonical ticker to symbol id.
+    """
+    tickers = {normalize_ticker(ticker) for ticker in tickers if ticker and str(ticker).strip()}
+    if not tickers:
+        return {}
+    connection = connection or db.session.connection()
+
+    def lookup():
+        query = select(Symbol.ticker, Symbol.id).where(Symbol.asset_class == asset_class, Symbol.ticker.in_(tickers))
+        return dict(connection.execute(query).all())
+
+    ids = lookup()
+    missing = tickers - ids.keys()
+    if missing:
+        _insert_missing(connection, [{'ticker': ticker, 'asset_class': asset_class} for ticker in sorted(missing)])
+        ids = lookup()
+    return ids
+
+
+def attach_symbol_ids(asset_type, rows, connection=None):
+    """
+    Sets 'symbol_id' on row mappings that carry a 'symbol', in place.
+
+    Call it before Core inserts or updates of stocks and cryptos; other asset
+    types are left untouched. Does not commit.
+
+    Args:
+        asset_type (str): Key of `ASSET_MODELS` the rows belong to.
+        rows (list): Mutable mappings of column values.
+        connection (optional): Connection to execute on. Defaults to the current session.
+
+    Returns:
+        list: The same rows.
+    """
+    asset_class = SYMBOL_ASSET_CLASSES.get(asset_type)
+    rows_with_symbol = [row for row in rows if row.get('symbol')] if asset_class else []
+    if rows_with_symbol:
+        ids = resolve_symbol_ids(asset_class, (row['symbol'] for row in rows_with_symbol), connection=connection)
+        for row in rows_with_symbol:
+            row['symbol_id'] = ids.get(normalize_ticker(row['symbol']))
+    return rows
+
+
+@event.listens_for(db.session, 'before_flush')
+def _resolve_symbol_ids_before_flush(session, flush_context, instances):
+    pending = {}
+    for obj in list(session.new) + list(session.dirty):
+        asset_type = SYMBOL_MODELS.get(type(obj))
+        if not asset_type or not obj.symbol:
+            continue
+        if obj.symbol_id is None or inspect(obj).attrs.symbol.history.has_changes():
+            pending.setdefault(asset_type, []).append(obj)
+
+    for asset_type, assets in pending.items():
+        ids = resolve_symbol_ids(SYMBOL_ASSET_CLASSES[asset_type], (asset.symbol for asset in assets),
+                                 connection=session.connection())
+        for asset in assets:
+            asset.symbol_id = ids.get(normalize_ticker(asset.symbol))
+
+
+def backfill_symbol_ids(batch_size=1000):
+    """
+    Creates missing `symbols` rows and fills `symbol_id` on every stock and
+    crypto row that lacks one, committing after each batch of `batch_size` rows.
+
+    Returns:
+        int: The number of asset rows updated.
+    """
+    updated = 0
+    for model, asset_type in SYMBOL_MODELS.items():
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(model.id, model.symbol)
+                .where(model.symbol_id.is_(None), model.id > last_id)
+                .order_by(model.id).limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                break
+            rows = attach_symbol_ids(asset_type, [dict(row) for row in rows])
+            db.session.execute(
+                model.__table__.update()
+                .where(model.__table__.c.id == bindparam('b_id'))
+                .values(symbol_id=bindparam('b_symbol_id')),
+                [{'b_id': row['id'], 'b_symbol_id': row['symbol_id']} for row in rows],
+            )
+            db.session.commit()
+            updated += len(rows)
+            last_id = rows[-1]['id']
+    return updated
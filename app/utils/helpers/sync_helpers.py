@@ -0,0 +1,183 @@
+'''
+This module defines helper functions for delta-syncing assets in the VASSET Flask application.
+
+Clients keep an opaque cursor and ask for the rows created, updated or deleted
+since it. Changed rows are found through the `(user_id, updated_at)` indexes and
+deletions through the `asset_tombstones` log, so a resync only reads what changed.
+Deletions made through the ORM are logged by an `after_flush` hook; bulk Core
+deletes call `record_asset_deletions` themselves. Syncs are paged, so a first
+sync does not load every asset of the user at once.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import json, base64
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, event
+
+from ...extensions import db
+from ...models import AssetTombstone, User
+from ...exceptions import InvalidCursorError
+from .asset_helpers import ASSET_MODELS, ASSET_TYPES, select_assets
+
+
+# Where a paged sync stopped: when it started, and the last asset ID returned
+# of the asset type it stopped in.
+SyncPosition = namedtuple('SyncPosition', ['started', 'asset_type', 'last_id'])
+
+
+def encode_sync_cursor(timestamp, position=None):
+    """
+    Encodes a sync position into an opaque cursor string.
+
+    Args:
+        timestamp (datetime): Changes after this time are synced. None for a first sync.
+        position (SyncPosition, optional): Where the previous page stopped, if the sync is unfinished.
+    """
+    if position is None:
+        raw = timestamp.isoformat()
+    else:
+        raw = json.dumps({
+            'since': timestamp.isoformat() if timestamp else None,
+            'started': position.started.isoformat(),
+            'type': position.asset_type,
+            'last_id': position.last_id,
+        })
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_sync_cursor(cursor):
+    """
+    Decodes a cursor produced by `encode_sync_cursor`.
+
+    Returns:
+        tuple: The `(since, position)` the cursor was encoded from.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        if not raw.startswith('{'):
+            return datetime.fromisoformat(raw), None
+
+        state = json.loads(raw)
+        since = datetime.fromisoformat(state['since']) if state['since'] else None
+        position = SyncPosition(datetime.fromisoformat(state['started']), state['type'], int(state['last_id']))
+    except (ValueError, UnicodeDecodeError, TypeError, KeyError):
+        raise InvalidCursorError("Invalid sync cursor.")
+    if position.asset_type not in ASSET_MODELS or position.last_id < 0:
+        raise InvalidCursorError("Invalid sync cursor.")
+    return since, position
+
+
+def record_asset_deletions(user_id, asset_type, asset_ids, connection=None):
+    """
+    Writes tombstones for deleted assets.
+
+    Does not commit: call it in the transaction that deletes the assets. Only
+    needed for deletes that bypass the ORM unit of work.
+
+    Args:
+        user_id: The ID of the user that owned the assets.
+        asset_type (str): Key of `ASSET_MODELS` the assets belonged to.
+        asset_ids (list): IDs of the deleted assets.
+        connection (optional): Connection to execute on. Defaults to the current session.
+    """
+    if not asset_ids:
+        return
+    (connection or db.session).execute(insert(AssetTombstone), [
+        {'user_id': user_id, 'asset_type': asset_type, 'asset_id': asset_id} for asset_id in asset_ids
+    ])
+
+
+@event.listens_for(db.session, 'after_flush')
+def _record_deletions_after_flush(session, flush_context):
+    # Tombstones reference the user, so none are written for users deleted in the same flush
+    deleted_users = {obj.id for obj in session.deleted if isinstance(obj, User)}
+    removed = {}
+    for obj in session.deleted:
+        asset_type = ASSET_TYPES.get(type(obj))
+        if asset_type and obj.user_id not in deleted_users:
+            removed.setdefault((obj.user_id, asset_type), []).append(obj.id)
+
+    for (user_id, asset_type), asset_ids in removed.items():
+        record_asset_deletions(user_id, asset_type, asset_ids, connection=session.connection())
+
+
+def asset_changes(user_id, since=None, position=None, limit=1000, overlap_seconds=5):
+    """
+    Collects a page of the assets of a user that changed after a point in time.
+
+    Assets are read type by type in ID order. When more than `limit` changed,
+    the returned cursor continues the same sync on the next call and
+    'has_more' is true. The last page lists the deletions and returns a cursor
+    that lags the time the sync started by `overlap_seconds`, so rows written
+    by transactions that commit slightly later are not missed. Clients may
+    therefore see a row twice and should apply changes as upserts.
+
+    Args:
+        user_id: The ID of the user whose assets are synced.
+        since (datetime, optional): Position of the previous sync. Returns every asset when None.
+        position (SyncPosition, optional): Where the previous page of this sync stopped.
+        limit (int, optional): Maximum number of changed assets to return. Defaults to 1000.
+        overlap_seconds (int, optional): How far the next cursor lags behind the sync's start. Defaults to 5.
+
+    Returns:
+        dict: Changed rows keyed by asset type, deleted IDs keyed by asset type,
+            whether more pages follow, and the cursor to send on the next call.
+    """
+    started = position.started if position else datetime.utcnow()
+    asset_types = list(ASSET_MODELS)
+    if position:
+        asset_types = asset_types[asset_types.index(position.asset_type):]
+
+    changes = {asset_type: [] for asset_type in ASSET_MODELS}
+    remaining = limit
+    for asset_type in asset_types:
+        model = ASSET_MODELS[asset_type]
+        query = select_assets(model).where(model.user_id == user_id)
+        if since is not None:
+            query = query.where(model.updated_at > since)
+        after = position.last_id if position and asset_type == position.asset_type else 0
+        if after:
+            query = query.where(model.id > after)
+
+        # Serialized while the result is open, so joined rows `to_json` reads are still loaded
+        result = db.session.execute(query.order_by(model.id).limit(remaining + 1)).scalars()
+        assets = [asset.to_json() for asset in result]
+        if len(assets) > remaining:
+            assets = assets[:remaining]
+            changes[asset_type] = assets
+            last_id = assets[-1]['id'] if assets else after
+            return {
+                'changes': changes,
+                'deleted': {asset_type: [] for asset_type in ASSET_MODELS},
+                'has_more': True,
+                'next_cursor': encode_sync_cursor(since, SyncPosition(started, asset_type, last_id)),
+            }
+        changes[asset_type] = assets
+        remaining -= len(assets)
+
+    next_since = started - timedelta(seconds=overlap_seconds)
+    if since is not None and since > next_since:
+        next_since = since
+
+    deleted = {asset_type: [] for asset_type in ASSET_MODELS}
+    if since is not None:
+        query = (
+            select(AssetTombstone.asset_type, AssetTombstone.asset_id)
+            .where(AssetTombstone.user_id == user_id, AssetTombstone.deleted_at > since)
+            .order_by(AssetTombstone.deleted_at, AssetTombstone.id)
+        )
+        for asset_type, asset_id in db.session.execute(query):
+            deleted.setdefault(asset_type, []).append(asset_id)
+
+    return {
+        'changes': changes,
+        'deleted': deleted,
+        'has_more': False,
+        'next_cursor': encode_sync_cursor(next_since),
+    }
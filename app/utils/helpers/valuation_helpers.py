@@ -0,0 +1,232 @@
+'''
+This module defines helper functions for valuing user portfolios in the VASSET Flask application.
+
+Holdings are loaded with column-only queries into NumPy arrays (one array per
+column), so pricing, totals and allocation weights are computed with array
+operations rather than per-row Python loops. This keeps valuation fast both for
+users with tens of thousands of positions and for batch revaluation of every user.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import numpy as np
+from sqlalchemy import select, null, literal
+
+from ...extensions import db
+from ...models import User, Stock, Crypto, RealEstate
+from .fx_helpers import BASE_CURRENCY, get_fx_rates
+
+
+# Position types, stored as small integer codes in `Holdings.kind`.
+POSITION_TYPES = ('stocks', 'cryptos', 'real_estates')
+STOCK, CRYPTO, REAL_ESTATE = range(len(POSITION_TYPES))
+
+
+class Holdings:
+    '''
+    Column-oriented container of priced and unpriced positions.
+
+    Every attribute is a NumPy array of the same length, one entry per position.
+    Real estate is a fixed-value position: its quantity is 1 and its unit price
+    is the stored value, so it never needs a price lookup.
+    '''
+
+    def __init__(self, user_id, kind, asset_id, symbol, quantity, fixed_price):
+        self.user_id = np.asarray(user_id, dtype=np.int64)
+        self.kind = np.asarray(kind, dtype=np.int8)
+        self.asset_id = np.asarray(asset_id, dtype=np.int64)
+        self.symbol = np.asarray(symbol, dtype=object)
+        self.quantity = np.asarray(quantity, dtype=np.float64)
+        self.fixed_price = np.asarray(fixed_price, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.asset_id)
+
+    @classmethod
+    def concat(cls, parts):
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls([], [], [], [], [], [])
+        return cls(*(np.concatenate([getattr(part, name) for part in parts])
+                     for name in ('user_id', 'kind', 'asset_id', 'symbol', 'quantity', 'fixed_price')))
+
+
+def _holdings_from_rows(rows, kind):
+    '''Builds `Holdings` from (user_id, id, symbol, quantity, fixed_price) rows.'''
+    if not rows:
+        return Holdings([], [], [], [], [], [])
+    user_id, asset_id, symbol, quantity, fixed_price = zip(*rows)
+    return Holdings(user_id, np.full(len(rows), kind), asset_id, symbol, quantity,
+                    [np.nan if p is None else p for p in fixed_price])
+
+
+def load_holdings(user_ids=None):
+    """
+    Loads the valuable positions of some or all users into a `Holdings` container.
+
+    Args:
+        user_ids (list, optional): IDs of the users to load. Loads every user when None.
+
+    Returns:
+        Holdings: Stock, crypto and real estate positions.
+    """
+    queries = (
+        (STOCK, Stock, select(Stock.user_id, Stock.id, Stock.symbol, Stock.quantity, null())),
+        (CRYPTO, Crypto, select(Crypto.user_id, Crypto.id, Crypto.symbol, Crypto.amount, null())),
+        (REAL_ESTATE, RealEstate, select(RealEstate.user_id, RealEstate.id, RealEstate.address, literal(1), RealEstate.value)),
+    )
+
+    parts = []
+    for kind, model, query in queries:
+        if user_ids is not None:
+            query = query.where(model.user_id.in_(user_ids))
+        parts.append(_holdings_from_rows(db.session.execute(query).all(), kind))
+
+    return Holdings.concat(parts)
+
+
+def unit_prices(holdings, prices):
+    """
+    Resolves the unit price of every position.
+
+    Symbols are de-duplicated with `np.unique`, so the price snapshot is
+    consulted once per distinct symbol and then broadcast back to positions.
+
+    Args:
+        holdings (Holdings): The positions to price.
+        prices (dict): Price snapshot as `{'stocks': {symbol: price}, 'cryptos': {symbol: price}}`.
+
+    Returns:
+        numpy.ndarray: The unit price of each position, NaN where no price is known.
+    """
+    result = holdings.fixed_price.copy()
+    for kind, type_name in ((STOCK, 'stocks'), (CRYPTO, 'cryptos')):
+        mask = holdings.kind == kind
+        if not mask.any():
+            continue
+        snapshot = {str(k).upper(): v for k, v in (prices.get(type_name) or {}).items()}
+        symbols, inverse = np.unique(np.char.upper(holdings.symbol[mask].astype(str)), return_inverse=True)
+        symbol_prices = np.array([snapshot.get(symbol, np.nan) for symbol in symbols], dtype=np.float64)
+        result[mask] = symbol_prices[inverse]
+
+    return result
+
+
+def value_holdings(holdings, prices):
+    """
+    Values positions and aggregates them per user.
+
+    Args:
+        holdings (Holdings): The positions to value.
+        prices (dict): Price snapshot, see `unit_prices`.
+
+    Returns:
+        dict: Arrays `price`, `value` and `weight` aligned with the positions, plus
+            `user_ids` and `totals` holding the net worth of each distinct user.
+    """
+    price = unit_prices(holdings, prices)
+    value = holdings.quantity * price
+    priced_value = np.nan_to_num(value, nan=0.0)
+
+    user_ids, user_index = np.unique(holdings.user_id, return_inverse=True)
+    totals = np.bincount(user_index, weights=priced_value, minlength=len(user_ids))
+
+    position_totals = totals[user_index] if len(user_ids) else np.zeros(0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = np.where(position_totals > 0, priced_value / position_totals, 0.0)
+
+    return {
+        'price': price,
+        'value': value,
+        'weight': weight,
+        'user_ids': user_ids,
+        'totals': totals,
+    }
+
+
+def _none_if_nan(values):
+    return [None if v != v else v for v in values.tolist()]
+
+
+def portfolio_valuation(user_id, prices, currency=BASE_CURRENCY):
+    """
+    Computes the valuation of a single user's portfolio.
+
+    Args:
+        user_id: The ID of the user whose portfolio is valued.
+        prices (dict): Price snapshot in US dollars, see `unit_prices`.
+        currency (str, optional): Currency to express prices and values in. Defaults to US dollars.
+
+    Returns:
+        dict: Per-position values, the total net worth, allocation weights per
+            position type, the symbols without a price and the currency used.
+    """
+    holdings = load_holdings([user_id])
+    result = value_holdings(holdings, prices)
+    if currency != BASE_CURRENCY:
+        rates = get_fx_rates()
+        for key in ('price', 'value', 'totals'):
+            result[key] = rates.convert(result[key], currency)
+    total = float(result['totals'].sum())
+
+    type_values = np.bincount(holdings.kind, weights=np.nan_to_num(result['value']), minlength=len(POSITION_TYPES))
+    allocation = {
+        type_name: (float(type_values[kind] / total) if total else 0.0)
+        for kind, type_name in enumerate(POSITION_TYPES)
+    }
+
+    positions = [
+        {
+            'type': POSITION_TYPES[kind],
+            'id': asset_id,
+            'symbol': symbol,
+            'quantity': quantity,
+            'price': price,
+            'value': value,
+            'weight': weight,
+        }
+        for kind, asset_id, symbol, quantity, price, value, weight in zip(
+            holdings.kind.tolist(), holdings.asset_id.tolist(), holdings.symbol.tolist(),
+            holdings.quantity.tolist(), _none_if_nan(result['price']),
+            _none_if_nan(result['value']), result['weight'].tolist(),
+        )
+    ]
+
+    unpriced = np.unique(np.char.upper(holdings.symbol[np.isnan(result['price'])].astype(str))).tolist()
+
+    return {
+        'total_value': total,
+        'positions': positions,
+        'allocation': allocation,
+        'unpriced_symbols': unpriced,
+        'currency': currency,
+    }
+
+
+def revalue_all_users(prices, chunk_size=1000, after_user_id=0):
+    """
+    Computes the net worth of every user holding at least one valuable asset.
+
+    Users are processed in ascending ID order in chunks of `chunk_size`, so
+    memory stays bounded however many users the platform has.
+
+    Args:
+        prices (dict): Price snapshot, see `unit_prices`.
+        chunk_size (int, optional): Number of users valued per chunk. Defaults to 1000.
+        after_user_id (int, optional): Only value users with a greater ID. Defaults to 0.
+
+    Yields:
+        tuple: `(user_ids, totals)` NumPy arrays for each chunk.
+    """
+    last_id = after_user_id
+    while True:
+        user_ids = db.session.execute(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+        ).scalars().all()
+        if not user_ids:
+            break
+        last_id = user_ids[-1]
+
+        result = value_holdings(load_holdings(user_ids), prices)
+        yield result['user_ids'], result['totals']
@@ -0,0 +1,96 @@
+'''
+This module defines helper functions for tracking per-user data versions in the VASSET Flask application.
+
+Every user has a monotonic `data_version` counter that is bumped in the same
+transaction as any change to their assets, profile, address or transactions.
+Read endpoints expose it as a strong ETag so unchanged data can be answered
+with `304 Not Modified` after a single primary-key lookup.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import zlib
+from sqlalchemy import event, select
+
+from ...extensions import db
+from ...models import (User, Profile, Address, Identification, NextOfKin, Transactions, PortfolioSummary,
+                       Stock, RealEstate, Business, Crypto, NFT, SocialMedia, Youtube)
+
+
+# Models whose rows belong to a user, mapped to the attribute holding the user's ID.
+VERSIONED_MODELS = {
+    User: 'id',
+    Profile: 'vasset_user_id',
+    Address: 'vasset_user_id',
+    Identification: 'vasset_user_id',
+    NextOfKin: 'vasset_user_id',
+    Transactions: 'user_id',
+    PortfolioSummary: 'user_id',
+    Stock: 'user_id',
+    RealEstate: 'user_id',
+    Business: 'user_id',
+    Crypto: 'user_id',
+    NFT: 'user_id',
+    SocialMedia: 'user_id',
+    Youtube: 'user_id',
+}
+
+
+def bump_data_version(user_ids, connection=None):
+    """
+    Increments the data version of the given users.
+
+    Call it for writes that bypass the ORM unit of work, such as bulk
+    `insert()`/`update()`/`delete()` statements. ORM changes are tracked automatically.
+
+    Args:
+        user_ids (iterable): IDs of the users whose data changed.
+        connection (optional): Connection to execute on. Defaults to the current session.
+    """
+    user_ids = {int(user_id) for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+
+    statement = (
+        User.__table__.update()
+        .where(User.__table__.c.id.in_(user_ids))
+        .values(data_version=User.__table__.c.data_version + 1)
+    )
+    (connection or db.session).execute(statement)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_versions_after_flush(session, flush_context):
+    user_ids = set()
+    for obj in list(session.new) + list(session.deleted) + [o for o in session.dirty if session.is_modified(o)]:
+        attribute = VERSIONED_MODELS.get(type(obj))
+        if attribute:
+            user_ids.add(getattr(obj, attribute))
+
+    bump_data_version(user_ids, connection=session.connection())
+
+
+def get_data_version(user_id):
+    """
+    Returns the current data version of a user, or None if the user does not exist.
+    """
+    return db.session.execute(select(User.data_version).where(User.id == user_id)).scalar()
+
+
+def data_version_etag(user_id, version, path, variant=None):
+    """
+    Builds the strong ETag value for a user's representation of a resource.
+
+    Args:
+        user_id: The ID of the user the response is for.
+        version (int): The user's current data version.
+        path (str): The request path including its query string.
+        variant (str, optional): Version of other inputs the representation
+            depends on, such as the FX rates it was converted with.
+
+    Returns:
+        str: The ETag value, without quotes.
+    """
+    etag = f'{user_id}-{version}-{zlib.crc32(path.encode()):08x}'
+    return f'{etag}-{variant}' if variant else etag
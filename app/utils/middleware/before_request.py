@@ -1,7 +1,8 @@
 import requests, socket
 from flask import Flask, request, abort, current_app
 
-from ..helpers import check_emerge, console_log
+from ..helpers import check_emerge, console_log, log_exception
+from ..helpers.http_helpers import get_http_client
 from ...utils import error_response
 
 
@@ -25,4 +26,8 @@ def ping_url():
         # Otherwise, fall back to using the socket method
         url = f"http://{socket.gethostbyname(socket.gethostname())}:5000"
     
-    requests.post('http://http://127.0.0.1:4001/receive-url', json={'url': url})
\ No newline at end of file
+    try:
+        get_http_client('ping').post(current_app.config.get('PING_RECEIVER_URL'), json={'url': url})
+    except requests.RequestException as e:
+        # The receiver is optional; never fail the request being served because of it
+        log_exception('PING URL FAILED', e)
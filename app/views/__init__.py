@@ -1,4 +1,7 @@
 from .auth import AuthController
 from .profile import ProfileController
 from .assets import AssetsController
-from .transactions import TransactionController
\ No newline at end of file
+from .transactions import TransactionController
+from .portfolio import PortfolioController
+from .prices import PriceController
+from .analytics import AnalyticsController
\ No newline at end of file
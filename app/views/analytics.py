@@ -0,0 +1,57 @@
+'''
+This module defines the controller methods for admin analytics in the Vasset Global Flask application.
+
+It includes methods for reading platform-wide holdings rollups: stock and crypto holders and totals
+per symbol, and the distribution of real-estate values, and for reading the hit ratio and latency
+of the read-through caches.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+
+from sqlalchemy.exc import DatabaseError
+
+from app.utils.helpers.analytics_helpers import get_analytics
+from app.utils.helpers.cache_helpers import cache_stats
+from app.utils.response import error_response, success_response
+
+class AnalyticsController:
+
+    @staticmethod
+    def get_holdings_analytics(kind):
+        """
+        Get a platform-wide holdings rollup.
+        
+        Results are cached; 'computed_at' tells when they were aggregated and
+        'stale' is true while an expired result is being refreshed in the background.
+        
+        - 'kind': 'stocks', 'cryptos' or 'real_estates'.
+        
+        Returns:
+            - 200: The rollup.
+            - 403: The user is not an admin.
+        """
+        try:
+            analytics = get_analytics(kind)
+            return success_response('Analytics fetched successfully', 200, {'analytics': analytics})
+        except DatabaseError as e:
+            return error_response('Database error', 500, {'error': str(e.orig)})
+        except Exception as e:
+            return error_response('An unexpected error occurred', 500, {'error': str(e)})
+
+    @staticmethod
+    def get_cache_stats():
+        """
+        Get hit, miss and error counts, hit ratio and latency histograms of each read-through cache.
+        
+        Counters are per process and start at zero when the worker starts.
+        
+        Returns:
+            - 200: Statistics keyed by cache name, with the backend each is using.
+            - 403: The user is not an admin.
+        """
+        try:
+            return success_response('Cache statistics fetched successfully', 200, {'caches': cache_stats()})
+        except Exception as e:
+            return error_response('An unexpected error occurred', 500, {'error': str(e)})
@@ -10,7 +10,7 @@ It includes methods for checking username, checking email, signing up, resending
 
 import logging
 from datetime import datetime, timedelta
-from flask import request, jsonify, current_app
+from flask import request, jsonify, current_app, Response, stream_with_context, g
 from sqlalchemy.exc import (IntegrityError, DataError, DatabaseError, InvalidRequestError)
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.exceptions import UnsupportedMediaType
@@ -34,10 +34,20 @@ from app.extensions import db
 from app.models import User, Stock, RealEstate, Business, Crypto, NFT, SocialMedia, Youtube
 from app.utils.helpers.auth_helpers import generate_six_digit_code, save_pwd_reset_token, send_2fa_code
 from app.utils.helpers.email_helpers import send_code_to_email, send_other_emails
-from app.utils.helpers.basic_helpers import log_exception, console_log
+from app.utils.helpers.basic_helpers import log_exception, console_log, keyset_paginate, page_limit, parse_fields, project_query
 from app.utils.helpers.user_helpers import get_vasset_user, is_email_exist, is_user_exist
 from app.utils.helpers.media_helpers import save_media
+from app.utils.helpers.asset_helpers import ASSET_MODELS, LIST_FIELDS, validate_asset_update
+from app.utils.helpers.asset_cache_helpers import cached_portfolio
+from app.utils.helpers.import_helpers import IMPORT_FORMATS, import_assets
+from app.utils.helpers.portfolio_helpers import record_assets_added
+from app.utils.helpers.sync_helpers import asset_changes, decode_sync_cursor
+from app.utils.helpers.asset_index_helpers import list_user_assets
+from app.utils.helpers.search_helpers import search_assets
+from app.utils.helpers.bulk_helpers import validate_batch, create_assets, parse_asset_ids, update_assets, delete_assets
+from app.utils.helpers.export_helpers import EXPORT_FORMATS, iter_user_assets, export_header, generate_ndjson, generate_csv
 from app.utils.response import error_response, success_response
+from app.exceptions import InvalidCursorError, InvalidFieldsError
 
 class AssetsController:
 
@@ -50,6 +60,7 @@ class AssetsController:
             quantity = int(data.get('quantity'))
             new_stock = Stock(symbol=symbol, quantity=quantity, user_id=user_id)
             db.session.add(new_stock)
+            record_assets_added(user_id, 'stocks', [new_stock])
             db.session.commit()
             return success_response('Stock added successfully', 201)
         except Exception as e:
@@ -63,9 +74,12 @@ class AssetsController:
             if not user_id:
                 return error_response('User identity not found', 401)
 
-            stocks = Stock.query.filter_by(user_id=user_id).all()
-            stocks_list = [{'id': stock.id, 'symbol': stock.symbol, 'quantity': stock.quantity} for stock in stocks]
-            return success_response(stocks_list if stocks_list else [], 200)
+            fields = parse_fields(request, LIST_FIELDS['stocks'])
+            stocks, next_cursor = keyset_paginate(project_query(Stock, fields).filter(Stock.user_id == user_id), Stock, request)
+            stocks_list = [{field: getattr(stock, field) for field in fields} for stock in stocks]
+            return success_response(stocks_list if stocks_list else [], 200, {'next_cursor': next_cursor})
+        except (InvalidCursorError, InvalidFieldsError) as e:
+            return error_response(e.message, e.status_code)
         except IntegrityError as e:
             return error_response('Integrity error', 400, str(e.orig))
         except DataError as e:
@@ -86,6 +100,7 @@ class AssetsController:
             value = float(data.get('value'))
             new_real_estate = RealEstate(address=address, value=value, user_id=user_id)
             db.session.add(new_real_estate)
+            record_assets_added(user_id, 'real_estates', [new_real_estate])
             db.session.commit()
             return success_response('Real estate added successfully', 201)
         except Exception as e:
@@ -99,9 +114,12 @@ class AssetsController:
             if not user_id:
                 return error_response('User identity not found', 401)
 
-            real_estates = RealEstate.query.filter_by(user_id=user_id).all()
-            real_estates_list = [{'id': real_estate.id, 'address': real_estate.address, 'value': real_estate.value} for real_estate in real_estates]
-            return success_response(real_estates_list if real_estates_list else [], 200)
+            fields = parse_fields(request, LIST_FIELDS['real_estates'])
+            real_estates, next_cursor = keyset_paginate(project_query(RealEstate, fields).filter(RealEstate.user_id == user_id), RealEstate, request)
+            real_estates_list = [{field: getattr(real_estate, field) for field in fields} for real_estate in real_estates]
+            return success_response(real_estates_list if real_estates_list else [], 200, {'next_cursor': next_cursor})
+        except (InvalidCursorError, InvalidFieldsError) as e:
+            return error_response(e.message, e.status_code)
         except IntegrityError as e:
             return error_response('Integrity error', 400, str(e.orig))
         except DataError as e:
@@ -122,6 +140,7 @@ class AssetsController:
             description = data.get('description', '')
             new_business = Business(name=name, description=description, user_id=user_id)
             db.session.add(new_business)
+            record_assets_added(user_id, 'businesses', [new_business])
             db.session.commit()
             return success_response('Business added successfully', 201)
         except Exception as e:
@@ -135,9 +154,12 @@ class AssetsController:
             if not user_id:
                 return error_response('User identity not found', 401)
 
-            businesses = Business.query.filter_by(user_id=user_id).all()
-            businesses_list = [{'id': business.id, 'name': business.name, 'description': business.description} for business in businesses]
-            return success_response(businesses_list if businesses_list else [], 200)
+            fields = parse_fields(request, LIST_FIELDS['businesses'])
+            businesses, next_cursor = keyset_paginate(project_query(Business, fields).filter(Business.user_id == user_id), Business, request)
+            businesses_list = [{field: getattr(business, field) for field in fields} for business in businesses]
+            return success_response(businesses_list if businesses_list else [], 200, {'next_cursor': next_cursor})
+        except (InvalidCursorError, InvalidFieldsError) as e:
+            return error_response(e.message, e.status_code)
         except IntegrityError as e:
             return error_response('Integrity error', 400, str(e.orig))
         except DataError as e:
@@ -159,6 +181,7 @@ class AssetsController:
         try:
             new_crypto = Crypto(symbol=symbol, amount=amount, user_id=user_id)
             db.session.add(new_crypto)
+            record_assets_added(user_id, 'cryptos', [new_crypto])
             if file:
                 result = cloudinary.uploader.upload(file)
                 new_crypto.img = result['secure_url']
@@ -175,9 +198,12 @@ class AssetsController:
             if not user_id:
                 return error_response('User identity not found', 401)
 
-            cryptos = Crypto.query.filter_by(user_id=user_id).all()
-            cryptos_list = [{'id': crypto.id, 'symbol': crypto.symbol, 'amount': crypto.amount, 'img': crypto.img} for crypto in cryptos]
-            return success_response(cryptos_list if cryptos_list else [], 200)
+            fields = parse_fields(request, LIST_FIELDS['cryptos'])
+            cryptos, next_cursor = keyset_paginate(project_query(Crypto, fields).filter(Crypto.user_id == user_id), Crypto, request)
+            cryptos_list = [{field: getattr(crypto, field) for field in fields} for crypto in cryptos]
+            return success_response(cryptos_list if cryptos_list else [], 200, {'next_cursor': next_cursor})
+        except (InvalidCursorError, InvalidFieldsError) as e:
+            return error_response(e.message, e.status_code)
         except IntegrityError as e:
             return error_response('Integrity error', 400, str(e.orig))
         except DataError as e:
@@ -206,6 +232,7 @@ class AssetsController:
 
             new_nft = NFT(name=name, uri=uri, user_id=user_id)
             db.session.add(new_nft)
+            record_assets_added(user_id, 'nfts', [new_nft])
             db.session.commit()
             return success_response('NFT added successfully', 201)
 
@@ -220,9 +247,12 @@ class AssetsController:
             if not user_id:
                 return error_response('User identity not found', 401)
 
-            nfts = NFT.query.filter_by(user_id=user_id).all()
-            nfts_list = [{'id': nft.id, 'name': nft.name, 'uri': nft.uri} for nft in nfts]
-            return success_response(nfts_list if nfts_list else [], 200)
+            fields = parse_fields(request, LIST_FIELDS['nfts'])
+            nfts, next_cursor = keyset_paginate(project_query(NFT, fields).filter(NFT.user_id == user_id), NFT, request)
+            nfts_list = [{field: getattr(nft, field) for field in fields} for nft in nfts]
+            return success_response(nfts_list if nfts_list else [], 200, {'next_cursor': next_cursor})
+        except (InvalidCursorError, InvalidFieldsError) as e:
+            return error_response(e.message, e.status_code)
         except IntegrityError as e:
             return error_response('Integrity error', 400, str(e.orig))
         except DataError as e:
@@ -246,6 +276,7 @@ class AssetsController:
             new_socialmedia = SocialMedia(platform=platform, username=username, user_id=user_id, password=password, description=description)
 
             db.session.add(new_socialmedia)
+            record_assets_added(user_id, 'social_media', [new_socialmedia])
             db.session.commit()
             return success_response('Social media added successfully', 201)
 
@@ -260,9 +291,12 @@ class AssetsController:
             if not user_id:
                 return error_response('User identity not found', 401)
 
-            socialmedia = SocialMedia.query.filter_by(user_id=user_id).all()
-            socialmedia_list = [{'id': social.id, 'platform': social.platform, 'username': social.username} for social in socialmedia]
-            return success_response(socialmedia_list if socialmedia_list else [], 200)
+            fields = parse_fields(request, LIST_FIELDS['social_media'])
+            socialmedia, next_cursor = keyset_paginate(project_query(SocialMedia, fields).filter(SocialMedia.user_id == user_id), SocialMedia, request)
+            socialmedia_list = [{field: getattr(social, field) for field in fields} for social in socialmedia]
+            return success_response(socialmedia_list if socialmedia_list else [], 200, {'next_cursor': next_cursor})
+        except (InvalidCursorError, InvalidFieldsError) as e:
+            return error_response(e.message, e.status_code)
         except IntegrityError as e:
             return error_response('Integrity error', 400, str(e.orig))
         except DataError as e:
@@ -285,6 +319,7 @@ class AssetsController:
             password = data.get('password')
             new_youtube = Youtube(email=email, password=password, user_id=user_id)
             db.session.add(new_youtube)
+            record_assets_added(user_id, 'youtube', [new_youtube])
             db.session.commit()
             return success_response('Youtube channel added successfully', 201)
         
@@ -300,9 +335,12 @@ class AssetsController:
             if not user_id:
                 return error_response('User identity not found', 401)
 
-            youtube = Youtube.query.filter_by(user_id=user_id).all()
-            youtube_list = [{'id': yt.id, 'email': yt.email, 'password': yt.password} for yt in youtube]
-            return success_response(youtube_list if youtube_list else [], 200)
+            fields = parse_fields(request, LIST_FIELDS['youtube'])
+            youtube, next_cursor = keyset_paginate(project_query(Youtube, fields).filter(Youtube.user_id == user_id), Youtube, request)
+            youtube_list = [{field: getattr(yt, field) for field in fields} for yt in youtube]
+            return success_response(youtube_list if youtube_list else [], 200, {'next_cursor': next_cursor})
+        except (InvalidCursorError, InvalidFieldsError) as e:
+            return error_response(e.message, e.status_code)
         except IntegrityError as e:
             return error_response('Integrity error', 400, str(e.orig))
         except DataError as e:
@@ -322,23 +360,7 @@ class AssetsController:
             if not user_id:
                 return error_response('User identity not found', 401)
 
-            stocks = Stock.query.filter_by(user_id=user_id).all()
-            real_estates = RealEstate.query.filter_by(user_id=user_id).all()
-            businesses = Business.query.filter_by(user_id=user_id).all()
-            cryptos = Crypto.query.filter_by(user_id=user_id).all()
-            nfts = NFT.query.filter_by(user_id=user_id).all()
-            socialmedia = SocialMedia.query.filter_by(user_id=user_id).all()
-            youtube = Youtube.query.filter_by(user_id=user_id).all()
-
-            assets = {
-                'stocks': [{'id': stock.id, 'symbol': stock.symbol, 'quantity': stock.quantity} for stock in stocks],
-                'real_estates': [{'id': real_estate.id, 'address': real_estate.address, 'value': real_estate.value} for real_estate in real_estates],
-                'businesses': [{'id': business.id, 'name': business.name, 'description': business.description} for business in businesses],
-                'cryptos': [{'id': crypto.id, 'symbol': crypto.symbol, 'amount': crypto.amount} for crypto in cryptos],
-                'nfts': [{'id': nft.id, 'name': nft.name, 'uri': nft.uri} for nft in nfts],
-                'social_media': [{'id': social.id, 'platform': social.platform, 'username': social.username} for social in socialmedia],
-                'youtube': [{'id': yt.id, 'email': yt.email, 'password': yt.password} for yt in youtube]
-            }
+            assets = cached_portfolio(user_id, g.get('data_version'))
             return success_response(assets, 200)
         except IntegrityError as e:
             return error_response('Integrity error', 400, str(e.orig))
@@ -350,3 +372,347 @@ class AssetsController:
             return error_response('Database error', 500, str(e.orig))
         except Exception as e:
             return error_response('An unexpected error occurred', 500, str(e))
+
+    @staticmethod
+    def import_assets(asset_type):
+        """
+        Bulk import assets of one type from a CSV or NDJSON upload.
+        
+        The body is either the raw file or a multipart upload under the 'file' key.
+        The format comes from the 'format' query parameter, or else from the content type.
+        CSV uploads need a header row naming the asset's columns. Rows are streamed,
+        validated and inserted in chunks, one transaction per chunk.
+        
+        - 'asset_type': One of stocks, real_estates, businesses, cryptos, nfts, social_media or youtube.
+        
+        Returns:
+            - 200: Import report with imported and failed counts and per-row errors.
+            - 400: Unknown asset type or format.
+            - 401: User identity not found.
+        """
+        try:
+            user_id = get_jwt_identity()
+            if not user_id:
+                return error_response('User identity not found', 401)
+
+            model = ASSET_MODELS.get(asset_type)
+            if model is None:
+                return error_response(f'Unknown asset type: {asset_type}', 400)
+
+            fmt = request.args.get('format')
+            if not fmt:
+                content_type = request.mimetype or ''
+                fmt = 'csv' if 'csv' in content_type else 'ndjson' if ('ndjson' in content_type or 'jsonl' in content_type) else None
+            if fmt not in IMPORT_FORMATS:
+                return error_response(f"Format must be one of: {', '.join(IMPORT_FORMATS)}", 400)
+
+            upload = request.files.get('file')
+            stream = upload.stream if upload else request.stream
+
+            report = import_assets(model, user_id, stream, fmt,
+                                   chunk_size=int(current_app.config.get('IMPORT_CHUNK_SIZE', Config.IMPORT_CHUNK_SIZE)))
+            return success_response('Import completed', 200, {'report': report})
+        except Exception as e:
+            db.session.rollback()
+            return error_response('An unexpected error occurred', 500, {'error': str(e)})
+
+    @staticmethod
+    def export_assets():
+        """
+        Stream every asset of the current user as NDJSON or CSV.
+        
+        Query parameters:
+        - 'format': 'ndjson' (default) or 'csv'.
+        - 'type': Optional comma separated asset types to export. Defaults to all of them.
+        
+        Each row uses the asset model's to_json shape plus a 'type' field.
+        
+        Returns:
+            - 200: Streamed export file.
+            - 400: Unknown asset type or format.
+            - 401: User identity not found.
+        """
+        user_id = get_jwt_identity()
+        if not user_id:
+            return error_response('User identity not found', 401)
+
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            return error_response(f"Format must be one of: {', '.join(EXPORT_FORMATS)}", 400)
+
+        asset_types = [t.strip() for t in request.args.get('type', '').split(',') if t.strip()] or list(ASSET_MODELS)
+        unknown = [t for t in asset_types if t not in ASSET_MODELS]
+        if unknown:
+            return error_response(f"Unknown asset type: {', '.join(unknown)}", 400)
+
+        rows = iter_user_assets(user_id, asset_types,
+                                batch_size=int(current_app.config.get('EXPORT_BATCH_SIZE', Config.EXPORT_BATCH_SIZE)))
+        body = generate_csv(rows, export_header(asset_types)) if fmt == 'csv' else generate_ndjson(rows)
+
+        return Response(
+            stream_with_context(body),
+            mimetype=EXPORT_FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename=assets-{user_id}.{fmt}'}
+        )
+
+    @staticmethod
+    def get_asset_changes():
+        """
+        Get the current user's assets created, updated or deleted since a sync cursor.
+        
+        Query parameters:
+        - 'since': Cursor returned by the previous call. Omit it for a full sync.
+        - 'limit': Maximum number of changed assets per page. Defaults to MAX_ITEMS_PER_PAGE.
+        
+        Changed rows use the asset model's to_json shape. Deleted assets are
+        listed by ID under 'deleted'. While 'has_more' is true, call again with
+        'next_cursor' to get the next page; keep the cursor of the last page for
+        the next sync. Apply changes as upserts, since rows near the cursor
+        boundary can be returned twice.
+        
+        Returns:
+            - 200: Changes, deletions, 'has_more' and 'next_cursor'.
+            - 400: Invalid cursor or limit.
+            - 401: User identity not found.
+        """
+        try:
+            user_id = get_jwt_identity()
+            if not user_id:
+                return error_response('User identity not found', 401)
+
+            since = request.args.get('since')
+            since, position = decode_sync_cursor(since) if since else (None, None)
+            limit = page_limit(request.args.get('limit'), current_app.config.get('MAX_ITEMS_PER_PAGE', Config.MAX_ITEMS_PER_PAGE))
+
+            changes = asset_changes(user_id, since, position, limit=limit,
+                                    overlap_seconds=int(current_app.config.get('SYNC_OVERLAP_SECONDS', Config.SYNC_OVERLAP_SECONDS)))
+            return success_response('Asset changes fetched successfully', 200, changes)
+        except InvalidCursorError as e:
+            return error_response(e.message, e.status_code)
+        except DatabaseError as e:
+            return error_response('Database error', 500, {'error': str(e.orig)})
+        except Exception as e:
+            return error_response('An unexpected error occurred', 500, {'error': str(e)})
+
+    @staticmethod
+    def get_recent_assets():
+        """
+        List the current user's assets of every type in one timeline, newest first.
+        
+        Query parameters:
+        - 'limit', 'cursor': Keyset pagination, as on the per-type list endpoints.
+        - 'type': Optional comma separated asset types to include. Defaults to all of them.
+        - 'order': 'desc' (default) or 'asc' by creation time.
+        
+        Each item holds the asset 'type' and the 'asset' in its model's to_json shape.
+        
+        Returns:
+            - 200: Assets and 'next_cursor'.
+            - 400: Unknown asset type, order or invalid cursor.
+            - 401: User identity not found.
+        """
+        try:
+            user_id = get_jwt_identity()
+            if not user_id:
+                return error_response('User identity not found', 401)
+
+            asset_types = [t.strip() for t in request.args.get('type', '').split(',') if t.strip()]
+            unknown = [t for t in asset_types if t not in ASSET_MODELS]
+            if unknown:
+                return error_response(f"Unknown asset type: {', '.join(unknown)}", 400)
+
+            order = request.args.get('order', 'desc')
+            if order not in ('asc', 'desc'):
+                return error_response("Order must be 'asc' or 'desc'", 400)
+
+            assets, next_cursor = list_user_assets(user_id, request, asset_types, descending=(order == 'desc'))
+            return success_response('Assets fetched successfully', 200, {'assets': assets, 'next_cursor': next_cursor})
+        except InvalidCursorError as e:
+            return error_response(e.message, e.status_code)
+        except DatabaseError as e:
+            return error_response('Database error', 500, {'error': str(e.orig)})
+        except Exception as e:
+            return error_response('An unexpected error occurred', 500, {'error': str(e)})
+
+    @staticmethod
+    def search_assets():
+        """
+        Search the current user's assets of every type.
+        
+        Matches stock and crypto symbols, business names and descriptions, NFT names,
+        real estate addresses and social media platforms and usernames.
+        
+        Query parameters:
+        - 'q': The search query. Each word matches the start of a word in the asset.
+        - 'page', 'limit': Page number (from 1) and results per page.
+        
+        Returns:
+            - 200: Ranked results with 'page' and 'has_next'.
+            - 400: Missing query or invalid page.
+            - 401: User identity not found.
+        """
+        try:
+            user_id = get_jwt_identity()
+            if not user_id:
+                return error_response('User identity not found', 401)
+
+            query = request.args.get('q', '').strip()
+            if not query:
+                return error_response('Search query is required', 400)
+
+            page = request.args.get('page', 1, type=int)
+            limit = request.args.get('limit', type=int) or int(current_app.config.get('ITEMS_PER_PAGE', Config.ITEMS_PER_PAGE))
+            limit = min(limit, int(current_app.config.get('MAX_ITEMS_PER_PAGE', Config.MAX_ITEMS_PER_PAGE)))
+            if page < 1 or limit < 1:
+                return error_response('Page and limit must be positive integers', 400)
+
+            results, has_next = search_assets(user_id, query, page, limit)
+            return success_response('Search completed', 200, {'results': results, 'page': page, 'has_next': has_next})
+        except DatabaseError as e:
+            return error_response('Database error', 500, {'error': str(e.orig)})
+        except Exception as e:
+            return error_response('An unexpected error occurred', 500, {'error': str(e)})
+
+    @staticmethod
+    def add_assets_batch():
+        """
+        Create assets of mixed types in one request and one transaction.
+        
+        Expects JSON: {'assets': [{'type': 'stocks', 'symbol': 'AAPL', 'quantity': 3}, ...]}
+        Each item carries its asset type under 'type' and the asset's fields beside it.
+        Every item is validated before anything is written; if any item is invalid
+        nothing is saved.
+        
+        Returns:
+            - 201: The created IDs, one entry per item in request order.
+            - 400: Invalid payload, with per-item errors.
+            - 401: User identity not found.
+            - 413: More items than the batch limit.
+        """
+        try:
+            user_id = get_jwt_identity()
+            if not user_id:
+                return error_response('User identity not found', 401)
+
+            data = request.get_json(silent=True) or {}
+            items = data.get('assets')
+            if not isinstance(items, list) or not items:
+                return error_response("'assets' must be a non-empty list", 400)
+
+            max_items = int(current_app.config.get('MAX_BATCH_SIZE', Config.MAX_BATCH_SIZE))
+            if len(items) > max_items:
+                return error_response(f'A batch can hold at most {max_items} assets', 413)
+
+            validated, errors = validate_batch(items)
+            if errors:
+                return error_response('Some assets are invalid; nothing was saved', 400, {'errors': errors})
+
+            created = create_assets(user_id, validated)
+            return success_response('Assets added successfully', 201, {'assets': created})
+        except IntegrityError as e:
+            db.session.rollback()
+            return error_response('Integrity error', 400, {'error': str(e.orig)})
+        except DataError as e:
+            db.session.rollback()
+            return error_response('Data error', 400, {'error': str(e.orig)})
+        except DatabaseError as e:
+            db.session.rollback()
+            return error_response('Database error', 500, {'error': str(e.orig)})
+        except Exception as e:
+            db.session.rollback()
+            return error_response('An unexpected error occurred', 500, {'error': str(e)})
+
+    @staticmethod
+    def bulk_update_assets(asset_type):
+        """
+        Set the same fields on many of the current user's assets of one type.
+        
+        Expects JSON: {'ids': [1, 2, 3], 'values': {'quantity': 10}}
+        Runs a single UPDATE scoped to the user; IDs the user does not own are skipped.
+        
+        - 'asset_type': One of stocks, real_estates, businesses, cryptos, nfts, social_media or youtube.
+        
+        Returns:
+            - 200: The number and IDs of updated assets.
+            - 400: Unknown asset type, invalid IDs or invalid values.
+            - 401: User identity not found.
+            - 413: More IDs than the batch limit.
+        """
+        try:
+            user_id = get_jwt_identity()
+            if not user_id:
+                return error_response('User identity not found', 401)
+
+            model = ASSET_MODELS.get(asset_type)
+            if model is None:
+                return error_response(f'Unknown asset type: {asset_type}', 400)
+
+            data = request.get_json(silent=True) or {}
+            asset_ids = parse_asset_ids(data.get('ids'))
+            if asset_ids is None:
+                return error_response("'ids' must be a non-empty list of asset IDs", 400)
+
+            max_items = int(current_app.config.get('MAX_BATCH_SIZE', Config.MAX_BATCH_SIZE))
+            if len(asset_ids) > max_items:
+                return error_response(f'At most {max_items} assets can be updated at once', 413)
+
+            values, errors = validate_asset_update(model, data.get('values'))
+            if errors:
+                return error_response('Invalid values', 400, {'errors': errors})
+
+            updated = update_assets(user_id, asset_type, asset_ids, values)
+            return success_response('Assets updated successfully', 200, {'updated': len(updated), 'ids': updated})
+        except IntegrityError as e:
+            db.session.rollback()
+            return error_response('Integrity error', 400, {'error': str(e.orig)})
+        except DataError as e:
+            db.session.rollback()
+            return error_response('Data error', 400, {'error': str(e.orig)})
+        except DatabaseError as e:
+            db.session.rollback()
+            return error_response('Database error', 500, {'error': str(e.orig)})
+        except Exception as e:
+            db.session.rollback()
+            return error_response('An unexpected error occurred', 500, {'error': str(e)})
+
+    @staticmethod
+    def bulk_delete_assets(asset_type):
+        """
+        Delete many of the current user's assets of one type.
+        
+        Takes the IDs as JSON {'ids': [1, 2, 3]} or as an 'ids' query parameter (ids=1,2,3).
+        Runs a single DELETE scoped to the user; IDs the user does not own are skipped.
+        
+        - 'asset_type': One of stocks, real_estates, businesses, cryptos, nfts, social_media or youtube.
+        
+        Returns:
+            - 200: The number and IDs of deleted assets.
+            - 400: Unknown asset type or invalid IDs.
+            - 401: User identity not found.
+            - 413: More IDs than the batch limit.
+        """
+        try:
+            user_id = get_jwt_identity()
+            if not user_id:
+                return error_response('User identity not found', 401)
+
+            if asset_type not in ASSET_MODELS:
+                return error_response(f'Unknown asset type: {asset_type}', 400)
+
+            data = request.get_json(silent=True) or {}
+            asset_ids = parse_asset_ids(data.get('ids', request.args.get('ids')))
+            if asset_ids is None:
+                return error_response("'ids' must be a non-empty list of asset IDs", 400)
+
+            max_items = int(current_app.config.get('MAX_BATCH_SIZE', Config.MAX_BATCH_SIZE))
+            if len(asset_ids) > max_items:
+                return error_response(f'At most {max_items} assets can be deleted at once', 413)
+
+            deleted = delete_assets(user_id, asset_type, asset_ids)
+            return success_response('Assets deleted successfully', 200, {'deleted': len(deleted), 'ids': deleted})
+        except DatabaseError as e:
+            db.session.rollback()
+            return error_response('Database error', 500, {'error': str(e.orig)})
+        except Exception as e:
+            db.session.rollback()
+            return error_response('An unexpected error occurred', 500, {'error': str(e)})
@@ -0,0 +1,131 @@
+'''
+This module defines the controller methods for portfolio operations in the Vasset Global Flask application.
+
+It includes methods for valuing a user's holdings against a price snapshot, reading the portfolio summary
+and reading the daily net-worth history.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+
+from datetime import date
+
+from flask import request
+from sqlalchemy.exc import (IntegrityError, DataError, DatabaseError, InvalidRequestError)
+from flask_jwt_extended import get_jwt_identity
+
+from app.extensions import db
+from app.models import PortfolioSummary
+from app.utils.helpers.valuation_helpers import portfolio_valuation
+from app.utils.helpers.net_worth_helpers import net_worth_history
+from app.utils.helpers.fx_helpers import user_currency, to_user_currency
+from app.utils.response import error_response, success_response
+
+class PortfolioController:
+
+    @staticmethod
+    def get_portfolio_value():
+        """
+        Value the current user's stock, crypto and real estate holdings.
+        
+        Accepts an optional JSON body with a price snapshot:
+        {'prices': {'stocks': {'AAPL': 190.5}, 'cryptos': {'BTC': 64000}}}
+        
+        Prices are in US dollars. Real estate is valued at its stored value.
+        Holdings without a price are returned with a null value and listed in
+        'unpriced_symbols'. Prices and values are converted into the currency
+        of the user's profile, returned as 'currency'.
+        
+        Returns:
+            - 200: Portfolio valuation.
+            - 400: Invalid price snapshot.
+            - 401: User identity not found.
+        """
+        try:
+            user_id = get_jwt_identity()
+            if not user_id:
+                return error_response('User identity not found', 401)
+
+            data = request.get_json(silent=True) or {}
+            prices = data.get('prices') or {}
+            if not isinstance(prices, dict) or not all(isinstance(v, dict) for v in prices.values()):
+                return error_response('prices must map asset types to {symbol: price} objects', 400)
+
+            valuation = portfolio_valuation(user_id, prices, currency=user_currency(user_id))
+            return success_response('Portfolio valued successfully', 200, {'portfolio': valuation})
+        except (TypeError, ValueError) as e:
+            return error_response('Invalid price snapshot', 400, {'error': str(e)})
+        except IntegrityError as e:
+            return error_response('Integrity error', 400, {'error': str(e.orig)})
+        except DataError as e:
+            return error_response('Data error', 400, {'error': str(e.orig)})
+        except InvalidRequestError as e:
+            return error_response('Invalid request', 400, {'error': str(e.orig)})
+        except DatabaseError as e:
+            return error_response('Database error', 500, {'error': str(e.orig)})
+        except Exception as e:
+            return error_response('An unexpected error occurred', 500, {'error': str(e)})
+
+    @staticmethod
+    def get_portfolio_summary():
+        """
+        Get the current user's asset counts and totals from the portfolio summary.
+        
+        Reads a single portfolio_summary row by primary key instead of scanning the asset tables.
+        The real estate value is converted into the currency of the user's profile, returned
+        as 'currency'; crypto amounts are coin quantities and are returned as stored.
+        
+        Returns:
+            - 200: Portfolio summary.
+            - 401: User identity not found.
+        """
+        try:
+            user_id = get_jwt_identity()
+            if not user_id:
+                return error_response('User identity not found', 401)
+
+            summary = db.session.get(PortfolioSummary, user_id) or PortfolioSummary(user_id=user_id)
+            summary = summary.to_json()
+            currency, (summary['real_estate_value'],) = to_user_currency(user_id, [summary['real_estate_value']])
+            summary['currency'] = currency
+            return success_response('Portfolio summary fetched successfully', 200, {'summary': summary})
+        except DatabaseError as e:
+            return error_response('Database error', 500, {'error': str(e.orig)})
+        except Exception as e:
+            return error_response('An unexpected error occurred', 500, {'error': str(e)})
+
+    @staticmethod
+    def get_portfolio_history():
+        """
+        Get the current user's daily net-worth snapshots, oldest first,
+        in the currency of the user's profile.
+        
+        Query parameters:
+            - start, end: Optional ISO dates (YYYY-MM-DD), both inclusive.
+        
+        Returns:
+            - 200: Net-worth history.
+            - 400: Invalid date.
+            - 401: User identity not found.
+        """
+        try:
+            user_id = get_jwt_identity()
+            if not user_id:
+                return error_response('User identity not found', 401)
+
+            try:
+                start = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+                end = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+            except ValueError:
+                return error_response('start and end must be dates in YYYY-MM-DD format', 400)
+
+            history = [snapshot.to_json() for snapshot in net_worth_history(user_id, start, end)]
+            currency, values = to_user_currency(user_id, [entry['value'] for entry in history])
+            for entry, value in zip(history, values):
+                entry['value'] = value
+            return success_response('Portfolio history fetched successfully', 200, {'history': history, 'currency': currency})
+        except DatabaseError as e:
+            return error_response('Database error', 500, {'error': str(e.orig)})
+        except Exception as e:
+            return error_response('An unexpected error occurred', 500, {'error': str(e)})
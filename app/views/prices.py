@@ -0,0 +1,57 @@
+'''
+This module defines the controller methods for price history in the Vasset Global Flask application.
+
+It includes a method for reading a symbol's stored prices, raw or downsampled into OHLC buckets.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import time
+
+from flask import request, current_app
+
+from config import Config
+from app.utils.helpers.price_history_helpers import get_price_store, normalize_symbol, parse_interval, parse_timestamp
+from app.utils.response import error_response, success_response
+
+class PriceController:
+
+    @staticmethod
+    def get_price_history(symbol):
+        """
+        Get the stored price history of a symbol.
+        
+        Query parameters:
+            - start, end: Epoch seconds or ISO 8601 timestamps. Defaults to the last 30 days.
+            - interval: Bucket width such as '1h' or '1d'. Returns OHLC buckets when given,
+              raw (timestamp, price) points otherwise.
+        
+        Returns:
+            - 200: Price history.
+            - 400: Invalid parameters, or too many raw points for the range.
+        """
+        try:
+            try:
+                symbol = normalize_symbol(symbol)
+                end = parse_timestamp(request.args['end']) if request.args.get('end') else int(time.time())
+                start = parse_timestamp(request.args['start']) if request.args.get('start') else end - 30 * 86400
+                interval = parse_interval(request.args['interval']) if request.args.get('interval') else None
+            except ValueError as e:
+                return error_response(str(e), 400)
+            
+            store = get_price_store()
+            if interval:
+                history = store.ohlc(symbol, start, end, interval)
+            else:
+                max_points = int(current_app.config.get('MAX_ITEMS_PER_PAGE', Config.MAX_ITEMS_PER_PAGE))
+                # Counted on the memory-mapped blocks, so a rejected range is never copied into memory
+                if store.count(symbol, start, end) > max_points:
+                    return error_response(f'More than {max_points} points in range; pass an interval', 400)
+                timestamps, prices = store.range(symbol, start, end)
+                history = {'ts': timestamps.tolist(), 'price': prices.tolist()}
+            
+            extra_data = {'symbol': symbol, 'start': start, 'end': end, 'interval': interval, 'history': history}
+            return success_response('Price history fetched successfully', 200, extra_data)
+        except Exception as e:
+            return error_response('An unexpected error occurred', 500, {'error': str(e)})
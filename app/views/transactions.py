@@ -24,10 +24,12 @@ from app.extensions import db
 from app.models import User, Stock, RealEstate, Business, Crypto, NFT, SocialMedia, Transactions
 from app.utils.helpers.auth_helpers import generate_six_digit_code, save_pwd_reset_token, send_2fa_code
 from app.utils.helpers.email_helpers import send_code_to_email, send_other_emails
-from app.utils.helpers.basic_helpers import log_exception, console_log
+from app.utils.helpers.basic_helpers import log_exception, console_log, parse_fields, project_query
 from app.utils.helpers.user_helpers import get_vasset_user, is_email_exist, is_user_exist
 from app.utils.helpers.media_helpers import save_media
+from app.utils.helpers.fx_helpers import to_user_currency
 from app.utils.response import error_response, success_response
+from app.exceptions import InvalidFieldsError
 
 import cloudinary
 import cloudinary.uploader
@@ -40,6 +42,10 @@ cloudinary.config(
 )
 
 
+# Fields returned by get_transactions, in response order.
+TRANSACTION_FIELDS = ('id', 'amount', 'wallet_address', 'wallet_type', 'coin_type', 'screenshot_url', 'status', 'created_at')
+
+
 class TransactionController:
     
     @staticmethod
@@ -189,29 +195,30 @@ class TransactionController:
         Get a list of all transactions for a user.
         
         - 'user_id': ID of the user to retrieve transactions for.
+        - 'fields': Optional comma separated subset of the transaction fields to return.
+        
+        Amounts are converted into the currency of the user's profile, given as 'currency' on each transaction.
         
         Returns:
             - 200: List of transactions.
             - 404: User not found.
-            - 400: Database error.
+            - 400: Unknown field or database error.
         """
         user = User.query.get(user_id)
         if not user:
             return jsonify({'message': 'User not found'}), 404
         
         try:
-            transactions = Transactions.query.filter_by(user_id=user_id).all()
-            transactions_list = [{
-                'id': t.id,
-                'amount': t.amount,
-                'wallet_address': t.wallet_address,
-                'wallet_type': t.wallet_type,
-                'coin_type': t.coin_type,
-                'screenshot_url': t.screenshot_url,
-                'status': t.status,
-                'created_at': t.created_at
-            } for t in transactions]
+            fields = parse_fields(request, TRANSACTION_FIELDS)
+            transactions = project_query(Transactions, fields).filter(Transactions.user_id == user_id).all()
+            transactions_list = [{field: getattr(t, field) for field in fields} for t in transactions]
+            if 'amount' in fields:
+                currency, amounts = to_user_currency(user_id, [t['amount'] for t in transactions_list])
+                for transaction, amount in zip(transactions_list, amounts):
+                    transaction.update(amount=amount, currency=currency)
             
             return jsonify(transactions_list), 200
+        except InvalidFieldsError as e:
+            return jsonify({'message': e.message}), e.status_code
         except (IntegrityError, DataError, DatabaseError, InvalidRequestError) as e:
             return jsonify({'message': 'Database error', 'error': str(e)}), 400
\ No newline at end of file
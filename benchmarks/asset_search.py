@@ -0,0 +1,86 @@
+'''
+Benchmark for asset search latency.
+
+Seeds a throwaway database with one user holding --assets assets spread over
+every searchable type, then prints the mean latency of `search_assets` for a
+few representative queries.
+
+Usage:
+    python benchmarks/asset_search.py [--database-url URL] [--assets 100000]
+
+Without --database-url a temporary SQLite file is used. Point it at an empty
+PostgreSQL database to measure the GIN tsvector/pg_trgm path instead of FTS5.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import os, sys, time, random, string, argparse, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUERIES = ['ab', 'bakery', 'main street', 'zz9', 'crypto wallet']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=None)
+    parser.add_argument('--assets', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    return parser.parse_args()
+
+
+def word():
+    return ''.join(random.choices(string.ascii_lowercase, k=random.randint(3, 8)))
+
+
+def main():
+    args = parse_args()
+    scratch = None
+    if args.database_url is None:
+        fd, scratch = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+    os.environ['DATABASE_URL'] = args.database_url or f'sqlite:///{scratch}'
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import User, Stock, RealEstate, Business, NFT
+    from app.utils.helpers.asset_index_helpers import rebuild_asset_index
+    from app.utils.helpers.search_helpers import search_assets
+
+    app = create_app('production')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        db.session.add(user)
+        db.session.commit()
+
+        per_type = args.assets // 4
+        with db.engine.begin() as conn:
+            conn.execute(Stock.__table__.insert(), [
+                {'user_id': user.id, 'symbol': word()[:5].upper(), 'quantity': 1} for _ in range(per_type)])
+            conn.execute(RealEstate.__table__.insert(), [
+                {'user_id': user.id, 'address': f'{random.randint(1, 999)} {word()} street', 'value': 1.0} for _ in range(per_type)])
+            conn.execute(Business.__table__.insert(), [
+                {'user_id': user.id, 'name': f'{word()} {word()}', 'description': ' '.join(word() for _ in range(12))} for _ in range(per_type)])
+            conn.execute(NFT.__table__.insert(), [
+                {'user_id': user.id, 'name': word(), 'uri': 'ipfs://x'} for _ in range(per_type)])
+        print(f'Indexed {rebuild_asset_index()} assets')
+
+        for query in QUERIES:
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                results, _ = search_assets(user.id, query, per_page=20)
+            elapsed = (time.perf_counter() - started) / args.repeat * 1000
+            print(f'{query!r:>16}: {elapsed:7.2f} ms/query, {len(results)} results on page 1')
+
+        db.session.remove()
+        db.drop_all()
+
+    if scratch:
+        os.remove(scratch)
+
+
+if __name__ == '__main__':
+    main()
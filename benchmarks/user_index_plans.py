@@ -0,0 +1,121 @@
+'''
+Benchmark for the (user_id, created_at, id) indexes on per-user tables.
+
+Seeds a throwaway database, then prints the query plan and the mean latency of
+the per-user keyset list query for every per-user table, first without any
+index leading with user_id and then with all of them restored.
+
+Usage:
+    python benchmarks/user_index_plans.py [--database-url URL] [--users 200] [--rows-per-user 50]
+
+Without --database-url a temporary SQLite file is used. Point it at an empty
+PostgreSQL database to get EXPLAIN ANALYZE output instead of SQLite's query plan.
+
+@author: Chris
+@link: https://github.com/al-chris
+@package: VASSET
+'''
+import os, sys, time, random, argparse, tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=None)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--rows-per-user', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=200)
+    return parser.parse_args()
+
+
+def seed_rows(table, users, rows_per_user):
+    start = datetime(2024, 1, 1)
+    rows = []
+    for user_id in range(1, users + 1):
+        for n in range(rows_per_user):
+            row = {'user_id': user_id, 'created_at': start + timedelta(minutes=random.randint(0, 10 ** 6))}
+            for column in table.columns:
+                if column.name in row or column.primary_key or column.nullable:
+                    continue
+                python_type = column.type.python_type
+                row[column.name] = n if python_type is int else float(n) if python_type is float else f'v{n}'
+            rows.append(row)
+    return rows
+
+
+def main():
+    args = parse_args()
+    scratch = None
+    if args.database_url is None:
+        fd, scratch = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+    os.environ['DATABASE_URL'] = args.database_url or f'sqlite:///{scratch}'
+
+    from sqlalchemy import select, text
+    from app import create_app
+    from app.extensions import db
+    from app.models import User
+    from app.utils.helpers.asset_helpers import ASSET_MODELS
+    from app.models import Transactions
+
+    app = create_app('production')
+    models = list(ASSET_MODELS.values()) + [Transactions]
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        engine = db.engine
+        is_postgres = engine.dialect.name == 'postgresql'
+        # Every index leading with user_id, so the baseline is a full scan rather
+        # than a lookup through e.g. the (user_id, updated_at) sync indexes
+        indexes = [index for model in models for index in model.__table__.indexes
+                   if list(index.columns)[0].name == 'user_id']
+
+        with engine.begin() as conn:
+            for index in indexes:
+                index.drop(conn)
+            conn.execute(User.__table__.insert(), [
+                {'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com'} for i in range(1, args.users + 1)
+            ])
+            for model in models:
+                conn.execute(model.__table__.insert(), seed_rows(model.__table__, args.users, args.rows_per_user))
+            if is_postgres:
+                conn.execute(text('ANALYZE'))
+
+        def measure(label):
+            print(f'\n{label:=^72}')
+            for model in models:
+                user_id = random.randint(1, args.users)
+                query = (select(model).where(model.user_id == user_id)
+                         .order_by(model.created_at, model.id).limit(20))
+                compiled = str(query.compile(engine, compile_kwargs={'literal_binds': True}))
+                explain = 'EXPLAIN ANALYZE ' if is_postgres else 'EXPLAIN QUERY PLAN '
+                with engine.connect() as conn:
+                    plan = [' | '.join(str(c) for c in row) for row in conn.execute(text(explain + compiled))]
+                    started = time.perf_counter()
+                    for _ in range(args.repeat):
+                        conn.execute(query).all()
+                    elapsed = (time.perf_counter() - started) / args.repeat * 1000
+                print(f'\n{model.__tablename__} ({elapsed:.3f} ms/query)')
+                for line in plan:
+                    print(f'    {line}')
+
+        measure(' without user_id indexes ')
+        with engine.begin() as conn:
+            for index in indexes:
+                index.create(conn)
+            if is_postgres:
+                conn.execute(text('ANALYZE'))
+        measure(' with user_id indexes ')
+
+        db.session.remove()
+        db.drop_all()
+
+    if scratch:
+        os.remove(scratch)
+
+
+if __name__ == '__main__':
+    main()
@@ -24,6 +24,7 @@ class Config:
     DEBUG = (ENV == 'development')  # Enable debug mode only in development
     STATIC_DIR = 'app/static'
     UPLOADS_DIR = 'app/static/uploads'
+    PRICE_HISTORY_DIR = os.environ.get('PRICE_HISTORY_DIR') or 'instance/price_history'
     EMERGENCY_MODE = os.environ.get('EMERGENCY_MODE') or False
     DOMAIN_NAME = os.environ.get('DOMAIN_NAME') or 'https://www.vassetglobal.com'
     API_DOMAIN_NAME = os.environ.get('API_DOMAIN_NAME') or 'https://api.vassetglobal.com'
@@ -33,6 +34,28 @@ class Config:
     # Constants
     TASKS_PER_PAGE = os.environ.get('TASKS_PER_PAGE') or 10
     ITEMS_PER_PAGE = os.environ.get('ITEMS_PER_PAGE') or 10
+    MAX_ITEMS_PER_PAGE = os.environ.get('MAX_ITEMS_PER_PAGE') or 1000
+    IMPORT_CHUNK_SIZE = os.environ.get('IMPORT_CHUNK_SIZE') or 1000
+    MAX_BATCH_SIZE = os.environ.get('MAX_BATCH_SIZE') or 500
+    EXPORT_BATCH_SIZE = os.environ.get('EXPORT_BATCH_SIZE') or 500
+    SYNC_OVERLAP_SECONDS = os.environ.get('SYNC_OVERLAP_SECONDS') or 5
+    NET_WORTH_CHUNK_SIZE = os.environ.get('NET_WORTH_CHUNK_SIZE') or 1000
+    ANALYTICS_CACHE_TTL = os.environ.get('ANALYTICS_CACHE_TTL') or 300
+    ANALYTICS_CACHE_SIZE = os.environ.get('ANALYTICS_CACHE_SIZE') or 16
+    ANALYTICS_REFRESH_INTERVAL = os.environ.get('ANALYTICS_REFRESH_INTERVAL') or 240  # below the TTL, so entries never expire
+    ANALYTICS_COMPUTE_TIMEOUT = os.environ.get('ANALYTICS_COMPUTE_TIMEOUT') or 60  # longest one aggregation may take
+    ASSET_CACHE_TTL = os.environ.get('ASSET_CACHE_TTL') or 60
+    ASSET_CACHE_SIZE = os.environ.get('ASSET_CACHE_SIZE') or 10000
+    FX_CACHE_TTL = os.environ.get('FX_CACHE_TTL') or 300
+    MARKET_CACHE_TTL = os.environ.get('MARKET_CACHE_TTL') or 60
+    MARKET_CACHE_SIZE = os.environ.get('MARKET_CACHE_SIZE') or 1024
+    MARKET_SNAPSHOT_SIZE = os.environ.get('MARKET_SNAPSHOT_SIZE') or 500
+    MARKET_SNAPSHOT_INTERVAL = os.environ.get('MARKET_SNAPSHOT_INTERVAL') or 60
+    MARKET_SNAPSHOT_MAX_AGE = os.environ.get('MARKET_SNAPSHOT_MAX_AGE') or 900
+    MARKET_SNAPSHOT_STORE = os.environ.get('MARKET_SNAPSHOT_STORE') or 'file'  # 'file' or 'redis'
+    MARKET_SNAPSHOT_PATH = os.environ.get('MARKET_SNAPSHOT_PATH') or 'instance/market_snapshot.json'
+    # Let crypto routes call CoinGecko for queries the snapshot does not cover (off: snapshot only)
+    MARKET_UPSTREAM_FALLBACK = (os.environ.get('MARKET_UPSTREAM_FALLBACK') or 'false').lower() in ('1', 'true', 'yes')
     PAYMENT_TYPES = ['task-creation', 'membership-fee', 'credit-wallet', 'item-upload']
     
     # JWT configurations
@@ -59,11 +82,26 @@ class Config:
     # Celery
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL') or 'redis://localhost:6379/0'
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND') or 'redis://localhost:6379/0'
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or CELERY_BROKER_URL
     CELERY_ACCEPT_CONTENT = ['application/json']
     CELERY_TASK_SERIALIZER = 'json'
     CELERY_RESULT_SERIALIZER = 'json'
 
 
+    # CoinGecko config
+    COINGECKO_API_URL = os.environ.get('COINGECKO_API_URL') or 'https://api.coingecko.com/api/v3'
+
+    # Outbound HTTP client config (app/utils/helpers/http_helpers.py)
+    HTTP_POOL_SIZE = os.environ.get('HTTP_POOL_SIZE') or 10  # keep-alive connections per host
+    HTTP_CONNECT_TIMEOUT = os.environ.get('HTTP_CONNECT_TIMEOUT') or 3.05  # seconds
+    HTTP_READ_TIMEOUT = os.environ.get('HTTP_READ_TIMEOUT') or 10  # seconds
+    HTTP_RETRIES = os.environ.get('HTTP_RETRIES') or 2  # extra attempts for idempotent calls
+    HTTP_BACKOFF = os.environ.get('HTTP_BACKOFF') or 0.25  # seconds, doubled per attempt and jittered
+    HTTP_MAX_BACKOFF = os.environ.get('HTTP_MAX_BACKOFF') or 4  # seconds
+    HTTP_BREAKER_THRESHOLD = os.environ.get('HTTP_BREAKER_THRESHOLD') or 5  # consecutive failures
+    HTTP_BREAKER_RESET = os.environ.get('HTTP_BREAKER_RESET') or 30  # seconds before a trial call
+    PING_RECEIVER_URL = os.environ.get('PING_RECEIVER_URL') or 'http://127.0.0.1:4001/receive-url'
+
     # Google config
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
@@ -91,6 +129,7 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test.db'
+    CACHE_REDIS_URL = None  # Use the in-process cache tier
     WTF_CSRF_ENABLED = False  # Typically disabled during testing
 
 
@@ -0,0 +1,36 @@
+"""add (user_id, created_at, id) indexes to per-user tables
+
+Revision ID: 5a0a65377aec
+Revises: 77c6b2e9008c
+Create Date: 2026-10-18 10:41:09.662385
+
+The indexes are built with CREATE INDEX CONCURRENTLY on PostgreSQL so the
+migration can run against a live database without blocking writes. Concurrent
+index builds cannot run inside a transaction, hence the autocommit block.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a0a65377aec'
+down_revision = '77c6b2e9008c'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ['stocks', 'real_estates', 'businesses', 'cryptos', 'nfts', 'social_media', 'youtube', 'transactions']
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(f'ix_{table}_user_id_created_at_id', table, ['user_id', 'created_at', 'id'],
+                            unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.drop_index(f'ix_{table}_user_id_created_at_id', table_name=table, postgresql_concurrently=True)
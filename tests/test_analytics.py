@@ -0,0 +1,176 @@
+# tests/test_analytics.py
+
+import pytest
+import threading
+from app import create_app, db
+from app.models import User, Role, RoleNames, Stock, Crypto, RealEstate
+from app.models.role import create_roles
+from app.extensions import celery
+from app.tasks import refresh_analytics
+from app.utils.helpers import analytics_helpers
+from app.utils.helpers.analytics_helpers import analytics_cache, shared_analytics
+from app.utils.helpers.asset_cache_helpers import portfolio_cache
+from flask_jwt_extended import create_access_token
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        analytics_cache.clear()
+        shared_analytics.clear()
+        yield app
+        analytics_cache.wait()
+        analytics_cache.clear()
+        shared_analytics.clear()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def init_db(app):
+    with app.app_context():
+        # Create an admin and two customers with overlapping holdings
+        create_roles()
+        admin = User(email='admin@example.com', username='admin', password='testpassword')
+        admin.roles.append(Role.query.filter_by(name=RoleNames.Admin).first())
+        alice = User(email='alice@example.com', username='alice', password='testpassword')
+        bob = User(email='bob@example.com', username='bob', password='testpassword')
+        db.session.add_all([admin, alice, bob])
+        db.session.commit()
+        db.session.add_all([
+            Stock(symbol='AAPL', quantity=10, user_id=alice.id),
+            Stock(symbol='aapl', quantity=5, user_id=alice.id),
+            Stock(symbol='AAPL', quantity=1, user_id=bob.id),
+            Stock(symbol='MSFT', quantity=2, user_id=bob.id),
+            Crypto(symbol='BTC', amount=0.5, user_id=alice.id),
+            Crypto(symbol='btc', amount=0.25, user_id=bob.id),
+            RealEstate(address='1 Main Street', value=75_000.0, user_id=alice.id),
+            RealEstate(address='2 High Street', value=2_000_000.0, user_id=bob.id),
+        ])
+        db.session.commit()
+
+
+def get_auth_headers(user):
+    access_token = create_access_token(identity=user.id)
+    return {'Authorization': f'Bearer {access_token}'}
+
+
+def test_holdings_analytics(client, init_db):
+    admin = User.query.filter_by(username='admin').first()
+    headers = get_auth_headers(admin)
+
+    stocks = client.get('/api/admin/analytics/stocks', headers=headers).get_json()['analytics']
+    assert stocks['data'] == [
+        {'symbol': 'AAPL', 'holders': 2, 'total': 16, 'positions': 3},
+        {'symbol': 'MSFT', 'holders': 1, 'total': 2, 'positions': 1},
+    ]
+    assert stocks['stale'] is False
+
+    cryptos = client.get('/api/admin/analytics/cryptos', headers=headers).get_json()['analytics']['data']
+    assert cryptos == [{'symbol': 'BTC', 'holders': 2, 'total': 0.75, 'positions': 2}]
+
+    real_estates = client.get('/api/admin/analytics/real_estates', headers=headers).get_json()['analytics']['data']
+    assert real_estates['properties'] == 2 and real_estates['total_value'] == 2_075_000.0
+    assert [b['properties'] for b in real_estates['buckets']] == [0, 1, 0, 0, 0, 1, 0]
+    assert real_estates['buckets'][-1]['max'] is None
+
+
+def test_analytics_requires_admin(client, init_db):
+    alice = User.query.filter_by(username='alice').first()
+    response = client.get('/api/admin/analytics/stocks', headers=get_auth_headers(alice))
+    assert response.status_code == 403
+
+
+def test_analytics_served_stale_while_refreshing(app, client, init_db):
+    admin = User.query.filter_by(username='admin').first()
+    headers = get_auth_headers(admin)
+    app.config['ANALYTICS_CACHE_TTL'] = 0
+
+    first = client.get('/api/admin/analytics/stocks', headers=headers).get_json()['analytics']
+    db.session.add(Stock(symbol='TSLA', quantity=1, user_id=admin.id))
+    db.session.commit()
+
+    # The expired result is returned straight away and refreshed in the background
+    second = client.get('/api/admin/analytics/stocks', headers=headers).get_json()['analytics']
+    assert second['stale'] is True
+    assert second['data'] == first['data']
+
+    analytics_cache.wait()
+    app.config['ANALYTICS_CACHE_TTL'] = 300
+    third = client.get('/api/admin/analytics/stocks', headers=headers).get_json()['analytics']
+    assert third['stale'] is False
+    assert {row['symbol'] for row in third['data']} == {'AAPL', 'MSFT', 'TSLA'}
+
+
+def test_cold_analytics_computed_once(app, init_db, monkeypatch):
+    calls, started = [], threading.Event()
+    holdings = analytics_helpers.stock_holdings
+
+    def slow_holdings():
+        calls.append(1)
+        started.wait(1)
+        return holdings()
+
+    monkeypatch.setitem(analytics_helpers.ANALYTICS, 'stocks', slow_holdings)
+    admin = User.query.filter_by(username='admin').first()
+    headers = get_auth_headers(admin)
+    barrier, results = threading.Barrier(6), []
+
+    def request_dashboard():
+        barrier.wait()
+        response = app.test_client().get('/api/admin/analytics/stocks', headers=headers)
+        results.append(response.get_json()['analytics']['data'])
+
+    threads = [threading.Thread(target=request_dashboard) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    started.set()
+    for thread in threads:
+        thread.join(10)
+    assert len(calls) == 1
+    assert len(results) == 6 and all(data == results[0] for data in results)
+
+
+def test_refresh_task_prewarms_analytics(app, client, init_db, monkeypatch):
+    previous = {key: celery.conf[key] for key in ('broker_url', 'task_always_eager', 'task_eager_propagates')}
+    celery.conf.update(broker_url='memory://', task_always_eager=True, task_eager_propagates=True)
+    try:
+        assert refresh_analytics.delay().get() == ['stocks', 'cryptos', 'real_estates']
+    finally:
+        celery.conf.update(previous)
+
+    # A worker with nothing cached reads the stored rollups instead of aggregating
+    def no_aggregation():
+        raise AssertionError('aggregation ran in a request')
+
+    monkeypatch.setattr(analytics_helpers, 'ANALYTICS', dict.fromkeys(analytics_helpers.ANALYTICS, no_aggregation))
+    admin = User.query.filter_by(username='admin').first()
+    response = client.get('/api/admin/analytics/cryptos', headers=get_auth_headers(admin))
+    assert response.get_json()['analytics']['data'] == [{'symbol': 'BTC', 'holders': 2, 'total': 0.75, 'positions': 2}]
+    assert response.get_json()['analytics']['stale'] is False
+
+
+def test_cache_stats(client, init_db):
+    admin = User.query.filter_by(username='admin').first()
+    alice = User.query.filter_by(username='alice').first()
+    portfolio_cache.clear()
+    for _ in range(3):
+        client.get('/api/users/assets', headers=get_auth_headers(alice))
+
+    response = client.get('/api/admin/cache/stats', headers=get_auth_headers(admin))
+    assert response.status_code == 200
+    stats = response.get_json()['caches']['portfolio']
+    assert stats['backend'] == 'local'
+    assert (stats['hits'], stats['misses']) == (2, 1)
+    assert stats['hit_ratio'] == pytest.approx(2 / 3)
+    assert sum(bucket['count'] for bucket in stats['latency']['hit']['buckets']) == 2
+
+    response = client.get('/api/admin/cache/stats', headers=get_auth_headers(alice))
+    assert response.status_code == 403
@@ -0,0 +1,770 @@
+# tests/test_assets.py
+
+import pytest
+import json
+import base64
+import fnmatch
+import threading
+import redis
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.models import User, Stock, RealEstate, Business, Crypto, NFT, SocialMedia, Youtube, AssetIndex, Symbol, Media
+from app.utils.helpers.asset_cache_helpers import portfolio_cache
+from flask_jwt_extended import create_access_token
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        portfolio_cache.clear()
+        yield app
+        portfolio_cache.redis = None
+        portfolio_cache.clear()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def init_db(app):
+    with app.app_context():
+        # Create a user holding one asset of every kind
+        user = User(email='testuser@example.com', username='testuser', password='testpassword')
+        db.session.add(user)
+        db.session.commit()
+        db.session.add_all([
+            Stock(symbol='AAPL', quantity=10, user_id=user.id),
+            RealEstate(address='1 Main Street', value=250000.0, user_id=user.id),
+            Business(name='Bakery', description='Bread', user_id=user.id),
+            Crypto(symbol='BTC', amount=0.5, user_id=user.id),
+            NFT(name='Ape', uri='ipfs://ape', user_id=user.id),
+            SocialMedia(platform='x', username='tester', password='secret', user_id=user.id),
+            Youtube(email='yt@example.com', password='secret', user_id=user.id),
+        ])
+        db.session.commit()
+
+
+def get_auth_headers(user):
+    access_token = create_access_token(identity=user.id)
+    return {'Authorization': f'Bearer {access_token}'}
+
+
+class QueryCounter:
+    '''Counts and records the SQL statements executed against the engine while active.'''
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self.statements = []
+
+    def _on_execute(self, conn, cursor, statement, *args, **kwargs):
+        self.count += 1
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+class FakeRedis:
+    '''In-process stand-in for the subset of the Redis client the caches use.'''
+
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise redis.ConnectionError('fake redis is down')
+
+    def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        self._check()
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        # Only the load-lock release script is used: compare-and-delete
+        self._check()
+        if self.data.get(key) == token.encode():
+            return self.delete(key)
+        return 0
+
+    def delete(self, *keys):
+        self._check()
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def scan_iter(self, match='*'):
+        self._check()
+        return [key for key in list(self.data) if fnmatch.fnmatch(key, match)]
+
+
+def test_get_all_assets_shape(client, init_db):
+    user = User.query.first()
+    headers = get_auth_headers(user)
+    response = client.get('/api/users/assets', headers=headers)
+    assert response.status_code == 200
+
+    assets = response.get_json()['message']
+    assert assets['stocks'] == [{'id': 1, 'symbol': 'AAPL', 'quantity': 10}]
+    assert assets['real_estates'] == [{'id': 1, 'address': '1 Main Street', 'value': 250000.0}]
+    assert assets['businesses'] == [{'id': 1, 'name': 'Bakery', 'description': 'Bread'}]
+    assert assets['cryptos'] == [{'id': 1, 'symbol': 'BTC', 'amount': 0.5}]
+    assert assets['nfts'] == [{'id': 1, 'name': 'Ape', 'uri': 'ipfs://ape'}]
+    assert assets['social_media'] == [{'id': 1, 'platform': 'x', 'username': 'tester'}]
+    assert assets['youtube'] == [{'id': 1, 'email': 'yt@example.com', 'password': 'secret'}]
+
+
+def test_get_all_assets_single_query(client, init_db):
+    user = User.query.first()
+    headers = get_auth_headers(user)
+    db.session.expunge_all()
+
+    with QueryCounter(db.engine) as counter:
+        response = client.get('/api/users/assets', headers=headers)
+
+    assert response.status_code == 200
+    # One lookup of the user's data version for the ETag, one UNION ALL for the assets
+    assert counter.count == 2
+
+
+def test_get_stocks_keyset_pagination(client, init_db):
+    user = User.query.first()
+    db.session.add_all([Stock(symbol=f'S{i}', quantity=i, user_id=user.id) for i in range(4)])
+    db.session.commit()
+    headers = get_auth_headers(user)
+
+    seen = []
+    cursor = None
+    while True:
+        query = '?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(f'/api/users/stocks{query}', headers=headers)
+        assert response.status_code == 200
+        body = response.get_json()
+        assert len(body['message']) <= 2
+        seen.extend(stock['symbol'] for stock in body['message'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+
+    assert seen == ['AAPL', 'S0', 'S1', 'S2', 'S3']
+
+
+def test_get_stocks_unpaginated_is_capped(app, client, init_db):
+    user = User.query.first()
+    db.session.add_all([Stock(symbol=f'S{i}', quantity=i, user_id=user.id) for i in range(4)])
+    db.session.commit()
+    app.config['MAX_ITEMS_PER_PAGE'] = 3
+
+    response = client.get('/api/users/stocks', headers=get_auth_headers(user))
+    body = response.get_json()
+    assert len(body['message']) == 3
+    assert body['next_cursor'] is not None
+
+
+def test_get_stocks_invalid_cursor(client, init_db):
+    user = User.query.first()
+    headers = get_auth_headers(user)
+    response = client.get('/api/users/stocks?cursor=not-a-cursor', headers=headers)
+    assert response.status_code == 400
+
+    # A cursor without a creation time or with a bad id is rejected rather than matching nothing
+    for raw in ('|5', '2024-01-01T00:00:00|0', '2024-01-01T00:00:00'):
+        cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+        assert client.get(f'/api/users/stocks?cursor={cursor}', headers=headers).status_code == 400
+
+
+def test_get_stocks_invalid_limit(client, init_db):
+    user = User.query.first()
+    headers = get_auth_headers(user)
+    for limit in ('0', '-2', 'ten'):
+        response = client.get(f'/api/users/stocks?limit={limit}', headers=headers)
+        assert response.status_code == 400
+        assert response.get_json()['message'] == 'Limit must be a positive integer.'
+
+
+def test_import_stocks_csv(app, client, init_db):
+    user = User.query.first()
+    app.config['IMPORT_CHUNK_SIZE'] = 2
+    body = b'symbol,quantity\nMSFT,3\nGOOG,abc\nTSLA,7\nNVDA,1\n,4\n'
+
+    response = client.post('/api/users/stocks/import', data=body, content_type='text/csv',
+                           headers=get_auth_headers(user))
+    assert response.status_code == 200
+
+    report = response.get_json()['report']
+    assert report['imported'] == 3
+    assert report['failed'] == 2
+    assert report['errors'] == [
+        {'line': 3, 'errors': {'quantity': 'must be a number'}},
+        {'line': 6, 'errors': {'symbol': 'is required'}},
+    ]
+    assert {s.symbol for s in Stock.query.filter_by(user_id=user.id)} == {'AAPL', 'MSFT', 'TSLA', 'NVDA'}
+
+
+def test_import_cryptos_ndjson(client, init_db):
+    user = User.query.first()
+    body = b'{"symbol": "ETH", "amount": 2.5}\n\nnot json\n{"symbol": "SOL", "amount": 1, "colour": "red"}\n'
+
+    response = client.post('/api/users/cryptos/import?format=ndjson', data=body,
+                           headers=get_auth_headers(user))
+    report = response.get_json()['report']
+    assert report['imported'] == 1
+    assert report['errors'] == [
+        {'line': 3, 'errors': {'row': 'is not valid JSON'}},
+        {'line': 4, 'errors': {'colour': 'unknown field'}},
+    ]
+
+
+def test_import_unknown_asset_type(client, init_db):
+    user = User.query.first()
+    response = client.post('/api/users/cars/import?format=csv', data=b'', headers=get_auth_headers(user))
+    assert response.status_code == 400
+
+
+def test_export_assets_ndjson(client, init_db):
+    user = User.query.first()
+    response = client.get('/api/users/assets/export', headers=get_auth_headers(user))
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['type'] for row in rows] == ['stocks', 'real_estates', 'businesses', 'cryptos', 'nfts', 'social_media', 'youtube']
+    assert rows[0]['symbol'] == 'AAPL' and rows[0]['quantity'] == 10
+
+
+def test_export_social_media_without_per_row_queries(client, init_db):
+    user = User.query.first()
+    pictures = [Media(filename=f'proof{n}.png', media_path=f'https://cdn.example.com/proof{n}.png') for n in range(5)]
+    db.session.add_all(pictures)
+    db.session.flush()
+    db.session.add_all([SocialMedia(platform='x', username=f'user{n}', password='secret', user_id=user.id,
+                                    proof_pic_id=picture.id) for n, picture in enumerate(pictures)])
+    db.session.commit()
+    paths, headers = [picture.media_path for picture in pictures], get_auth_headers(user)
+    db.session.expunge_all()
+
+    with QueryCounter(db.engine) as counter:
+        response = client.get('/api/users/assets/export?type=social_media', headers=headers)
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['proof_pic'] for row in rows] == [''] + paths
+    assert not any('FROM media' in sql and 'JOIN' not in sql for sql in counter.statements)
+
+
+def test_listing_social_media_without_per_row_queries(client, init_db):
+    user = User.query.first()
+    pictures = [Media(filename=f'proof{n}.png', media_path=f'https://cdn.example.com/proof{n}.png') for n in range(3)]
+    db.session.add_all(pictures)
+    db.session.flush()
+    db.session.add_all([SocialMedia(platform='x', username=f'user{n}', password='secret', user_id=user.id,
+                                    proof_pic_id=picture.id) for n, picture in enumerate(pictures)])
+    db.session.commit()
+    headers = get_auth_headers(user)
+    db.session.expunge_all()
+
+    for path in ('/api/users/assets/recent?type=social_media', '/api/users/assets/search?q=user'):
+        with QueryCounter(db.engine) as counter:
+            response = client.get(path, headers=headers)
+        items = response.get_json().get('assets') or response.get_json()['results']
+        assert sum(1 for item in items if item['asset']['proof_pic']) == 3
+        assert not any('FROM media' in sql and 'JOIN' not in sql for sql in counter.statements)
+        db.session.expunge_all()
+
+    with QueryCounter(db.engine) as counter:
+        rows = client.get('/api/users/assets/changes', headers=headers).get_json()['changes']['social_media']
+    assert sum(1 for row in rows if row['proof_pic']) == 3
+    assert not any('FROM media' in sql and 'JOIN' not in sql for sql in counter.statements)
+
+
+def test_export_assets_csv(client, init_db):
+    user = User.query.first()
+    response = client.get('/api/users/assets/export?format=csv&type=stocks,cryptos', headers=get_auth_headers(user))
+    assert response.status_code == 200
+
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0] == 'type,id,symbol,quantity,created_at,updated_at,amount'
+    assert lines[1].startswith('stocks,1,AAPL,10,')
+    assert lines[2].startswith('cryptos,1,BTC,,')
+    assert lines[2].endswith(',0.5')
+
+
+def test_get_all_assets_etag(client, init_db):
+    user = User.query.first()
+    headers = get_auth_headers(user)
+
+    response = client.get('/api/users/assets', headers=headers)
+    etag = response.headers['ETag']
+    assert response.status_code == 200 and not etag.startswith('W/')
+
+    db.session.expunge_all()
+    with QueryCounter(db.engine) as counter:
+        response = client.get('/api/users/assets', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert counter.count == 1
+
+    client.post('/api/users/nfts', data=json.dumps({'name': 'Punk', 'uri': 'ipfs://punk'}),
+                content_type='application/json', headers=headers)
+    response = client.get('/api/users/assets', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_profile_etag_changes_on_address_update(client, init_db):
+    from app.models import Address
+    user = User.query.first()
+    headers = get_auth_headers(user)
+
+    etag = client.get('/api/profile', headers=headers).headers['ETag']
+    address = Address(vasset_user_id=user.id, country='Nigeria')
+    db.session.add(address)
+    db.session.commit()
+
+    response = client.get('/api/profile', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+
+
+def test_get_asset_changes(client, init_db):
+    from datetime import datetime, timedelta
+    from app.models import AssetTombstone
+    from app.utils.helpers.sync_helpers import encode_sync_cursor
+    user = User.query.first()
+    headers = get_auth_headers(user)
+
+    response = client.get('/api/users/assets/changes', headers=headers)
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [s['symbol'] for s in body['changes']['stocks']] == ['AAPL']
+
+    since = encode_sync_cursor(datetime.utcnow() - timedelta(seconds=1))
+    for stock in Stock.query.all():
+        stock.updated_at = datetime.utcnow() - timedelta(days=1)
+    crypto = Crypto.query.first()
+    crypto.update(amount=1.5)
+    db.session.add(AssetTombstone(user_id=user.id, asset_type='nfts', asset_id=7))
+    db.session.commit()
+
+    body = client.get(f'/api/users/assets/changes?since={since}', headers=headers).get_json()
+    assert body['changes']['stocks'] == []
+    assert [c['amount'] for c in body['changes']['cryptos']] == [1.5]
+    assert body['deleted']['nfts'] == [7]
+    assert body['next_cursor']
+
+
+def test_get_asset_changes_pages_full_sync(client, init_db):
+    from datetime import datetime, timedelta
+    from app.utils.helpers.sync_helpers import encode_sync_cursor
+    user = User.query.first()
+    headers = get_auth_headers(user)
+    db.session.add_all([Stock(symbol=f'S{i}', quantity=i, user_id=user.id) for i in range(3)])
+    db.session.commit()
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        query = '?limit=2' + (f'&since={cursor}' if cursor else '')
+        body = client.get(f'/api/users/assets/changes{query}', headers=headers).get_json()
+        seen += [(asset_type, row['id']) for asset_type, rows in body['changes'].items() for row in rows]
+        assert len(seen) <= 2 * (pages + 1)
+        cursor, pages = body['next_cursor'], pages + 1
+        if not body['has_more']:
+            break
+    assert len(seen) == len(set(seen)) == 10
+    assert pages == 5
+
+    # The final cursor syncs from when the full sync started
+    body = client.get(f'/api/users/assets/changes?since={cursor}', headers=headers).get_json()
+    assert not body['has_more']
+    assert sum(len(rows) for rows in body['changes'].values()) == 10
+
+    since = encode_sync_cursor(datetime.utcnow() + timedelta(seconds=1))
+    assert client.get('/api/users/assets/changes?limit=0', headers=headers).status_code == 400
+    assert client.get(f'/api/users/assets/changes?since={since}', headers=headers).get_json()['has_more'] is False
+
+
+def test_orm_deletes_write_tombstones(client, init_db):
+    from datetime import datetime, timedelta
+    from app.models import AssetTombstone
+    from app.utils.helpers.sync_helpers import encode_sync_cursor
+    user = User.query.filter_by(username='testuser').first()
+    headers = get_auth_headers(user)
+    since = encode_sync_cursor(datetime.utcnow() - timedelta(seconds=1))
+
+    stock = Stock.query.first()
+    db.session.delete(stock)
+    db.session.commit()
+    body = client.get(f'/api/users/assets/changes?since={since}', headers=headers).get_json()
+    assert body['deleted']['stocks'] == [stock.id]
+
+    # Bulk deletes log their own tombstones, once
+    nft = NFT.query.first()
+    client.delete(f'/api/users/nfts/bulk?ids={nft.id}', headers=headers)
+    assert AssetTombstone.query.filter_by(asset_type='nfts').count() == 1
+
+    # An account deletion writes none, as they would reference the deleted user
+    db.session.delete(user)
+    db.session.commit()
+    assert AssetTombstone.query.count() == 2
+
+
+def test_get_asset_changes_invalid_cursor(client, init_db):
+    user = User.query.first()
+    response = client.get('/api/users/assets/changes?since=nope', headers=get_auth_headers(user))
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('path, helper', [
+    ('/api/users/assets/changes', 'asset_changes'),
+    ('/api/users/assets/recent', 'list_user_assets'),
+    ('/api/users/assets/search?q=bak', 'search_assets'),
+])
+def test_asset_reads_report_database_errors(client, init_db, monkeypatch, path, helper):
+    def fail(*args, **kwargs):
+        raise OperationalError('SELECT 1', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(f'app.views.assets.{helper}', fail)
+    response = client.get(path, headers=get_auth_headers(User.query.first()))
+    assert response.status_code == 500
+    assert response.get_json()['error'] == 'database is locked'
+
+
+def test_asset_index_tracks_writes(app, client, init_db):
+    user = User.query.filter_by(username='testuser').first()
+    headers = get_auth_headers(user)
+
+    # ORM adds made in init_db are indexed on flush
+    assert AssetIndex.query.filter_by(user_id=user.id).count() == 7
+
+    client.post('/api/users/cryptos/import?format=ndjson', data=b'{"symbol": "eth", "amount": 2}\n', headers=headers)
+    client.post('/api/users/stocks', data=json.dumps({'symbol': 'MSFT', 'quantity': 2}),
+                content_type='application/json', headers=headers)
+
+    response = client.get('/api/users/assets/recent?limit=2', headers=headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [(item['type'], item['asset'].get('symbol')) for item in data['assets']] == [('stocks', 'MSFT'), ('cryptos', 'eth')]
+
+    seen = [item['asset']['id'] for item in data['assets']]
+    cursor = data['next_cursor']
+    while cursor:
+        data = client.get(f'/api/users/assets/recent?limit=2&cursor={cursor}', headers=headers).get_json()
+        seen += [item['asset']['id'] for item in data['assets']]
+        cursor = data['next_cursor']
+    assert len(seen) == 9
+
+    response = client.get('/api/users/assets/recent?type=stocks&order=asc', headers=headers)
+    assert [item['asset']['symbol'] for item in response.get_json()['assets']] == ['AAPL', 'MSFT']
+
+    response = client.get('/api/users/assets/recent?type=bonds', headers=headers)
+    assert response.status_code == 400
+
+    # ORM deletes drop the index row
+    db.session.delete(Stock.query.filter_by(symbol='MSFT').first())
+    db.session.commit()
+    assert AssetIndex.query.filter_by(asset_type='stocks').count() == 1
+
+
+def test_rebuild_asset_index(app, init_db):
+    AssetIndex.query.delete()
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['rebuild-asset-index'])
+    assert 'Indexed 7 assets' in result.output
+    assert AssetIndex.query.count() == 7
+
+
+def test_search_assets(app, client, init_db):
+    user = User.query.filter_by(username='testuser').first()
+    headers = get_auth_headers(user)
+
+    other = User(email='other@example.com', username='other', password='testpassword')
+    db.session.add(other)
+    db.session.commit()
+    db.session.add_all([Business(name='Bakery Two', description='Cakes', user_id=other.id),
+                        Business(name='Corner Bakery', description='Bread and bakery goods', user_id=user.id)])
+    db.session.commit()
+
+    response = client.get('/api/users/assets/search?q=bak', headers=headers)
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    # Another user's bakery is not returned
+    assert sorted(r['asset']['name'] for r in results) == ['Bakery', 'Corner Bakery']
+
+    response = client.get('/api/users/assets/search?q=main street', headers=headers)
+    assert [r['type'] for r in response.get_json()['results']] == ['real_estates']
+
+    # Passwords are not searchable
+    response = client.get('/api/users/assets/search?q=secret', headers=headers)
+    assert response.get_json()['results'] == []
+
+    # Updates are reindexed
+    stock = Stock.query.filter_by(symbol='AAPL').first()
+    stock.symbol = 'GOOG'
+    db.session.commit()
+    response = client.get('/api/users/assets/search?q=goog', headers=headers)
+    assert [r['asset']['symbol'] for r in response.get_json()['results']] == ['GOOG']
+
+    response = client.get('/api/users/assets/search?q=bak&limit=1&page=2', headers=headers)
+    data = response.get_json()
+    assert len(data['results']) == 1 and data['has_next'] is False
+
+    response = client.get('/api/users/assets/search?q=', headers=headers)
+    assert response.status_code == 400
+
+
+def test_list_sparse_fieldsets(app, client, init_db):
+    user = User.query.filter_by(username='testuser').first()
+    headers = get_auth_headers(user)
+
+    response = client.get('/api/users/businesses?fields=name', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['message'] == [{'name': 'Bakery'}]
+
+    response = client.get('/api/users/cryptos?fields=img,symbol', headers=headers)
+    assert response.get_json()['message'][0].keys() == {'symbol', 'img'}
+
+    # Without fields the response shape is unchanged
+    response = client.get('/api/users/stocks', headers=headers)
+    assert response.get_json()['message'][0].keys() == {'id', 'symbol', 'quantity'}
+
+    # Only the requested columns are selected
+    with QueryCounter(db.engine) as counter:
+        client.get('/api/users/businesses?fields=name', headers=headers)
+    select_sql = next(sql for sql in counter.statements if 'FROM businesses' in sql)
+    assert 'description' not in select_sql
+
+    response = client.get('/api/users/stocks?fields=symbol,user_id', headers=headers)
+    assert response.status_code == 400
+
+
+def test_add_assets_batch(app, client, init_db):
+    user = User.query.filter_by(username='testuser').first()
+    headers = get_auth_headers(user)
+    items = [
+        {'type': 'stocks', 'symbol': 'MSFT', 'quantity': '3'},
+        {'type': 'cryptos', 'symbol': 'ETH', 'amount': 1.5},
+        {'type': 'businesses', 'name': 'Cafe'},
+    ]
+
+    flushes = []
+    count_flush = lambda session, context, instances: flushes.append(len(session.new))
+    event.listen(db.session, 'before_flush', count_flush)
+    try:
+        with QueryCounter(db.engine) as counter:
+            response = client.post('/api/users/assets/batch', data=json.dumps({'assets': items}),
+                                   content_type='application/json', headers=headers)
+    finally:
+        event.remove(db.session, 'before_flush', count_flush)
+    assert response.status_code == 201
+    # The summary updates do not autoflush per asset type: one flush writes everything
+    assert flushes == [3]
+    created = response.get_json()['assets']
+    assert [(c['index'], c['type']) for c in created] == [(0, 'stocks'), (1, 'cryptos'), (2, 'businesses')]
+    assert db.session.get(Crypto, created[1]['id']).symbol == 'ETH'
+    # One flush: a single INSERT per asset table
+    assert sum(1 for sql in counter.statements if sql.startswith('INSERT INTO stocks')) == 1
+
+    summary = client.get('/api/users/portfolio/summary', headers=headers).get_json()['summary']
+    assert summary['counts']['stocks'] == 1 and summary['counts']['businesses'] == 1
+
+    # One invalid item rejects the whole batch
+    bad = [{'type': 'stocks', 'symbol': 'IBM', 'quantity': 1}, {'type': 'stocks', 'symbol': 'X'},
+           {'type': 'bonds'}, 'nope']
+    response = client.post('/api/users/assets/batch', data=json.dumps({'assets': bad}),
+                           content_type='application/json', headers=headers)
+    assert response.status_code == 400
+    errors = response.get_json()['errors']
+    assert [e['index'] for e in errors] == [1, 2, 3]
+    assert errors[0]['errors'] == {'quantity': 'is required'}
+    assert Stock.query.filter_by(symbol='IBM').count() == 0
+
+
+def test_bulk_update_and_delete(app, client, init_db):
+    user = User.query.filter_by(username='testuser').first()
+    headers = get_auth_headers(user)
+    other = User(email='other@example.com', username='other', password='testpassword')
+    db.session.add(other)
+    db.session.commit()
+    db.session.add_all([Crypto(symbol='ETH', amount=2, user_id=user.id), Crypto(symbol='BTC', amount=9, user_id=other.id)])
+    db.session.commit()
+    mine = [c.id for c in Crypto.query.filter_by(user_id=user.id)]
+    theirs = Crypto.query.filter_by(user_id=other.id).first().id
+
+    with QueryCounter(db.engine) as counter:
+        response = client.patch('/api/users/cryptos/bulk', data=json.dumps({'ids': mine + [theirs], 'values': {'amount': '5'}}),
+                                content_type='application/json', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['updated'] == 2
+    assert sum(1 for sql in counter.statements if sql.startswith('UPDATE cryptos')) == 1
+    assert db.session.get(Crypto, theirs).amount == 9
+
+    summary = client.get('/api/users/portfolio/summary', headers=headers).get_json()['summary']
+    assert summary['crypto_amounts'] == {'BTC': 5.0, 'ETH': 5.0}
+
+    response = client.patch('/api/users/cryptos/bulk', data=json.dumps({'ids': mine, 'values': {'amount': None}}),
+                            content_type='application/json', headers=headers)
+    assert response.get_json()['errors'] == {'amount': 'cannot be empty'}
+
+    response = client.get('/api/users/assets/changes', headers=headers)
+    cursor = response.get_json()['next_cursor']
+
+    response = client.delete(f"/api/users/cryptos/bulk?ids={','.join(map(str, mine + [theirs]))}", headers=headers)
+    assert response.get_json()['deleted'] == 2
+    assert Crypto.query.count() == 1
+    assert AssetIndex.query.filter_by(asset_type='cryptos').count() == 1
+
+    summary = client.get('/api/users/portfolio/summary', headers=headers).get_json()['summary']
+    assert summary['counts']['cryptos'] == 0
+
+    changes = client.get('/api/users/assets/changes?since=' + cursor, headers=headers).get_json()
+    assert sorted(changes['deleted']['cryptos']) == sorted(mine)
+
+    response = client.delete('/api/users/cryptos/bulk?ids=1,x', headers=headers)
+    assert response.status_code == 400
+
+
+def test_symbols_deduplicated_across_writes(app, client, init_db):
+    user = User.query.filter_by(username='testuser').first()
+    headers = get_auth_headers(user)
+    aapl = Symbol.query.filter_by(asset_class='stock', ticker='AAPL').one()
+    assert Stock.query.first().symbol_id == aapl.id
+
+    # ORM, batch and import writes all resolve to the same symbol row
+    client.post('/api/users/stocks', data=json.dumps({'symbol': ' aapl', 'quantity': 1}),
+                content_type='application/json', headers=headers)
+    client.post('/api/users/assets/batch', data=json.dumps({'assets': [{'type': 'stocks', 'symbol': 'Aapl', 'quantity': 2}]}),
+                content_type='application/json', headers=headers)
+    client.post('/api/users/stocks/import?format=ndjson', data=b'{"symbol": "AAPL", "quantity": 3}\n{"symbol": "MSFT", "quantity": 4}\n',
+                headers=headers)
+    assert {stock.symbol_id for stock in Stock.query.filter(Stock.symbol != 'MSFT')} == {aapl.id}
+    assert Symbol.query.filter_by(asset_class='stock').count() == 2
+
+    # A crypto with a stock's ticker is a separate symbol
+    btc = Symbol.query.filter_by(asset_class='crypto', ticker='BTC').one()
+    assert Crypto.query.first().symbol_id == btc.id
+
+    msft = Stock.query.filter_by(symbol='MSFT').one()
+    client.patch('/api/users/stocks/bulk', data=json.dumps({'ids': [msft.id], 'values': {'symbol': 'aapl'}}),
+                 content_type='application/json', headers=headers)
+    assert db.session.get(Stock, msft.id).symbol_id == aapl.id
+
+
+def test_backfill_symbols(app, init_db):
+    Stock.query.update({'symbol_id': None})
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=['backfill-symbols', '--batch-size', '1'])
+    assert 'Linked 1 assets to symbols.' in result.output
+    assert Stock.query.first().symbol_id == Symbol.query.filter_by(ticker='AAPL').one().id
+
+
+def test_get_all_assets_cache_invalidation(app, client, init_db):
+    portfolio_cache.redis = FakeRedis()
+    user = User.query.filter_by(username='testuser').first()
+    headers = get_auth_headers(user)
+
+    def stocks():
+        return client.get('/api/users/assets', headers=headers).get_json()['message']['stocks']
+
+    assert len(stocks()) == 1
+    assert list(portfolio_cache.redis.data) == [f'vasset:cache:portfolio:{user.id}:{user.data_version}']
+    with QueryCounter(db.engine) as counter:
+        assert len(stocks()) == 1
+    assert not any('UNION ALL' in sql for sql in counter.statements)
+
+    # Every write path bumps the data version, so the next read misses
+    client.post('/api/users/stocks', data=json.dumps({'symbol': 'MSFT', 'quantity': 2}),
+                content_type='application/json', headers=headers)
+    assert len(stocks()) == 2
+    client.post('/api/users/assets/batch', data=json.dumps({'assets': [{'type': 'stocks', 'symbol': 'TSLA', 'quantity': 1}]}),
+                content_type='application/json', headers=headers)
+    assert len(stocks()) == 3
+    client.post('/api/users/stocks/import?format=ndjson', data=b'{"symbol": "NVDA", "quantity": 4}\n', headers=headers)
+    assert len(stocks()) == 4
+    ids = [stock['id'] for stock in stocks()]
+    client.patch('/api/users/stocks/bulk', data=json.dumps({'ids': ids[:1], 'values': {'quantity': 99}}),
+                 content_type='application/json', headers=headers)
+    assert stocks()[0]['quantity'] == 99
+    client.delete(f'/api/users/stocks/bulk?ids={ids[-1]}', headers=headers)
+    assert len(stocks()) == 3
+
+    # A rolled-back write leaves the version, and so the entry, alone
+    db.session.add(Stock(symbol='GME', quantity=1, user_id=user.id))
+    db.session.flush()
+    db.session.rollback()
+    assert portfolio_cache.redis.data
+
+    stats = portfolio_cache.stats.snapshot()
+    assert (stats['hits'], stats['misses']) == (2, 6)
+    assert stats['latency']['hit']['count'] == 2
+
+
+def test_portfolio_reads_do_not_join_earlier_loads(app):
+    # A load that began before a write must not be shared with a read issued after it
+    started, release = threading.Event(), threading.Event()
+
+    def pre_write_load():
+        started.set()
+        release.wait(5)
+        return {'stocks': ['old']}
+
+    def read_before_write():
+        with app.app_context():
+            portfolio_cache.get_or_load('42', pre_write_load)
+
+    thread = threading.Thread(target=read_before_write)
+    thread.start()
+    started.wait(5)
+    try:
+        assert portfolio_cache.get_or_load('42', lambda: {'stocks': ['new']}) == {'stocks': ['new']}
+    finally:
+        release.set()
+        thread.join(5)
+    assert portfolio_cache.stats.snapshot()['coalesced'] == 0
+
+
+def test_get_all_assets_never_serves_pre_write_payload(app, client, init_db):
+    # A read that loaded before a write stores its payload under the old version only
+    user = User.query.filter_by(username='testuser').first()
+    headers = get_auth_headers(user)
+    portfolio_cache.set(f'{user.id}:{user.data_version}', {'stocks': ['stale']})
+
+    client.post('/api/users/stocks', data=json.dumps({'symbol': 'MSFT', 'quantity': 2}),
+                content_type='application/json', headers=headers)
+    response = client.get('/api/users/assets', headers=headers)
+    assert len(response.get_json()['message']['stocks']) == 2
+
+    response = client.get('/api/users/assets', headers={**headers, 'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+
+def test_get_all_assets_cache_falls_back_to_local(app, client, init_db):
+    portfolio_cache.redis = FakeRedis()
+    portfolio_cache.redis.down = True
+    user = User.query.filter_by(username='testuser').first()
+    headers = get_auth_headers(user)
+
+    client.get('/api/users/assets', headers=headers)
+    response = client.get('/api/users/assets', headers=headers)
+    assert response.get_json()['message']['stocks'][0]['symbol'] == 'AAPL'
+    stats = portfolio_cache.stats.snapshot()
+    assert (stats['hits'], stats['misses'], stats['errors']) == (1, 1, 1)
+    assert portfolio_cache.backend_name() == 'local'
+
+    client.post('/api/users/stocks', data=json.dumps({'symbol': 'MSFT', 'quantity': 2}),
+                content_type='application/json', headers=headers)
+    assert len(client.get('/api/users/assets', headers=headers).get_json()['message']['stocks']) == 2
@@ -0,0 +1,524 @@
+# tests/test_crypto_logo.py
+
+import pytest
+import json
+import requests
+import time
+import fnmatch
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from app import create_app, db
+from app.extensions import celery
+from app.tasks import refresh_market_snapshot
+from app.utils.helpers import market_data_helpers
+from app.utils.helpers.http_helpers import HttpClient, CircuitBreaker, CircuitOpenError, reset_http_clients
+from app.utils.middleware import ping_url
+from app.utils.helpers.market_data_helpers import market_cache, snapshot_reader, RedisSnapshotStore
+from app.utils.helpers.cache_helpers import ReadThroughCache, CACHES
+
+
+MARKETS = [
+    {'id': coin_id, 'name': coin_id.title(), 'symbol': symbol, 'current_price': price,
+     'image': f'https://assets.coingecko.com/coins/images/{n}/large/{coin_id}.png'}
+    for n, (coin_id, symbol, price) in enumerate([
+        ('bitcoin', 'btc', 64000.0), ('ethereum', 'eth', 3000.0), ('tether', 'usdt', 1.0),
+        ('solana', 'sol', 150.0), ('ripple', 'xrp', 0.5),
+    ], start=1)
+]
+
+
+class StubCoinGecko(BaseHTTPRequestHandler):
+    '''
+    Serves a canned /coins/markets over keep-alive connections and records the
+    queries it receives and the client port each one arrived on.
+    '''
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        server.requests.append(query)
+        server.ports.append(self.client_address[1])
+        time.sleep(server.delay)
+        if server.status != 200:
+            body, status = {'error': 'upstream failure'}, server.status
+        elif 'ids' in query:
+            wanted = query['ids'].split(',')
+            body, status = [market for market in MARKETS if market['id'] in wanted], 200
+        else:
+            per_page, page = int(query.get('per_page', 100)), int(query.get('page', 1))
+            body, status = MARKETS[(page - 1) * per_page:page * per_page], 200
+        self._reply(status, body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.server.posts.append(json.loads(self.rfile.read(length)))
+        self._reply(self.server.status, {})
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeRedis:
+    '''In-process stand-in for the subset of the Redis client the caches use.'''
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        with self.lock:
+            if nx and key in self.data:
+                return None
+            self.data[key] = value.encode() if isinstance(value, str) else value
+            return True
+
+    def eval(self, script, numkeys, key, token):
+        # Only the load-lock release script is used: compare-and-delete
+        with self.lock:
+            if self.data.get(key) == token.encode():
+                return self.delete(key)
+            return 0
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def scan_iter(self, match='*'):
+        return [key for key in list(self.data) if fnmatch.fnmatch(key, match)]
+
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubCoinGecko)
+    server.requests, server.ports, server.posts, server.status, server.delay = [], [], [], 200, 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def app(upstream, tmp_path):
+    app = create_app('testing')
+    app.config['COINGECKO_API_URL'] = f'http://127.0.0.1:{upstream.server_port}'
+    app.config['MARKET_SNAPSHOT_PATH'] = str(tmp_path / 'market_snapshot.json')
+    # Single attempts and no breaker unless a test opts in, so upstream call counts stay exact.
+    # Most tests exercise the upstream path; snapshot-only serving is tested on its own.
+    app.config.update(HTTP_RETRIES=0, HTTP_BACKOFF=0, HTTP_BREAKER_THRESHOLD=1000, MARKET_UPSTREAM_FALLBACK=True)
+    with app.app_context():
+        db.create_all()
+        market_cache.clear()
+        snapshot_reader.clear()
+        reset_http_clients()
+        yield app
+        reset_http_clients()
+        market_cache.redis = None
+        market_cache.clear()
+        snapshot_reader.clear()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def eager_celery():
+    # Run tasks in-process against the in-memory broker instead of Redis
+    previous = {key: celery.conf[key] for key in ('broker_url', 'task_always_eager', 'task_eager_propagates')}
+    celery.conf.update(broker_url='memory://', task_always_eager=True, task_eager_propagates=True)
+    yield celery
+    celery.conf.update(previous)
+
+
+def test_get_crypto_logo(client, upstream):
+    response = client.get('/api/crypto/bitcoin')
+    assert response.status_code == 200
+    assert response.get_json() == {
+        'id': 'bitcoin', 'name': 'Bitcoin', 'symbol': 'btc', 'current_price': 64000.0,
+        'logo_url': 'https://assets.coingecko.com/coins/images/bitcoin/bitcoin.png',
+    }
+
+    response = client.get('/api/crypto/dogecoin')
+    assert response.status_code == 404
+
+
+def test_market_responses_cached_by_normalized_params(client, upstream):
+    first = client.get('/api/cryptos?per_page=2&page=1')
+    assert [coin['id'] for coin in first.get_json()] == ['bitcoin', 'ethereum']
+    assert first.get_json()[0]['logo_url'] == MARKETS[0]['image']
+
+    # Same query with different spelling, then the same coin in different case
+    assert client.get('/api/cryptos?page=1&per_page=02&vs_currency=USD').get_json() == first.get_json()
+    client.get('/api/crypto/bitcoin')
+    client.get('/api/crypto/BitCoin')
+    assert len(upstream.requests) == 2
+
+    client.get('/api/cryptos?per_page=2&page=2')
+    assert len(upstream.requests) == 3
+
+    stats = market_cache.stats.snapshot()
+    assert (stats['hits'], stats['misses']) == (2, 3)
+    assert stats['latency']['load']['count'] == 3
+
+    response = client.get('/api/cryptos?per_page=1000')
+    assert response.status_code == 400
+    assert len(upstream.requests) == 3
+
+
+def test_upstream_errors_not_cached(client, upstream):
+    upstream.status = 429
+    response = client.get('/api/crypto/bitcoin')
+    assert response.status_code == 429
+    assert response.get_json() == {'error': 'Unable to fetch data from the API'}
+
+    upstream.status = 200
+    assert client.get('/api/crypto/bitcoin').status_code == 200
+    assert len(upstream.requests) == 2
+
+
+def test_redis_tier_shared_between_workers(client, upstream):
+    market_cache.redis = FakeRedis()
+    client.get('/api/crypto/ethereum')
+    assert len(market_cache.redis.data) == 1
+
+    # A worker with an empty local tier is served from Redis, then locally
+    market_cache._local = None
+    assert client.get('/api/crypto/ethereum').get_json()['symbol'] == 'eth'
+    market_cache.redis.data.clear()
+    assert client.get('/api/crypto/ethereum').status_code == 200
+    assert len(upstream.requests) == 1
+
+
+def test_routes_served_from_market_snapshot(app, client, upstream, eager_celery, monkeypatch):
+    monkeypatch.setattr(market_data_helpers, 'SNAPSHOT_PAGE_SIZE', 2)
+    app.config['MARKET_SNAPSHOT_SIZE'] = 4
+    result = refresh_market_snapshot.delay().get()
+    assert result['markets'] == 4
+    assert [query['page'] for query in upstream.requests] == ['1', '2']
+
+    # Upstream is down, but everything the snapshot covers is still served
+    upstream.status, upstream.requests = 500, []
+    response = client.get('/api/cryptos?per_page=2&page=2')
+    assert [coin['id'] for coin in response.get_json()] == ['tether', 'solana']
+    assert client.get('/api/crypto/Solana').get_json()['current_price'] == 150.0
+    assert client.get('/api/cryptos?per_page=4').status_code == 200
+    assert upstream.requests == []
+
+    # Coins and pages outside it fall back to upstream
+    assert client.get('/api/crypto/ripple').status_code == 500
+    assert client.get('/api/cryptos?per_page=3&page=2').status_code == 500
+    assert client.get('/api/crypto/bitcoin?vs_currency=eur').status_code == 500
+    assert len(upstream.requests) == 3
+
+    # A failed refresh keeps the previous snapshot
+    with pytest.raises(Exception):
+        refresh_market_snapshot.apply(throw=True).get()
+    assert client.get('/api/crypto/bitcoin').status_code == 200
+
+    # A new snapshot replaces the old one; an expired one is not used
+    upstream.status = 200
+    monkeypatch.setitem(MARKETS[0], 'current_price', 65000.0)
+    refresh_market_snapshot.delay().get()
+    assert client.get('/api/crypto/bitcoin').get_json()['current_price'] == 65000.0
+    app.config['MARKET_SNAPSHOT_MAX_AGE'] = -1
+    upstream.requests = []
+    client.get('/api/crypto/tether')
+    assert len(upstream.requests) == 1
+
+
+def test_routes_never_call_upstream_without_fallback(app, client, upstream, eager_celery):
+    app.config['MARKET_UPSTREAM_FALLBACK'] = False
+    # Before the first snapshot there is nothing to serve
+    assert client.get('/api/crypto/bitcoin').status_code == 503
+    assert client.get('/api/crypto?ids=bitcoin').status_code == 503
+
+    app.config['MARKET_SNAPSHOT_SIZE'] = 3
+    refresh_market_snapshot.delay().get()
+    upstream.requests = []
+
+    assert client.get('/api/crypto/ethereum').get_json()['symbol'] == 'eth'
+    assert client.get('/api/crypto/solana').status_code == 404
+    assert [coin['id'] for coin in client.get('/api/cryptos?per_page=2&page=2').get_json()] == ['tether']
+    assert client.get('/api/cryptos?per_page=2&page=3').status_code == 404
+    assert client.get('/api/crypto/bitcoin?vs_currency=eur').status_code == 400
+    assert client.get('/api/crypto?ids=bitcoin,solana').get_json() == {
+        'bitcoin': client.get('/api/crypto/bitcoin').get_json(), 'solana': None,
+    }
+
+    # An expired snapshot is still served rather than waiting on upstream
+    app.config['MARKET_SNAPSHOT_MAX_AGE'] = -1
+    assert client.get('/api/crypto/tether').status_code == 200
+    assert upstream.requests == []
+
+
+def test_redis_snapshot_store_swaps_versions():
+    store = RedisSnapshotStore(FakeRedis())
+    assert store.token() is None
+    store.write({'version': 1, 'markets': ['old']})
+    first = store.token()
+    store.write({'version': 2, 'markets': ['new']})
+    assert store.token() != first
+    assert store.read(store.token())['markets'] == ['new']
+    # Readers still holding the previous version can finish reading it
+    assert store.read(first)['markets'] == ['old']
+
+
+def test_upstream_calls_reuse_pooled_connections(client, upstream):
+    client.get('/api/crypto/bitcoin')
+    client.get('/api/crypto/ethereum')
+    client.get('/api/cryptos?per_page=2&page=2')
+    assert len(upstream.requests) == 3
+    # All three went over the same keep-alive connection
+    assert len(set(upstream.ports)) == 1
+
+
+def test_upstream_read_timeout(app, client, upstream):
+    app.config['HTTP_READ_TIMEOUT'] = 0.1
+    upstream.delay = 0.5
+    response = client.get('/api/crypto/bitcoin')
+    assert response.status_code == 502
+    assert response.get_json() == {'error': 'Unable to fetch data from the API'}
+
+
+def test_http_client_retries_idempotent_calls(upstream):
+    http = HttpClient('stub', retries=2, backoff=0)
+    url = f'http://127.0.0.1:{upstream.server_port}/coins/markets'
+    upstream.status = 503
+    assert http.get(url).status_code == 503
+    assert len(upstream.requests) == 3
+
+    # Non-idempotent calls are sent once
+    assert http.post(url, json={'url': 'x'}).status_code == 503
+    assert len(upstream.posts) == 1
+
+    upstream.status = 200
+    assert http.get(url, params={'ids': 'bitcoin'}).json()[0]['id'] == 'bitcoin'
+    assert len(upstream.requests) == 4
+    http.close()
+
+
+def test_circuit_breaker_fails_fast_and_recovers(app, client, upstream):
+    app.config.update(HTTP_BREAKER_THRESHOLD=2, HTTP_BREAKER_RESET=0.2)
+    upstream.status = 500
+    assert client.get('/api/crypto/bitcoin').status_code == 500
+    assert client.get('/api/crypto/ethereum').status_code == 500
+
+    # Open: refused without calling upstream
+    response = client.get('/api/crypto/tether')
+    assert response.status_code == 503
+    assert response.get_json() == {'error': 'Market data is temporarily unavailable'}
+    assert len(upstream.requests) == 2
+
+    # After the reset timeout one trial call is let through and closes the circuit
+    time.sleep(0.25)
+    upstream.status = 200
+    assert client.get('/api/crypto/tether').status_code == 200
+    assert client.get('/api/crypto/solana').status_code == 200
+    assert len(upstream.requests) == 4
+
+
+def test_circuit_breaker_reopens_on_failed_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow() and breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_circuit_breaker_settles_after_non_connection_error(monkeypatch):
+    http = HttpClient('stub', retries=0, failure_threshold=1, reset_timeout=0)
+    errors = [requests.ConnectionError('refused'), requests.exceptions.ChunkedEncodingError('cut short')]
+
+    def fail(*args, **kwargs):
+        raise errors.pop(0)
+
+    monkeypatch.setattr(http.session, 'request', fail)
+    with pytest.raises(requests.ConnectionError):
+        http.get('http://stub.invalid')
+    assert http.breaker.state == CircuitBreaker.OPEN
+
+    # The half-open trial fails with an error that is not retried; the breaker re-opens
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        http.get('http://stub.invalid')
+    assert http.breaker.state == CircuitBreaker.OPEN
+
+    ok = requests.Response()
+    ok.status_code = 200
+    monkeypatch.setattr(http.session, 'request', lambda *args, **kwargs: ok)
+    assert http.get('http://stub.invalid').status_code == 200
+    assert http.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_ping_url_uses_http_client(app, upstream):
+    app.config['PING_RECEIVER_URL'] = f'http://127.0.0.1:{upstream.server_port}/receive-url'
+    app.config['API_DOMAIN_NAME'] = 'https://api.vasset.test'
+    with app.test_request_context('/'):
+        ping_url()
+    assert upstream.posts == [{'url': 'https://api.vasset.test'}]
+
+    # An unreachable receiver is logged, not raised
+    app.config['PING_RECEIVER_URL'] = 'http://127.0.0.1:9/receive-url'
+    with app.test_request_context('/'):
+        ping_url()
+
+
+def test_batch_quotes_fetch_only_misses_in_one_call(client, upstream):
+    assert client.get('/api/crypto/bitcoin').status_code == 200
+
+    response = client.get('/api/crypto?ids=solana,Bitcoin,ethereum,solana,dogecoin')
+    assert response.status_code == 200
+    quotes = response.get_json()
+    assert set(quotes) == {'bitcoin', 'ethereum', 'solana', 'dogecoin'}
+    assert quotes['solana'] == {
+        'id': 'solana', 'name': 'Solana', 'symbol': 'sol', 'current_price': 150.0,
+        'logo_url': 'https://assets.coingecko.com/coins/images/solana/solana.png',
+    }
+    assert quotes['dogecoin'] is None
+    # bitcoin came from the cache; the other three from a single upstream call
+    assert len(upstream.requests) == 2
+    assert upstream.requests[1]['ids'] == 'dogecoin,ethereum,solana'
+
+    # The entries are shared with the single-coin route, unknown ids included
+    assert client.get('/api/crypto/ethereum').get_json() == quotes['ethereum']
+    assert client.get('/api/crypto/dogecoin').status_code == 404
+    assert client.get('/api/crypto?ids=ethereum,dogecoin').get_json() == {
+        'ethereum': quotes['ethereum'], 'dogecoin': None,
+    }
+    assert len(upstream.requests) == 2
+
+
+def test_batch_quotes_chunked_and_validated(client, upstream, monkeypatch):
+    monkeypatch.setattr(market_data_helpers, 'QUOTE_CHUNK_SIZE', 2)
+    quotes = client.get('/api/crypto?ids=bitcoin,ethereum,tether,solana,ripple').get_json()
+    assert all(quotes.values()) and len(quotes) == 5
+    assert [query['ids'] for query in upstream.requests] == ['bitcoin,ethereum', 'ripple,solana', 'tether']
+
+    assert client.get('/api/crypto').status_code == 400
+    assert client.get('/api/crypto?ids=,').status_code == 400
+    monkeypatch.setattr(market_data_helpers, 'MAX_QUOTE_IDS', 2)
+    assert client.get('/api/crypto?ids=a,b,c').status_code == 400
+
+    upstream.status = 500
+    assert client.get('/api/crypto?ids=cardano').status_code == 500
+
+
+def test_batch_quotes_use_snapshot_and_redis(app, client, upstream, eager_celery):
+    app.config['MARKET_SNAPSHOT_SIZE'] = 2
+    refresh_market_snapshot.delay().get()
+    market_cache.redis = FakeRedis()
+    upstream.requests = []
+
+    quotes = client.get('/api/crypto?ids=bitcoin,ethereum,tether').get_json()
+    assert quotes['bitcoin']['current_price'] == 64000.0
+    assert [query['ids'] for query in upstream.requests] == ['tether']
+
+    market_cache._local = None
+    assert client.get('/api/crypto?ids=tether,ethereum').get_json()['tether'] == quotes['tether']
+    assert len(upstream.requests) == 1
+
+
+def concurrently(app, count, call):
+    # Starts `count` threads on a barrier so they all miss at the same instant
+    barrier, results = threading.Barrier(count), [None] * count
+
+    def run(position):
+        with app.app_context():
+            barrier.wait()
+            results[position] = call(position)
+
+    threads = [threading.Thread(target=run, args=(position,)) for position in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_concurrent_misses_coalesced_into_one_fetch(app, upstream):
+    upstream.delay = 0.3
+    responses = concurrently(app, 12, lambda _: app.test_client().get('/api/crypto/bitcoin?vs_currency=eur'))
+    assert [response.status_code for response in responses] == [200] * 12
+    assert len({json.dumps(response.get_json()) for response in responses}) == 1
+    assert len(upstream.requests) == 1
+
+    stats = market_cache.stats.snapshot()
+    assert (stats['misses'], stats['hits'], stats['coalesced']) == (1, 11, 11)
+
+    # Waiters share the leader's failure too, which is not cached
+    upstream.status = 429
+    responses = concurrently(app, 6, lambda _: app.test_client().get('/api/crypto/ethereum?vs_currency=eur'))
+    assert [response.status_code for response in responses] == [429] * 6
+    assert len(upstream.requests) == 2
+    upstream.status, upstream.delay = 200, 0
+    assert app.test_client().get('/api/crypto/ethereum?vs_currency=eur').status_code == 200
+    assert len(upstream.requests) == 3
+
+
+def test_redis_lock_coalesces_loads_across_workers(app):
+    shared, loads = FakeRedis(), []
+    # Two workers: separate in-process state, one Redis
+    workers = [ReadThroughCache('coalesce-test', 'MARKET_CACHE_TTL', 'MARKET_CACHE_SIZE') for _ in range(2)]
+    for worker in workers:
+        worker.redis = shared
+
+    def slow_load():
+        loads.append(1)
+        time.sleep(0.3)
+        return {'price': 1.0}
+
+    try:
+        results = concurrently(app, 8, lambda position: workers[position % 2].get_or_load('ripple', slow_load))
+        assert results == [{'price': 1.0}] * 8
+        assert len(loads) == 1
+        assert list(shared.data) == ['vasset:cache:coalesce-test:ripple']
+    finally:
+        CACHES.pop('coalesce-test', None)
+
+
+def test_load_lock_outlives_upstream_call_and_is_released_only_by_holder(app):
+    shared = FakeRedis()
+    expiries = []
+    original_set = shared.set
+
+    def recording_set(key, value, ex=None, px=None, nx=False):
+        if nx:
+            expiries.append(px / 1000)
+        return original_set(key, value, ex=ex, px=px, nx=nx)
+
+    shared.set = recording_set
+    market_cache.redis = shared
+    app.config.update(HTTP_RETRIES=2, HTTP_CONNECT_TIMEOUT=3.05, HTTP_READ_TIMEOUT=10, HTTP_MAX_BACKOFF=4)
+    reset_http_clients()
+    lock_key = 'vasset:cache-lock:markets:stolen'
+
+    def load_while_lock_is_taken_over():
+        # The lock expired mid-load and another worker took it
+        shared.data[lock_key] = b'other-worker'
+        return {'price': 1.0}
+
+    assert market_cache.get_or_load('stolen', load_while_lock_is_taken_over) == {'price': 1.0}
+    assert expiries == [pytest.approx(3 * 13.05 + 2 * 4 + 1)]
+    assert shared.data[lock_key] == b'other-worker'
@@ -0,0 +1,284 @@
+# tests/test_portfolio.py
+
+import pytest
+import json
+import numpy as np
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from datetime import date
+from app.models import User, Profile, Stock, RealEstate, Crypto, NetWorthSnapshot, PortfolioSummary
+from app.extensions import celery
+from app.tasks import snapshot_net_worth
+from app.utils.helpers.valuation_helpers import revalue_all_users
+from app.utils.helpers.price_history_helpers import PriceHistoryStore
+from app.utils.helpers.net_worth_helpers import end_of_day
+from app.utils.helpers.portfolio_helpers import record_assets_added
+from app.utils.helpers.fx_helpers import FxRates, fx_cache
+from flask_jwt_extended import create_access_token
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        fx_cache.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def init_db(app):
+    with app.app_context():
+        # Create two users with valuable holdings
+        user = User(email='testuser@example.com', username='testuser', password='testpassword')
+        other = User(email='other@example.com', username='other', password='testpassword')
+        db.session.add_all([user, other])
+        db.session.commit()
+        db.session.add_all([
+            Stock(symbol='aapl', quantity=10, user_id=user.id),
+            Stock(symbol='XYZ', quantity=5, user_id=user.id),
+            Crypto(symbol='BTC', amount=0.5, user_id=user.id),
+            RealEstate(address='1 Main Street', value=1000.0, user_id=user.id),
+            Stock(symbol='AAPL', quantity=1, user_id=other.id),
+        ])
+        db.session.commit()
+
+
+@pytest.fixture
+def eager_celery():
+    # Run tasks in-process against the in-memory broker instead of Redis
+    previous = {key: celery.conf[key] for key in ('broker_url', 'task_always_eager', 'task_eager_propagates')}
+    celery.conf.update(broker_url='memory://', task_always_eager=True, task_eager_propagates=True)
+    yield celery
+    celery.conf.update(previous)
+
+
+@pytest.fixture
+def price_history(app, tmp_path):
+    app.config['PRICE_HISTORY_DIR'] = str(tmp_path / 'prices')
+    store = PriceHistoryStore(app.config['PRICE_HISTORY_DIR'])
+    closes = end_of_day(date(2024, 1, 1))
+    store.append('AAPL', [closes - 3600, closes + 3600], [100.0, 999.0])
+    store.append('BTC', [closes - 86400 * 40], [2000.0])
+    return store
+
+
+def get_auth_headers(user):
+    access_token = create_access_token(identity=user.id)
+    return {'Authorization': f'Bearer {access_token}'}
+
+
+PRICES = {'stocks': {'AAPL': 100.0}, 'cryptos': {'btc': 2000.0}}
+
+
+def test_portfolio_value(client, init_db):
+    user = User.query.filter_by(username='testuser').first()
+    response = client.post('/api/users/portfolio/value', data=json.dumps({'prices': PRICES}),
+                           content_type='application/json', headers=get_auth_headers(user))
+    assert response.status_code == 200
+
+    portfolio = response.get_json()['portfolio']
+    assert portfolio['total_value'] == 3000.0
+    assert portfolio['unpriced_symbols'] == ['XYZ']
+    assert portfolio['allocation'] == pytest.approx({'stocks': 1 / 3, 'cryptos': 1 / 3, 'real_estates': 1 / 3})
+
+    values = {(p['type'], p['symbol']): p['value'] for p in portfolio['positions']}
+    assert values[('stocks', 'aapl')] == 1000.0
+    assert values[('stocks', 'XYZ')] is None
+    assert values[('cryptos', 'BTC')] == 1000.0
+    assert values[('real_estates', '1 Main Street')] == 1000.0
+
+
+def test_portfolio_value_in_profile_currency(app, client, init_db):
+    user = User.query.filter_by(username='testuser').first()
+    db.session.add(Profile(vasset_user_id=user.id, currency_code='EUR'))
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=['load-fx-rates', '--stub'])
+    assert 'Stored 8 exchange rates' in result.output
+
+    response = client.post('/api/users/portfolio/value', data=json.dumps({'prices': PRICES}),
+                           content_type='application/json', headers=get_auth_headers(user))
+    portfolio = response.get_json()['portfolio']
+    assert portfolio['currency'] == 'EUR'
+    assert portfolio['total_value'] == pytest.approx(2760.0)
+    values = {(p['type'], p['symbol']): (p['price'], p['value']) for p in portfolio['positions']}
+    assert values[('stocks', 'aapl')] == pytest.approx((92.0, 920.0))
+    assert values[('stocks', 'XYZ')] == (None, None)
+    assert portfolio['allocation']['stocks'] == pytest.approx(1 / 3)
+
+
+@pytest.mark.parametrize('path, helper', [
+    ('/api/users/portfolio/value', 'portfolio_valuation'),
+    ('/api/users/portfolio/summary', 'to_user_currency'),
+    ('/api/users/portfolio/history', 'net_worth_history'),
+])
+def test_portfolio_reads_report_database_errors(client, init_db, monkeypatch, path, helper):
+    def fail(*args, **kwargs):
+        raise OperationalError('SELECT 1', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(f'app.views.portfolio.{helper}', fail)
+    response = client.get(path, headers=get_auth_headers(User.query.first()))
+    assert response.status_code == 500
+    assert response.get_json()['error'] == 'database is locked'
+
+
+def test_fx_rates_matrix():
+    rates = FxRates({'EUR': 0.5, 'NGN': 1000.0})
+    assert rates.codes.tolist() == ['EUR', 'NGN', 'USD']
+    converted = rates.convert([1.0, 2.0, 3.0, 4.0], 'NGN', from_codes=['USD', 'EUR', 'NGN', 'XXX'])
+    assert converted[:3].tolist() == [1000.0, 4000.0, 3.0]
+    assert np.isnan(converted[3])
+    assert rates.convert([10.0, 10.0], ['EUR', 'GBP']).tolist()[0] == 5.0
+
+
+def test_portfolio_value_rejects_bad_snapshot(client, init_db):
+    user = User.query.filter_by(username='testuser').first()
+    response = client.post('/api/users/portfolio/value', data=json.dumps({'prices': {'stocks': 5}}),
+                           content_type='application/json', headers=get_auth_headers(user))
+    assert response.status_code == 400
+
+
+def test_revalue_all_users(init_db):
+    totals = {}
+    for user_ids, chunk_totals in revalue_all_users(PRICES, chunk_size=1):
+        totals.update(zip(user_ids.tolist(), chunk_totals.tolist()))
+
+    assert totals == {1: 3000.0, 2: 100.0}
+
+
+def test_portfolio_summary_tracks_adds(client, init_db):
+    user = User.query.filter_by(username='testuser').first()
+    headers = get_auth_headers(user)
+
+    response = client.get('/api/users/portfolio/summary', headers=headers)
+    assert response.get_json()['summary']['counts']['stocks'] == 0
+
+    client.post('/api/users/stocks', data=json.dumps({'symbol': 'MSFT', 'quantity': 2}),
+                content_type='application/json', headers=headers)
+    client.post('/api/users/real_estates', data=json.dumps({'address': '2 Side Road', 'value': 500}),
+                content_type='application/json', headers=headers)
+    client.post('/api/users/cryptos/import?format=ndjson', data=b'{"symbol": "btc", "amount": 0.25}\n', headers=headers)
+
+    summary = client.get('/api/users/portfolio/summary', headers=headers).get_json()['summary']
+    assert summary['counts']['stocks'] == 1
+    assert summary['counts']['real_estates'] == 1
+    assert summary['real_estate_value'] == 500.0
+    assert summary['crypto_amounts'] == {'BTC': 0.25}
+
+
+def test_portfolio_summary_in_profile_currency(app, client, init_db, tmp_path):
+    user = User.query.filter_by(username='testuser').first()
+    db.session.add(Profile(vasset_user_id=user.id, currency_code='EUR'))
+    db.session.commit()
+    app.test_cli_runner().invoke(args=['load-fx-rates', '--stub'])
+    headers = get_auth_headers(user)
+    client.post('/api/users/real_estates', data=json.dumps({'address': '2 Side Road', 'value': 500}),
+                content_type='application/json', headers=headers)
+    client.post('/api/users/cryptos/import?format=ndjson', data=b'{"symbol": "btc", "amount": 0.25}\n', headers=headers)
+
+    response = client.get('/api/users/portfolio/summary', headers=headers)
+    summary = response.get_json()['summary']
+    assert summary['currency'] == 'EUR'
+    assert summary['real_estate_value'] == pytest.approx(460.0)
+    # Coin quantities are not money and stay as stored
+    assert summary['crypto_amounts'] == {'BTC': 0.25}
+
+    # New rates change the body without a data change, so the ETag must not match
+    etag = response.headers['ETag']
+    assert client.get('/api/users/portfolio/summary', headers={**headers, 'If-None-Match': etag}).status_code == 304
+    rates = tmp_path / 'rates.csv'
+    rates.write_text('currency,rate\nEUR,0.5\n')
+    app.test_cli_runner().invoke(args=['load-fx-rates', '--file', str(rates)])
+    response = client.get('/api/users/portfolio/summary', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['summary']['real_estate_value'] == pytest.approx(250.0)
+
+
+def test_summary_created_by_concurrent_first_write(app, init_db, monkeypatch):
+    user = User.query.filter_by(username='testuser').first()
+    db.session.query(PortfolioSummary).delete()
+    db.session.commit()
+    get = db.session.get
+
+    def racing_get(model, ident, **kwargs):
+        # Another request creates the row right after this one saw none
+        monkeypatch.setattr(db.session, 'get', get)
+        db.session.execute(PortfolioSummary.__table__.insert().values(user_id=ident, stocks_count=3, crypto_amounts={}))
+        return None
+
+    monkeypatch.setattr(db.session, 'get', racing_get)
+    record_assets_added(user.id, 'stocks', [Stock(symbol='MSFT', quantity=1)])
+    db.session.commit()
+    assert db.session.get(PortfolioSummary, user.id).stocks_count == 4
+
+
+def test_rebuild_locks_summary_before_aggregating(app, client, init_db, monkeypatch):
+    user = User.query.filter_by(username='testuser').first()
+    stock = Stock.query.filter_by(user_id=user.id).first()
+    execute, statements = db.session.execute, []
+
+    def recording_execute(statement, *args, **kwargs):
+        statements.append(statement)
+        return execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db.session, 'execute', recording_execute)
+    client.delete(f'/api/users/stocks/bulk?ids={stock.id}', headers=get_auth_headers(user))
+    monkeypatch.undo()
+
+    selects = [st for st in statements if getattr(st, 'is_select', False)]
+    locks = [i for i, st in enumerate(selects) if st._for_update_arg is not None]
+    aggregates = [i for i, st in enumerate(selects) if st._group_by_clauses]
+    assert locks and aggregates and locks[0] < aggregates[0]
+    assert db.session.get(PortfolioSummary, user.id).stocks_count == 1
+
+
+def test_rebuild_portfolio_summaries(app, client, init_db):
+    result = app.test_cli_runner().invoke(args=['rebuild-portfolio-summary'])
+    assert 'Rebuilt 2 portfolio summaries' in result.output
+
+    user = User.query.filter_by(username='testuser').first()
+    summary = client.get('/api/users/portfolio/summary', headers=get_auth_headers(user)).get_json()['summary']
+    assert summary['counts'] == {'stocks': 2, 'real_estates': 1, 'businesses': 0, 'cryptos': 1,
+                                 'nfts': 0, 'social_media': 0, 'youtube': 0}
+    assert summary['real_estate_value'] == 1000.0
+    assert summary['crypto_amounts'] == {'BTC': 0.5}
+
+    # Rebuilding twice replaces the rows rather than duplicating them
+    result = app.test_cli_runner().invoke(args=['rebuild-portfolio-summary', '--user-id', str(user.id)])
+    assert 'Rebuilt 1 portfolio summaries' in result.output
+
+
+def test_snapshot_net_worth_task(app, client, init_db, price_history, eager_celery, monkeypatch):
+    assert snapshot_net_worth.delay('2024-01-01').get() == 2
+    rows = {row.user_id: row.value for row in NetWorthSnapshot.query.filter_by(day=date(2024, 1, 1))}
+    assert rows == {1: 3000.0, 2: 100.0}
+
+    # Rerunning a finished day writes nothing
+    assert snapshot_net_worth.delay('2024-01-01').get() == 0
+    assert NetWorthSnapshot.query.count() == 2
+
+    # A run interrupted after the first user resumes with the rest
+    NetWorthSnapshot.query.filter_by(user_id=2).delete()
+    monkeypatch.setitem(app.config, 'NET_WORTH_CHUNK_SIZE', 1)
+    assert snapshot_net_worth.delay('2024-01-01').get() == 1
+    assert snapshot_net_worth.delay('2024-01-01', restart=True).get() == 2
+    assert NetWorthSnapshot.query.count() == 2
+
+    user = User.query.filter_by(username='testuser').first()
+    headers = get_auth_headers(user)
+    response = client.get('/api/users/portfolio/history', headers=headers)
+    assert response.get_json()['history'] == [{'day': '2024-01-01', 'value': 3000.0}]
+    assert response.get_json()['currency'] == 'USD'
+
+    response = client.get('/api/users/portfolio/history?start=2024-01-02', headers=headers)
+    assert response.get_json()['history'] == []
+
+    response = client.get('/api/users/portfolio/history?start=yesterday', headers=headers)
+    assert response.status_code == 400
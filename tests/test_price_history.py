@@ -0,0 +1,158 @@
+# tests/test_price_history.py
+
+import pytest
+import numpy as np
+from datetime import datetime, timezone
+from app import create_app, db
+from app.models import User, Stock, Crypto
+from app.utils.helpers.price_history_helpers import PriceHistoryStore, StubPriceProvider, ingest_from_provider
+from flask_jwt_extended import create_access_token
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing')
+    app.config['PRICE_HISTORY_DIR'] = str(tmp_path / 'prices')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def init_db(app):
+    with app.app_context():
+        # Create a test user holding one stock and one crypto
+        user = User(email='testuser@example.com', username='testuser', password='testpassword')
+        db.session.add(user)
+        db.session.commit()
+        db.session.add_all([Stock(symbol='aapl', quantity=1, user_id=user.id),
+                            Crypto(symbol='BTC', amount=1, user_id=user.id)])
+        db.session.commit()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceHistoryStore(str(tmp_path / 'store'))
+
+
+def get_auth_headers(user):
+    access_token = create_access_token(identity=user.id)
+    return {'Authorization': f'Bearer {access_token}'}
+
+
+def epoch(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+def test_append_merges_and_dedupes(store):
+    store.append('aapl', [epoch(2024, 1, 2), epoch(2024, 1, 1)], [2.0, 1.0])
+    store.append('AAPL', [epoch(2024, 1, 2), epoch(2024, 2, 1)], [5.0, 3.0])
+
+    ts, prices = store.range('AAPL', epoch(2024, 1, 1), epoch(2024, 3, 1))
+    assert ts.tolist() == [epoch(2024, 1, 1), epoch(2024, 1, 2), epoch(2024, 2, 1)]
+    assert prices.tolist() == [1.0, 5.0, 3.0]
+    assert sorted(name for name in store.symbols()) == ['AAPL']
+
+    # Range end is exclusive and only the requested months are read
+    ts, _ = store.range('AAPL', epoch(2024, 1, 2), epoch(2024, 2, 1))
+    assert ts.tolist() == [epoch(2024, 1, 2)]
+    assert store.latest('AAPL', epoch(2024, 1, 20)) == 5.0
+    assert store.latest('AAPL', epoch(2023, 12, 31)) is None
+
+
+def test_ohlc_merges_buckets_across_months(store):
+    # Hourly ticks either side of a month boundary fall into one daily-aligned 2-day bucket
+    start = epoch(2024, 1, 31)
+    ts = np.arange(start, start + 2 * 86400, 3600)
+    prices = np.arange(len(ts), dtype=float)
+    store.append('BTC', ts, prices)
+
+    ohlc = store.ohlc('BTC', start, start + 2 * 86400, 2 * 86400)
+    expected_bucket = start // (2 * 86400) * (2 * 86400)
+    assert ohlc['ts'][0] == expected_bucket
+    assert sum(ohlc['count']) == 48
+    assert ohlc['open'][0] == 0.0
+    assert ohlc['close'][-1] == 47.0
+    assert max(ohlc['high']) == 47.0 and min(ohlc['low']) == 0.0
+
+    daily = store.ohlc('BTC', start, start + 2 * 86400, 86400)
+    assert daily['open'] == [0.0, 24.0]
+    assert daily['high'] == [23.0, 47.0]
+    assert daily['low'] == [0.0, 24.0]
+    assert daily['close'] == [23.0, 47.0]
+    assert daily['count'] == [24, 24]
+
+
+def test_ohlc_bucket_wider_than_a_month(app, client, init_db, store):
+    # Daily ticks over four months in 60-day buckets: a whole month can merge into the previous bucket
+    ts = np.arange(epoch(2024, 1, 1), epoch(2024, 5, 1) + 1, 86400)
+    store.append('ETH', ts, np.arange(len(ts), dtype=float))
+
+    interval = 60 * 86400
+    ohlc = store.ohlc('ETH', epoch(2024, 1, 1), epoch(2024, 5, 2), interval)
+    assert ohlc['ts'] == sorted(set(ohlc['ts']))
+    assert sum(ohlc['count']) == len(ts)
+    assert ohlc['open'][0] == 0.0 and ohlc['close'][-1] == float(len(ts) - 1)
+    assert ohlc['ts'] == [int(t) for t in np.unique(ts // interval * interval)]
+
+    # A very wide range only reads the months that exist
+    ts_all, _ = store.range('ETH', 0, 2 ** 40)
+    assert len(ts_all) == len(ts)
+
+    app.config['PRICE_HISTORY_DIR'] = store.root
+    user = User.query.filter_by(username='testuser').first()
+    response = client.get(f'/api/prices/eth/history?start={epoch(2024, 1, 1)}&end={epoch(2024, 5, 2)}&interval=60d',
+                          headers=get_auth_headers(user))
+    assert response.status_code == 200
+    assert response.get_json()['history']['count'] == ohlc['count']
+
+
+def test_ingest_prices_cli(app, init_db, tmp_path):
+    csv_path = tmp_path / 'prices.csv'
+    csv_path.write_text('symbol,timestamp,price\naapl,2024-01-01T00:00:00Z,10\nAAPL,1704153600,11\n')
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['ingest-prices', '--file', str(csv_path)])
+    assert 'Ingested 2 prices' in result.output
+
+    # One day of hourly ticks per held symbol; the window edges may add one tick each
+    result = runner.invoke(args=['ingest-prices', '--stub', '--days', '1', '--step', '3600'])
+    assert result.output.startswith('Ingested') and 48 <= int(result.output.split()[1]) <= 50
+
+    store = PriceHistoryStore(app.config['PRICE_HISTORY_DIR'])
+    assert store.symbols() == ['AAPL', 'BTC']
+
+
+def test_price_history_endpoint(app, client, init_db):
+    store = PriceHistoryStore(app.config['PRICE_HISTORY_DIR'])
+    start = epoch(2024, 1, 1)
+    ingest_from_provider(store, StubPriceProvider(), ['AAPL'], start, start + 86400, 60)
+
+    user = User.query.filter_by(username='testuser').first()
+    headers = get_auth_headers(user)
+
+    response = client.get(f'/api/prices/aapl/history?start={start}&end={start + 86400}&interval=1h', headers=headers)
+    assert response.status_code == 200
+    history = response.get_json()['history']
+    assert len(history['ts']) == 24
+    assert history['count'] == [60] * 24
+
+    # 1440 raw points exceed the page cap, and are rejected before being copied
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(PriceHistoryStore, 'range', lambda *args: pytest.fail('range read before the cap check'))
+        response = client.get(f'/api/prices/aapl/history?start={start}&end={start + 86400}', headers=headers)
+    assert response.status_code == 400
+    assert store.count('AAPL', start, start + 86400) == 1440
+
+    response = client.get(f'/api/prices/aapl/history?start={start}&end={start + 3600}', headers=headers)
+    assert len(response.get_json()['history']['price']) == 60
+
+    response = client.get('/api/prices/aapl/history?interval=-1h', headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,73 @@
+# tests/test_transactions.py
+
+import pytest
+from app import create_app, db
+from app.models import User, Profile, Transactions
+from app.utils.helpers.fx_helpers import fx_cache, store_fx_rates
+from flask_jwt_extended import create_access_token
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        fx_cache.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def init_db(app):
+    with app.app_context():
+        # Create a test user with one transaction
+        user = User(email='testuser@example.com', username='testuser', password='testpassword')
+        db.session.add(user)
+        db.session.commit()
+        db.session.add(Transactions(amount=50.0, wallet_address='0xabc', coin_type='USDT', user_id=user.id))
+        db.session.commit()
+
+
+def get_auth_headers(user):
+    access_token = create_access_token(identity=user.id)
+    return {'Authorization': f'Bearer {access_token}'}
+
+
+def test_get_transactions_fields(client, init_db):
+    user = User.query.filter_by(username='testuser').first()
+    headers = get_auth_headers(user)
+
+    response = client.get(f'/api/user/{user.id}/transactions', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()[0].keys() == {'id', 'amount', 'wallet_address', 'wallet_type', 'coin_type',
+                                             'screenshot_url', 'status', 'created_at', 'currency'}
+
+    response = client.get(f'/api/user/{user.id}/transactions?fields=amount,status', headers=headers)
+    assert response.get_json() == [{'amount': 50.0, 'currency': 'USD', 'status': 'pending'}]
+
+    response = client.get(f'/api/user/{user.id}/transactions?fields=status', headers=headers)
+    assert response.get_json() == [{'status': 'pending'}]
+
+    response = client.get(f'/api/user/{user.id}/transactions?fields=user_id', headers=headers)
+    assert response.status_code == 400
+
+
+def test_get_transactions_in_profile_currency(client, init_db):
+    user = User.query.filter_by(username='testuser').first()
+    db.session.add(Profile(vasset_user_id=user.id, currency_code='ngn'))
+    db.session.commit()
+    headers = get_auth_headers(user)
+
+    # Without a rate for the profile's currency, amounts stay in dollars
+    response = client.get(f'/api/user/{user.id}/transactions?fields=amount', headers=headers)
+    assert response.get_json() == [{'amount': 50.0, 'currency': 'USD'}]
+
+    store_fx_rates({'NGN': 1500.0, 'EUR': 0.9})
+    response = client.get(f'/api/user/{user.id}/transactions?fields=amount', headers=headers)
+    assert response.get_json() == [{'amount': 75000.0, 'currency': 'NGN'}]